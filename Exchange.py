@@ -1,21 +1,26 @@
+import startup_profile  # 必須最先載入：--profile-startup 時記錄各模組的載入時間
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
-import threading
+import sys
+from background_worker import BackgroundWorker  # 在背景連線，結果交回 Tk 主執行緒
+from poe_core import rates  # 價格解析與交換比率（與其他前端共用）
+from poe_core.ninja_client import NinjaClient, DEFAULT_LEAGUE  # 快取、限速、並行的 poe.ninja 客戶端
+# 價格歷史與套利搜尋需要 numpy，在背景連線或按下按鈕時才載入
 
 class ExchangeRateApp:
-    NINJA_CURRENCY_API_URL = "https://poe.ninja/api/data/currencyoverview?league=Settlers&type=Currency"
-    NINJA_FRAGMENT_API_URL = "https://poe.ninja/api/data/itemoverview?league=Settlers&type=Fragment"
-    NINJA_SCARAB_API_URL = "https://poe.ninja/api/data/itemoverview?league=Settlers&type=Scarab"
-
-    def __init__(self, root):
+    def __init__(self, root, league: str = DEFAULT_LEAGUE):
         self.root = root
-        self.root.title("交易所比值計算器")
+        self.root.title(f"交易所比值計算器 - {league}")
+
+        # 同時抓取各類別，回應快取在硬碟上，重開程式不必重新下載
+        self.client = NinjaClient(league)
+        self.price_history = None  # 第一次取得價格時建立
 
         # 初始化變數
         self.currency_items = {}  # 通貨類（如 Divine Orb 和 Chaos Orb）
         self.fragment_items = {}  # 碎片類
         self.scarab_items = {}    # 聖甲蟲類
+        self.overviews = {}       # 最近一次取得的 poe.ninja 資料，供套利搜尋使用
         self.selected_want_item = tk.StringVar(value="選擇物品")
         self.selected_have_item = tk.StringVar(value="選擇通貨")
         self.exchange_rate = tk.StringVar(value="1:0.00")
@@ -23,8 +28,9 @@ class ExchangeRateApp:
         # 設置 UI
         self.setup_ui()
 
-        # 加載物品價格數據 (在新線程中運行)
-        threading.Thread(target=self.load_items_from_api).start()
+        # 加載物品價格數據（在背景執行緒連線，Tk 元件只在主執行緒更新）
+        self.worker = BackgroundWorker(root, "fetch")
+        self.load_items_from_api()
 
     def setup_ui(self):
         main_frame = ttk.Frame(self.root, padding="10")
@@ -49,13 +55,36 @@ class ExchangeRateApp:
         calculate_button = ttk.Button(main_frame, text="計算", command=self.calculate_exchange_rate)
         calculate_button.grid(row=3, column=0, columnspan=2, pady=10)
 
+        # 在所有通貨與物品之間尋找多步交換的套利循環
+        arbitrage_button = ttk.Button(main_frame, text="尋找套利", command=self.find_arbitrage)
+        arbitrage_button.grid(row=4, column=0, columnspan=2, pady=5)
+
     def load_items_from_api(self):
         """從 API 獲取最新的物品和通貨數據"""
+        self.worker.submit(self.fetch_overviews, key="fetch", on_done=self.on_overviews_loaded,
+                           on_error=self.show_load_error)
+
+    def fetch_overviews(self):
+        """（背景執行緒）同時加載通貨、碎片、聖甲蟲三個類別，不可碰觸 Tk 元件"""
+        return self.client.fetch_all(("Currency", "Fragment", "Scarab"))
+
+    def record_price_history(self, overviews):
+        """（背景執行緒）將取得的市場價格附加到價格歷史（與上次相同的價格不重複寫入）"""
+        from poe_core.price_history import PriceHistory  # 欄式價格歷史
+        from poe_core.price_ingest import PriceSnapshot
+
+        if self.price_history is None:
+            self.price_history = PriceHistory()
+        snapshot = PriceSnapshot.from_overviews(overviews)
+        return self.price_history.record_prices(snapshot.prices, snapshot.dc_ratio)
+
+    def on_overviews_loaded(self, overviews):
+        """（主執行緒）提取數據並更新選單"""
         try:
-            # 加載數據，聯盟名稱為大寫 Settlers
-            currency_data = self.fetch_data(self.NINJA_CURRENCY_API_URL)
-            fragment_data = self.fetch_data(self.NINJA_FRAGMENT_API_URL)
-            scarab_data = self.fetch_data(self.NINJA_SCARAB_API_URL)
+            currency_data = overviews["Currency"]
+            fragment_data = overviews["Fragment"]
+            scarab_data = overviews["Scarab"]
+            self.overviews = overviews
 
             # 提取數據並分類
             self.extract_currency_items(currency_data)   # 提取通貨類數據
@@ -66,28 +95,25 @@ class ExchangeRateApp:
             self.update_menus()
 
         except Exception as e:
-            messagebox.showerror("錯誤", f"無法加載數據: {e}")
+            self.show_load_error(e)
+            return
 
-    def fetch_data(self, url):
-        """從指定的 URL 加載數據"""
-        try:
-            response = requests.get(url)
-            response.raise_for_status()  # 檢查請求是否成功
-            return response.json()
-        except requests.RequestException as e:
-            print(f"API 請求失敗: {e}")
-            raise
+        # 價格歷史另外排成一個工作：寫入失敗只顯示錯誤，不影響已載入的價格
+        self.worker.submit(self.record_price_history, overviews, on_error=self.show_history_error)
+
+    def show_load_error(self, error: Exception):
+        messagebox.showerror("錯誤", f"無法加載數據: {error}")
+
+    def show_history_error(self, error: Exception):
+        messagebox.showerror("錯誤", f"保存價格歷史時發生錯誤: {error}")
 
     def extract_currency_items(self, data):
         """提取通貨類中的 Divine Orb 和 Chaos Orb"""
-        for currency in data["lines"]:
-            if currency["currencyTypeName"] in ["Divine Orb", "Chaos Orb"]:
-                self.currency_items[currency["currencyTypeName"]] = currency["chaosEquivalent"]
+        rates.extract_currency_items(data, self.currency_items)
 
     def extract_items(self, data, target_dict, name_key, value_key):
         """從數據中提取物品名稱和價格，分類到目標字典"""
-        for item in data["lines"]:
-            target_dict[item[name_key]] = item[value_key]
+        rates.extract_items(data, target_dict, name_key, value_key)
 
     def update_menus(self):
         """更新 I Want 和 I Have 的下拉選單"""
@@ -136,11 +162,32 @@ class ExchangeRateApp:
             return
 
         # 計算交換比率
-        rate = want_price / have_price
+        rate = rates.exchange_rate(want_price, have_price)
         self.exchange_rate.set(f"1:{rate:.2f}")
 
+    def find_arbitrage(self):
+        """以目前的價格建立交換比率圖，列出比率乘積大於 1 的交換循環"""
+        from poe_core.arbitrage import ExchangeGraph, format_cycle  # 多步交換的套利循環
+
+        if not self.overviews:
+            messagebox.showinfo("提示", "價格資料尚未載入。")
+            return
+        graph = ExchangeGraph()
+        graph.add_overviews(self.overviews)
+        cycles = graph.find_cycles(max_cycles=10)
+        if not cycles:
+            messagebox.showinfo("套利", f"在 {len(graph)} 個通貨與物品之間沒有找到套利循環。")
+            return
+        messagebox.showinfo("套利", "\n\n".join(format_cycle(cycle) for cycle in cycles))
+
 # 主程序運行
 if __name__ == "__main__":
+    startup_profile.mark("載入模組")
     root = tk.Tk()
-    app = ExchangeRateApp(root)
+    startup_profile.mark("建立 Tk")
+    # 聯盟名稱可由命令列指定，例如: python Exchange.py Standard
+    app = ExchangeRateApp(root, sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LEAGUE)
+    startup_profile.mark("建立視窗")
+    startup_profile.finish_after_first_paint(root, "Exchange")
     root.mainloop()
+    app.client.close()
@@ -1,13 +1,18 @@
+import startup_profile  # 必須最先載入：--profile-startup 時記錄各模組的載入時間
 import tkinter as tk
 from tkinter import messagebox, ttk, simpledialog, filedialog
-import json
-import os
-import csv
 from typing import List, Dict
+from virtual_treeview import VirtualTreeview  # 只繪製可見列的虛擬列表
+from treeview_reconciler import TreeviewReconciler  # 只修補有變動的列
+from poe_core import build_item_totals, calculate_item_totals  # 利潤計算（與其他前端共用）
+from poe_core import ItemIndex, ITEM_ID_KEY, item_key  # 物品唯一識別碼與 O(1) 查找
+from poe_core import OP_ADD, OP_DELETE  # 只附加的變更日誌
+from poe_core import open_item_store  # 依檔名選擇 JSON 日誌或 SQLite 儲存
 
 
 class ItemManagerApp:
     DATA_FILE = "items_data.json"
+    VIRTUAL_TREEVIEW = True  # 虛擬列表模式：只繪製可見範圍的列，重繪成本與資料量無關
 
     def __init__(self, root):
         self.root = root
@@ -24,25 +29,19 @@ class ItemManagerApp:
         self.sort_column = None
         self.sort_reverse = False
 
+        # item_id -> 物品的雜湊索引
+        self.item_index = ItemIndex(self.items)
+
+        # 每次修改只附加一筆紀錄（JSON 日誌）或寫入一筆交易（SQLite），不重寫整個檔案
+        self.journal = open_item_store(self.DATA_FILE)
+
         # 設定 UI
         self.setup_ui()
         self.load_items_from_file()
 
     def calculate_profit_for_item(self, item: Dict):
         """計算單個物品的利潤、總利潤和可購買數量"""
-        # 計算單個利潤
-        item['profit_c_to_c'] = item['sell_price'] - item['receive_price']
-        item['profit_c_to_d'] = (item['divine_sell_price'] * self.dc_ratio) - item['receive_price']
-    
-        # 計算可購買數量
-        item['purchasable_with_chaos'] = int(self.current_chaos // item['receive_price']) if item['receive_price'] > 0 else 0
-    
-        # 計算每 1000 混沌石可購買數量
-        item['purchasable_with_1000_chaos'] = int(1000 // item['receive_price']) if item['receive_price'] > 0 else 0
-    
-        # 計算總利潤（取混沌石或神聖石能買的最大數量來計算）
-        item['total_profit_c_to_c'] = item['profit_c_to_c'] * item['purchasable_with_chaos']
-        item['total_profit_c_to_d'] = item['profit_c_to_d'] * item['purchasable_with_chaos']
+        calculate_item_totals(item, self.current_chaos, self.dc_ratio)
 
     def update_profits(self):
         """更新每個物品的利潤數據，根據新的 DC 比率，同時更新可購買數量"""
@@ -51,27 +50,48 @@ class ItemManagerApp:
 
     def load_items_from_file(self):
         """從文件中加載物品資料"""
-        if os.path.exists(self.DATA_FILE):
+        if self.journal.exists():
             try:
-                with open(self.DATA_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.items = data.get("items", [])
-                    self.current_chaos = data.get("current_chaos", 0.0)
-                    self.current_divine = data.get("current_divine", 0.0)
-                    self.dc_ratio = data.get("dc_ratio", 1.0)
+                # 讀取快照並重播變更日誌
+                data = self.journal.load()
+                self.items = data.get("items", [])
+                self.current_chaos = data.get("current_chaos", 0.0)
+                self.current_divine = data.get("current_divine", 0.0)
+                self.dc_ratio = data.get("dc_ratio", 1.0)
+                # 日誌只記錄設定值的變動，重播過設定值時才需要依最新設定值重算
+                if self.journal.settings_replayed:
+                    self.update_profits()
+                if self.item_index.rebuild(self.items):
+                    # 舊資料沒有識別碼，立即寫入快照，之後的日誌紀錄才能對應到物品
+                    self.save_items_to_file()
             except Exception as e:
                 messagebox.showerror("錯誤", f"讀取歷史紀錄時發生錯誤: {e}")
 
+    def settings_data(self) -> Dict:
+        """需要保存的設定值"""
+        return {
+            "current_chaos": self.current_chaos,
+            "current_divine": self.current_divine,
+            "dc_ratio": self.dc_ratio
+        }
+
     def save_items_to_file(self):
-        """將物品資料保存到文件"""
+        """將物品資料完整保存到文件（快照），並清空變更日誌"""
         try:
-            with open(self.DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump({
-                    "items": self.items,
-                    "current_chaos": self.current_chaos,
-                    "current_divine": self.current_divine,
-                    "dc_ratio": self.dc_ratio
-                }, f, ensure_ascii=False, indent=4)
+            data = {"items": self.items}
+            data.update(self.settings_data())
+            self.journal.compact(data)
+        except Exception as e:
+            messagebox.showerror("錯誤", f"保存數據時發生錯誤: {e}")
+
+    def record_change(self, op=None, **payload):
+        """將單筆變更附加到日誌，寫入成本與變更大小成正比；累積到一定數量時壓縮成完整快照"""
+        try:
+            if op is not None:
+                self.journal.append(op, **payload)
+            self.journal.record_settings(**self.settings_data())
+            if self.journal.needs_compaction():
+                self.save_items_to_file()
         except Exception as e:
             messagebox.showerror("錯誤", f"保存數據時發生錯誤: {e}")
 
@@ -137,6 +157,19 @@ class ItemManagerApp:
 
         self.tree.bind("<Double-1>", self.edit_single_column)
 
+        # 高亮標籤只需設定一次
+        self.tree.tag_configure("highlight_2000C", background="green")
+        self.tree.tag_configure("highlight_1000C", background="yellow")
+        self.tree.tag_configure("normal", background="white")
+
+        # 虛擬列表接管捲動條
+        self.virtual_tree = None
+        self.tree_rows = TreeviewReconciler(self.tree, self.format_row, self.row_tag, key=item_key)
+        if self.VIRTUAL_TREEVIEW:
+            scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL)
+            scrollbar.grid(row=7, column=4, sticky="ns")
+            self.virtual_tree = VirtualTreeview(self.tree, scrollbar, self.format_row, self.row_tag)
+
         for col in columns:
             self.tree.heading(col, text=col.replace('_', ' ').capitalize(), command=lambda _col=col: self.sort_treeview(_col))
 
@@ -182,6 +215,7 @@ class ItemManagerApp:
 
         # 對資料進行排序
         self.items.sort(key=lambda x: x[col], reverse=self.sort_reverse)
+        self.item_index.rebuild()
         self.update_treeview()
 
     def manual_update_dc_ratio(self):
@@ -199,44 +233,55 @@ class ItemManagerApp:
             self.update_profits()
             self.update_treeview()
 
-            # 保存更新到文件
-            self.save_items_to_file()
+            # 只記錄設定值的變動
+            self.record_change()
 
         except ValueError:
             messagebox.showerror("錯誤", "請輸入有效的數字。")
 
+    @staticmethod
+    def format_row(item: Dict) -> tuple:
+        """將物品格式化為 TreeView 的一列"""
+        return (
+            item['item_name'],
+            f"{item['receive_price']:.2f}",
+            f"{item['sell_price']:.2f}",
+            f"{item['divine_sell_price']:.2f}",
+            f"{item['profit_c_to_c']:.2f}",
+            f"{item['profit_c_to_d']:.2f}",
+            item['purchasable_with_chaos'],
+            item['purchasable_with_1000_chaos'],  # 新位置
+            f"{item.get('total_profit_c_to_c', 0.0):.2f}",
+            f"{item.get('total_profit_c_to_d', 0.0):.2f}"
+        )
+
+    @staticmethod
+    def row_tag(item: Dict) -> str:
+        """根據總利潤決定高亮標籤"""
+        total_profit_c_to_c = item.get('total_profit_c_to_c', 0.0)
+        total_profit_c_to_d = item.get('total_profit_c_to_d', 0.0)
+        if total_profit_c_to_c > 2000 or total_profit_c_to_d > 2000:
+            return "highlight_2000C"
+        if total_profit_c_to_c > 1000 or total_profit_c_to_d > 1000:
+            return "highlight_1000C"
+        return "normal"
+
+    def row_index(self, row_id: str) -> int:
+        """由 TreeView 列 ID 取得物品在 self.items 中的索引"""
+        if self.virtual_tree is not None:
+            return self.virtual_tree.index_of(row_id)
+        # 列 ID 對應物品識別碼，再由雜湊索引查位置，不受排序影響
+        return self.item_index.position(self.tree_rows.key_of(row_id))
+
     def update_treeview(self):
         """更新 TreeView 中顯示的資料，並根據總利潤高亮"""
-        # 首先清空 TreeView 中的所有條目
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        for item in self.items:
-            total_profit_c_to_c = item.get('total_profit_c_to_c', 0.0)
-            total_profit_c_to_d = item.get('total_profit_c_to_d', 0.0)
-
-            tag = "normal"
-            if total_profit_c_to_c > 2000 or total_profit_c_to_d > 2000:
-                tag = "highlight_2000C"
-            elif total_profit_c_to_c > 1000 or total_profit_c_to_d > 1000:
-                tag = "highlight_1000C"
-
-            self.tree.insert('', 'end', values=(
-                item['item_name'],
-                f"{item['receive_price']:.2f}",
-                f"{item['sell_price']:.2f}",
-                f"{item['divine_sell_price']:.2f}",
-                f"{item['profit_c_to_c']:.2f}",
-                f"{item['profit_c_to_d']:.2f}",
-                item['purchasable_with_chaos'],
-                item['purchasable_with_1000_chaos'],  # 新位置
-                f"{total_profit_c_to_c:.2f}",
-                f"{total_profit_c_to_d:.2f}"
-            ), tags=(tag,))
+        if self.virtual_tree is not None:
+            # 虛擬列表只重繪可見範圍
+            self.virtual_tree.set_items(self.items)
+            return
 
-        self.tree.tag_configure("highlight_2000C", background="green")
-        self.tree.tag_configure("highlight_1000C", background="yellow")
-        self.tree.tag_configure("normal", background="white")
+        # 非虛擬模式：只插入新列、刪除消失的列並修補有變動的列
+        self.tree_rows.sync(self.items)
 
     def edit_single_column(self, event):
         """處理欄位的單項編輯"""
@@ -251,7 +296,7 @@ class ItemManagerApp:
             return
 
         selected_item_id = selected[0]
-        selected_index = self.tree.index(selected_item_id)
+        selected_index = self.row_index(selected_item_id)
         selected_item = self.items[selected_index]
 
         column_mapping = {
@@ -276,7 +321,8 @@ class ItemManagerApp:
                     # 更新利潤計算
                     self.calculate_profit_for_item(self.items[selected_index])
                     self.update_treeview_row(selected_index)
-                    self.save_items_to_file()
+                    # 衍生欄位也一併變動，記錄整筆物品
+                    self.record_change(OP_ADD, item=self.items[selected_index])
 
                 except (ValueError, SyntaxError):
                     messagebox.showerror("錯誤", "請確保輸入的是有效的數字或數學表達式。")
@@ -285,19 +331,11 @@ class ItemManagerApp:
 
     def update_treeview_row(self, item_index):
         """僅更新指定行的數據"""
-        item = self.items[item_index]
-        self.tree.item(self.tree.get_children()[item_index], values=(
-            item['item_name'],
-            f"{item['receive_price']:.2f}",
-            f"{item['sell_price']:.2f}",
-            f"{item['divine_sell_price']:.2f}",
-            f"{item['profit_c_to_c']:.2f}",
-            f"{item['profit_c_to_d']:.2f}",
-            item['purchasable_with_chaos'],
-            item['purchasable_with_divine'],
-            f"{item['total_profit_c_to_c']:.2f}",
-            f"{item['total_profit_c_to_d']:.2f}"
-        ))
+        if self.virtual_tree is not None:
+            # 不在可見範圍內的列不需要重繪
+            self.virtual_tree.refresh()
+            return
+        self.tree_rows.update_item(self.items[item_index])
 
     def calculate_profit(self):
         """計算利潤並添加物品記錄"""
@@ -312,39 +350,16 @@ class ItemManagerApp:
             messagebox.showerror("錯誤", "請輸入有效的數字或數學表達式。")
             return
 
-        # 利潤計算
-        profit_c_to_c = sell_price - receive_price
-        profit_c_to_d = (divine_sell_price * self.dc_ratio) - receive_price
-
-        # 可購買數量計算
-        purchasable_with_chaos = int(self.current_chaos // receive_price) if receive_price > 0 else 0
-        purchasable_with_divine = int((self.current_divine * self.dc_ratio) // receive_price) if receive_price > 0 else 0
-
-        # 總利潤計算
-        max_purchasable = max(purchasable_with_chaos, purchasable_with_divine)
-        total_profit_c_to_c = profit_c_to_c * max_purchasable if max_purchasable > 0 else 0.0
-        total_profit_c_to_d = profit_c_to_d * max_purchasable if max_purchasable > 0 else 0.0
-
-        # 創建物品資料結構
-        item_data = {
-            "item_name": item_name,
-            "receive_price": receive_price,
-            "sell_price": sell_price,
-            "divine_sell_price": divine_sell_price,
-            "dc_ratio": self.dc_ratio,
-            "profit_c_to_c": profit_c_to_c,
-            "profit_c_to_d": profit_c_to_d,
-            "purchasable_with_chaos": purchasable_with_chaos,
-            "purchasable_with_divine": purchasable_with_divine,
-            "total_profit_c_to_c": total_profit_c_to_c,
-            "total_profit_c_to_d": total_profit_c_to_d
-        }
+        # 利潤、可購買數量與總利潤計算
+        item_data = build_item_totals(item_name, receive_price, sell_price, divine_sell_price,
+                                      self.current_chaos, self.current_divine, self.dc_ratio)
 
         # 將物品添加到列表中
         self.items.append(item_data)
+        self.item_index.add(item_data)
 
         # 保存到文件
-        self.save_items_to_file()
+        self.record_change(OP_ADD, item=item_data)
 
         # 確保 TreeView 更新顯示數據
         self.update_treeview()
@@ -364,11 +379,16 @@ class ItemManagerApp:
 
         try:
             selected_item_id = selected[0]
-            selected_index = int(self.tree.index(selected_item_id))  # 確保轉換為正確的索引
+            selected_index = int(self.row_index(selected_item_id))  # 確保轉換為正確的索引
+            removed_id = self.items[selected_index][ITEM_ID_KEY]
             del self.items[selected_index]
+            self.item_index.remove(removed_id)
 
-            self.tree.delete(selected_item_id)
-            self.save_items_to_file()
+            if self.virtual_tree is not None:
+                self.virtual_tree.refresh(selected=[])  # 被刪除的列不再保留選取
+            else:
+                self.update_treeview()
+            self.record_change(OP_DELETE, item_id=removed_id)
 
             messagebox.showinfo("成功", "已成功刪除選中的紀錄。")
         except IndexError as e:
@@ -386,7 +406,7 @@ class ItemManagerApp:
             self.chaos_quantity_label.config(text=f"倉庫混沌石數量: {int(self.current_chaos // 1)}")
             self.update_profits()
             self.update_treeview()
-            self.save_items_to_file()
+            self.record_change()
         except ValueError:
             messagebox.showerror("錯誤", "請輸入有效的數字。")
 
@@ -400,12 +420,14 @@ class ItemManagerApp:
             self.divine_quantity_label.config(text=f"倉庫神聖石數量: {int(self.current_divine)}")
             self.update_profits()
             self.update_treeview()
-            self.save_items_to_file()
+            self.record_change()
         except ValueError:
             messagebox.showerror("錯誤", "請輸入有效的數字。")
 
     def export_to_csv(self):
         """將物品資料匯出為 CSV"""
+        import csv  # 只在匯出時載入
+
         export_file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
         if not export_file_path:
             return
@@ -439,6 +461,10 @@ class ItemManagerApp:
 
 # 主程式執行
 if __name__ == "__main__":
+    startup_profile.mark("載入模組")
     root = tk.Tk()
+    startup_profile.mark("建立 Tk")
     app = ItemManagerApp(root)
+    startup_profile.mark("建立視窗")
+    startup_profile.finish_after_first_paint(root, "Profit_Final")
     root.mainloop()
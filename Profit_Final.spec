@@ -1,4 +1,7 @@
 # -*- mode: python ; coding: utf-8 -*-
+from PyInstaller.utils.hooks import collect_submodules
+
+# poe_core 的匯出名稱在取用時才以 importlib 載入所在模組，靜態分析找不到，需要列出
 
 
 a = Analysis(
@@ -6,7 +9,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    hiddenimports=collect_submodules('poe_core'),
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
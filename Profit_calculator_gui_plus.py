@@ -1,8 +1,10 @@
+import startup_profile  # 必須最先載入：--profile-startup 時記錄各模組的載入時間
 import tkinter as tk
-from tkinter import messagebox, ttk, END, simpledialog, filedialog, Toplevel
+from tkinter import messagebox, ttk, END, simpledialog, filedialog
 import json
 import os
 import csv
+from poe_core import divine_trade, parse_fraction, purchasable, read_json, write_json  # 計算與儲存（與其他前端共用）
 
 # 文件名常量
 DATA_FILE = "items_data.json"
@@ -16,12 +18,7 @@ root = None  # 全局主窗口
 def parse_fractional_input(value_str):
     """嘗試將字符串解析為浮點數，支持 '1/2' 這樣的分數格式"""
     try:
-        # 如果字符串中有'/'，解析為除法
-        if '/' in value_str:
-            numerator, denominator = value_str.split('/')
-            return float(numerator) / float(denominator)
-        else:
-            return float(value_str)
+        return parse_fraction(value_str)
     except ValueError:
         raise ValueError("輸入錯誤，無法解析為有效數字")
 
@@ -30,21 +27,20 @@ def load_items_from_file():
     global items, current_chaos, current_divine
     if os.path.exists(DATA_FILE):
         try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                items = data.get("items", [])
-                current_chaos = data.get("current_chaos", 0.0)
-                current_divine = data.get("current_divine", 0.0)
-                # 確保每個項目包含所有必要的鍵
-                for item in items:
-                    item.setdefault('divine_buy_price', 0.0)
-                    item.setdefault('divine_sell_price', 0.0)
-                    item.setdefault('profit_c_to_c', 0.0)
-                    item.setdefault('profit_c_to_d', 0.0)
-                    item.setdefault('purchasable_with_chaos', 0)
-                    item.setdefault('purchasable_with_divine', 0)
-                    item.setdefault('dc_ratio', 1.0)  # 設定預設 DC 比率
-                    item.setdefault('item_coin_value', 0.0)  # 設定預設物品價值
+            data = read_json(DATA_FILE)
+            items = data.get("items", [])
+            current_chaos = data.get("current_chaos", 0.0)
+            current_divine = data.get("current_divine", 0.0)
+            # 確保每個項目包含所有必要的鍵
+            for item in items:
+                item.setdefault('divine_buy_price', 0.0)
+                item.setdefault('divine_sell_price', 0.0)
+                item.setdefault('profit_c_to_c', 0.0)
+                item.setdefault('profit_c_to_d', 0.0)
+                item.setdefault('purchasable_with_chaos', 0)
+                item.setdefault('purchasable_with_divine', 0)
+                item.setdefault('dc_ratio', 1.0)  # 設定預設 DC 比率
+                item.setdefault('item_coin_value', 0.0)  # 設定預設物品價值
         except json.JSONDecodeError:
             items = []
             messagebox.showwarning("警告", "歷史紀錄檔案格式錯誤，已重新建立。")
@@ -55,12 +51,11 @@ def load_items_from_file():
 # 保存數據
 def save_items_to_file():
     try:
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump({
-                "items": items, 
-                "current_chaos": current_chaos, 
-                "current_divine": current_divine
-            }, f, ensure_ascii=False, indent=4)
+        write_json(DATA_FILE, {
+            "items": items,
+            "current_chaos": current_chaos,
+            "current_divine": current_divine
+        })
     except Exception as e:
         messagebox.showerror("錯誤", f"保存數據時發生錯誤: {e}")
 
@@ -110,15 +105,10 @@ def edit_single_column(event):
                 new_value = parse_fractional_input(new_value_str)
                 items[selected_index][field_name] = new_value
 
-                # 重新計算利潤
-                profit_c_to_c = items[selected_index]['sell_price'] - items[selected_index]['receive_price']
-                profit_c_to_d = items[selected_index]['divine_sell_price'] * items[selected_index]['dc_ratio'] - items[selected_index]['divine_buy_price']
-                items[selected_index]['profit_c_to_c'] = profit_c_to_c
-                items[selected_index]['profit_c_to_d'] = profit_c_to_d
-
-                # 更新可購買數量
-                items[selected_index]['purchasable_with_chaos'] = int(current_chaos // items[selected_index]['receive_price']) if items[selected_index]['receive_price'] > 0 else 0
-                items[selected_index]['purchasable_with_divine'] = int((current_divine * items[selected_index]['dc_ratio']) // items[selected_index]['divine_buy_price']) if items[selected_index]['divine_buy_price'] > 0 else 0
+                # 重新計算利潤與可購買數量
+                selected_item.update(divine_trade(
+                    selected_item['receive_price'], selected_item['sell_price'], selected_item['divine_buy_price'],
+                    selected_item['divine_sell_price'], selected_item['dc_ratio'], current_chaos, current_divine))
 
                 # 更新 Treeview 中的顯示
                 tree.item(selected_item_id, values=(
@@ -188,14 +178,10 @@ def update_resources():
                 dc_ratio = 1.0  # 預設值，防止出錯
 
             # 用混沌石計算可購買數量
-            item['purchasable_with_chaos'] = int(current_chaos // item['receive_price']) if item['receive_price'] > 0 else 0
+            item['purchasable_with_chaos'] = purchasable(current_chaos, item['receive_price'])
 
-            # 將神聖石換算為混沌石再計算可購買數量
-            total_chaos_from_divine = current_divine * dc_ratio  # 先將神聖石換算為混沌石
-            if item['receive_price'] > 0:
-                item['purchasable_with_divine'] = int(total_chaos_from_divine // item['receive_price'])  # 依混沌石價格購買
-            else:
-                item['purchasable_with_divine'] = 0
+            # 將神聖石換算為混沌石再依混沌石價格計算可購買數量
+            item['purchasable_with_divine'] = purchasable(current_divine * dc_ratio, item['receive_price'])
 
             # 更新 Treeview 中的顯示
             tree.item(tree.get_children()[index], values=(
@@ -270,17 +256,7 @@ def calculate_profit():
         messagebox.showerror("錯誤", "單位物品價值輸入錯誤。")
         return
 
-    # 計算 C 收 C 賣利潤
-    profit_c_to_c = sell_price - receive_price
-
-    # 計算 C 收 D 賣利潤
-    profit_c_to_d = divine_sell_price * dc_ratio - divine_buy_price
-
-    # 計算可購買數量
-    purchasable_with_chaos = int(current_chaos // receive_price) if receive_price > 0 else 0
-    purchasable_with_divine = int((current_divine * dc_ratio) // divine_buy_price) if divine_buy_price > 0 else 0
-
-    # 保存紀錄
+    # 保存紀錄（C 收 C 賣、C 收 D 賣利潤與可購買數量）
     item_data = {
         "item_name": item_name,
         "receive_price": receive_price,
@@ -288,12 +264,10 @@ def calculate_profit():
         "divine_buy_price": divine_buy_price,
         "divine_sell_price": divine_sell_price,
         "dc_ratio": dc_ratio,
-        "item_coin_value": item_coin_value,
-        "profit_c_to_c": profit_c_to_c,
-        "profit_c_to_d": profit_c_to_d,
-        "purchasable_with_chaos": purchasable_with_chaos,
-        "purchasable_with_divine": purchasable_with_divine
+        "item_coin_value": item_coin_value
     }
+    item_data.update(divine_trade(receive_price, sell_price, divine_buy_price, divine_sell_price,
+                                  dc_ratio, current_chaos, current_divine))
     items.append(item_data)
     save_items_to_file()
 
@@ -352,6 +326,7 @@ def main():
     global entry_divine_buy_price, entry_divine_sell_price
 
     root = tk.Tk()
+    startup_profile.mark("建立 Tk")
     root.title("交易計算器")
     root.geometry("1200x600")  # 設定初始視窗大小
 
@@ -461,9 +436,12 @@ def main():
     # 加載歷史紀錄並顯示
     for item in items:
         display_item_in_treeview(tree, item)
+    startup_profile.mark("建立視窗")
+    startup_profile.finish_after_first_paint(root, "Profit_calculator_gui_plus")
 
     root.mainloop()
 
 if __name__ == "__main__":
+    startup_profile.mark("載入模組")
     load_items_from_file()
     main()
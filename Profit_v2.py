@@ -1,198 +1,236 @@
+import startup_profile  # 必須最先載入：--profile-startup 時記錄各模組的載入時間
 import tkinter as tk
 from tkinter import messagebox, ttk, simpledialog, filedialog
 import json
-import os
-import csv
 import re  # 引入正則表達式模組
+import itertools
+import threading
 from typing import List, Dict
 from fractions import Fraction  # 引入 fractions 模組以處理分數
+from virtual_treeview import VirtualTreeview  # 只繪製可見列的虛擬列表
+from treeview_reconciler import TreeviewReconciler  # 只修補有變動的列
+from background_worker import BackgroundWorker  # 重算與存檔在背景執行緒進行，結果交回主執行緒
+from autosave import AutosaveScheduler  # 合併多次修改的自動保存
+from poe_core import ItemCalculator, parse_fraction  # 單筆利潤計算（與其他前端共用）
+from poe_core import RecomputeGraph  # 增量重算欄位依賴圖
+from poe_core import ItemIndex, ITEM_ID_KEY, item_key  # 物品唯一識別碼與 O(1) 查找
+from poe_core import OP_ADD, OP_EDIT, OP_DELETE  # 只附加的變更日誌
+from poe_core import open_item_store  # 依檔名選擇 JSON 日誌或 SQLite 儲存
+from poe_core import Item  # __slots__ 物品紀錄，欄位固定
+from poe_core.price_ingest import apply_snapshot, load_snapshot  # 價格快照批次匯入
+from poe_core import PriceHistory  # 欄式價格歷史
+from poe_core import DEFAULT_FEES, CoinFees  # 各交易路線的金幣費用表
+# 連線（poe.ninja）、最佳分配、情境分析與 CSV 匯出只在使用時才載入，縮短啟動時間
 
 
-# 將物品的計算邏輯抽離到獨立的類
-class ItemCalculator:
-    @staticmethod
-    def calculate_profit(item: Dict, current_chaos: float, dc_ratio: float, item_coin_value: float):
-        # 初始化缺失的鍵
-        item.setdefault('extra_coin', 0.0)
-        item.setdefault('profit_c_to_c', 0.0)
-        item.setdefault('profit_c_to_d', 0.0)
-        item.setdefault('purchasable_with_chaos', 0)
-        item.setdefault('receive_coin', 0.0)
-        item.setdefault('sell_coin', 0.0)
-        item.setdefault('avg_coin_c', 0.0)
-        item.setdefault('sell_div_coin', 0.0)
-        item.setdefault('avg_coin_d', 0.0)
-        item.setdefault('avg_coin_d_extra', 0.0)
-        item.setdefault('total_profit_c_to_c', 0.0)
-        item.setdefault('total_profit_c_to_d', 0.0)
-        item.setdefault('required_chaos', 0.0)  # 新增的鍵
-
-        # 加上這段初始化可購買數量的邏輯
-        if 'purchasable_with_chaos' not in item or item['purchasable_with_chaos'] == 0:
-            item['purchasable_with_chaos'] = int(current_chaos // item['receive_price']) if item['receive_price'] > 0 else 0
-
-        receive_price = item['receive_price']  # 購買價格 (混沌石)
-        sell_price = item['sell_price']  # 出售價格 (混沌石)
-
-        # 嘗試將「神聖石販賣價格」轉換為數字
-        try:
-            divine_sell_price = float(Fraction(str(item['divine_sell_price'])))  # 轉換為浮點數
-        except ValueError:
-            raise ValueError("請輸入有效的數字（例如: 1.23 或 3/4）")
-
-        # C收C賣利潤計算
-        item['profit_c_to_c'] = round(sell_price - receive_price, 2)
-
-        # C買D賣利潤計算
-        sell_div_num_chaos = round(divine_sell_price * dc_ratio, 2)  # 神聖石販賣價格轉混沌石價值
-        item['profit_c_to_d'] = round(sell_div_num_chaos - receive_price, 2)
-
-        # 可購買數量
-        item['purchasable_with_chaos'] = int(current_chaos // receive_price) if receive_price > 0 else 0
-
-        # 計算所需C
-        item['required_chaos'] = item['purchasable_with_chaos'] * receive_price  # 所需C = 購買數量 * 購買價格
-
-        # C收C賣總利潤計算
-        item['total_profit_c_to_c'] = round(item['profit_c_to_c'] * item['purchasable_with_chaos'], 2)
-
-        # C買D賣總利潤計算
-        item['total_profit_c_to_d'] = round(item['profit_c_to_d'] * item['purchasable_with_chaos'], 2)
-
-        # C收C賣金幣計算
-        item['receive_coin'] = round(item_coin_value * item['purchasable_with_chaos'], 2)  # 購買物品的金幣消耗
-        item['sell_coin'] = round(item['purchasable_with_chaos'] * sell_price, 2)  # 出售物品的金幣收益
-        all_coin_c = round(item['receive_coin'], 2)  # C收C賣的總金幣消耗（注意：不包括賣出的金幣收益）
-        avg_coin_c = round(all_coin_c / item['total_profit_c_to_c'], 2) if item['total_profit_c_to_c'] > 0 else 0
-        item['avg_coin_c'] = avg_coin_c
-
-        # C買D賣金幣計算
-        item['sell_div_coin'] = round(item['purchasable_with_chaos'] * sell_div_num_chaos, 2)  # C買D賣的金幣收益
-        all_coin_d = round(item['receive_coin'] + item['sell_div_coin'], 2)  # C買D賣的總金幣消耗
-        avg_coin_d = round(all_coin_d / item['profit_c_to_d'], 2) if item['profit_c_to_d'] > 0 else "無法計算（虧損）"
-        item['avg_coin_d'] = avg_coin_d
-
-        # 使用新邏輯來計算 avg_coin_d 和 avg_coin_d_extra
-        if item['total_profit_c_to_d'] <= 0:
-            # 當交易利潤為負數或等於 0
-            item['avg_coin_d'] = "無法計算（虧損）"
-            item['avg_coin_d_extra'] = "無法計算（虧損）"
-        else:
-            # 正常情況下計算
-            item['avg_coin_d'] = round(all_coin_d / item['total_profit_c_to_d'], 2)
-            item['avg_coin_d_extra'] = round((all_coin_d + item['extra_coin']) / item['total_profit_c_to_d'], 2)
-
-        # 額外金幣成本計算 (D換C)
-        extra_coin = round(item['purchasable_with_chaos'] * 25, 2)  # D換C 額外支付的金幣
-        item['extra_coin'] = extra_coin
-        avg_coin_d_extra = round((all_coin_d + extra_coin) / item['profit_c_to_d'], 2) if item['profit_c_to_d'] > 0 else "無法計算（虧損）"
-        item['avg_coin_d_extra'] = avg_coin_d_extra
-
-        # Debug prints for verification
-        # print(f"購買價格: {receive_price} chaos")
-        # print(f"販賣價格: {sell_price} chaos")
-        # print(f"神聖石販賣價格: {divine_sell_price} divine")
-        # print(f"當前DC比率: {dc_ratio}")
-        # print(f"單位物品價值: {item_coin_value} 金幣")
-        # print(f"--------------------------------")
-        # print(f"C收C賣，利潤是: {item['profit_c_to_c']} C")
-        # print(f"C收C賣，總利潤是: {item['total_profit_c_to_c']} C")
-        # print(f"C收C賣，消耗金幣是: {all_coin_c}")
-        # print(f"C收C賣，平均賺1C需要的金幣是: {item['avg_coin_c']}")
-        # print(f"--------------------------------")
-        # print(f"C買D賣的利潤是: {item['profit_c_to_d']} C")
-        # print(f"C買D賣，總利潤是: {item['total_profit_c_to_d']} C")
-        # print(f"C買D賣消耗的金幣是: {all_coin_d}")
-        # print(f"C買D賣，平均賺1C需要的金幣是: {item['avg_coin_d']}")
-        # print(f"從Faustus換C需要額外支付{extra_coin}金幣，因此平均賺1C需要的金幣是: {item['avg_coin_d_extra']}")
-        # print(f"--------------------------------")
-
-
-# UI 和主要邏輯類
 class ItemManagerApp:
     DATA_FILE = "items_data_v2.json"
+    VIRTUAL_TREEVIEW = True  # 虛擬列表模式：只繪製可見範圍的列，重繪成本與資料量無關
+    FIRST_PAINT_ROWS = 50  # 讀到這麼多筆物品就先顯示第一個畫面
+    LOAD_CHUNK_ROWS = 5000  # 背景載入時每批讀取的物品數量
+    AUTOSAVE_INTERVAL_MS = 1000  # 自動保存間隔：間隔內的多次修改只寫入一次
 
     def __init__(self, root):
         self.root = root
         self.root.title("交易計算器")
 
         # 初始化變數
-        self.items: List[Dict] = []
+        self.items: List[Item] = []
         self.current_chaos = 0.0
         self.dc_ratio = 1.0  # 神聖石匯率初始化
         self.item_coin_value = 0.0  # 初始為 0，將根據文件加載或用戶輸入設置
         self.exchange_rates = {"chaos": 1.0, "divine": 1.0}  # 初始化匯率
+        self.coin_fees = DEFAULT_FEES  # 金幣費用表，可在資料檔的 coin_fees 設定中修改
 
         # 排序相關變數
         self.sort_column = None
         self.sort_reverse = False
 
+        # item_id -> 物品的雜湊索引
+        self.item_index = ItemIndex(self.items)
+
+        # 每次修改只附加一筆紀錄（JSON 日誌）或寫入一筆交易（SQLite），不重寫整個檔案
+        self.journal = open_item_store(self.DATA_FILE)
+
+        # 增量重算：只重算受設定值或物品變動影響的欄位與列
+        self.profit_graph = RecomputeGraph(self.items, self.current_chaos, self.dc_ratio, self.item_coin_value,
+                                           self.coin_fees)
+
+        # 每次價格變動附加到價格歷史（每個欄位一個二進位檔）
+        self.price_history = PriceHistory()
+
+        # 背景載入中的物品串流，載入完成後為 None
+        self.item_stream = None
+
+        # 重算與存檔交給背景執行緒，Tk 主執行緒只處理畫面；profit_graph 兩邊共用，以鎖保護
+        self.graph_lock = threading.Lock()
+        self.worker = BackgroundWorker(root, "data")
+        # 網路請求另用一個執行緒，不會擋住重算與存檔
+        self.fetch_worker = BackgroundWorker(root, "fetch")
+        self.stash_reader = None  # 截圖辨識，第一次使用時才建立
+
+        # 修改只記在記憶體並標記為未保存，自動保存時一次寫入日誌（或整個快照）
+        self.pending_changes = []  # 尚未寫入的 (op, payload)
+        self.needs_snapshot = False  # 下次保存寫入完整快照
+        self.autosave = AutosaveScheduler(root, self.worker, self.prepare_save, self.AUTOSAVE_INTERVAL_MS,
+                                          on_saved=self.on_saved, on_error=self.show_save_error)
+
         # 設定 UI
         self.setup_ui()
         self.load_items_from_file()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
    
     def update_profits(self):
         """更新每個物品的利潤數據，根據新的 DC 比率，同時更新可購買數量"""
         item_coin_value = float(self.entry_item_coin_value.get()) if self.entry_item_coin_value.get() else 0.0
         if item_coin_value > 0:
             self.item_coin_value = item_coin_value  # 更新類別變數中的金幣值
-        for item in self.items:
-            ItemCalculator.calculate_profit(item, self.current_chaos, self.dc_ratio, self.item_coin_value)
-
-        # 更新 TreeView 顯示
+        with self.graph_lock:
+            self.profit_graph.update_settings(self.current_chaos, self.dc_ratio, self.item_coin_value)
+        # 在背景只重算髒欄位的髒列（結果與逐一呼叫 ItemCalculator.calculate_profit 相同），
+        # 連續多次修改只重算一次，完成後在主執行緒更新 TreeView
+        self.worker.submit(self.recompute_profits, key="recompute", on_done=self.on_profits_recomputed)
+
+    def recompute_profits(self) -> int:
+        """（背景執行緒）重算所有髒儲存格"""
+        with self.graph_lock:
+            return self.profit_graph.recompute()
+
+    def on_profits_recomputed(self, recomputed: int):
         self.update_treeview()
 
+    def on_close(self):
+        """關閉視窗前寫入尚未保存的修改，並等待背景的重算與存檔完成"""
+        self.autosave.flush()
+        self.worker.close()
+        self.root.destroy()
+
     def load_items_from_file(self):
-        """從文件中加載物品資料並檢查數據類型"""
-        if os.path.exists(self.DATA_FILE):
-            try:
-                with open(self.DATA_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.items = data.get("items", [])
-                    self.current_chaos = float(data.get("current_chaos", 0.0))
-                    self.dc_ratio = float(data.get("dc_ratio", 1.0))
-                    self.item_coin_value = float(data.get("item_coin_value", 0.0))
-
-                    # 初始化缺失的鍵
-                    for item in self.items:
-                        item.setdefault('extra_coin', 0.0)
-                        item.setdefault('profit_c_to_c', 0.0)
-                        item.setdefault('profit_c_to_d', 0.0)
-                        item.setdefault('purchasable_with_chaos', 0)
-                        item.setdefault('receive_coin', 0.0)
-                        item.setdefault('sell_coin', 0.0)
-                        item.setdefault('avg_coin_c', 0.0)
-                        item.setdefault('sell_div_coin', 0.0)
-                        item.setdefault('avg_coin_d', 0.0)
-                        item.setdefault('avg_coin_d_extra', 0.0)
-                        item.setdefault('total_profit_c_to_c', 0.0)
-                        item.setdefault('total_profit_c_to_d', 0.0)
-
-                        # 初始化可購買數量
-                        if 'purchasable_with_chaos' not in item or item['purchasable_with_chaos'] == 0:
-                            item['purchasable_with_chaos'] = int(self.current_chaos // item['receive_price']) if item['receive_price'] > 0 else 0
-
-                # 載入數據後重新計算每個物品的利潤
-                self.update_profits()
-
-                # 載入並更新 TreeView 顯示
-                self.update_treeview()
-
-            except (ValueError, json.JSONDecodeError) as e:
-                messagebox.showerror("錯誤", f"讀取歷史紀錄時發生錯誤: {e}")
+        """串流讀取物品資料：第一個畫面的物品一讀到就顯示，其餘在背景分批載入"""
+        if not self.journal.exists():
+            return
+        self.items = []
+        self.loaded_data = {}
+        self.item_stream = self.journal.iter_snapshot(self.loaded_data, Item)
+        self.load_more_items(self.FIRST_PAINT_ROWS)
+
+    def load_more_items(self, count: int = None):
+        """從串流讀取下一批物品並更新顯示，全部讀完後重播日誌並重新計算"""
+        count = count or self.LOAD_CHUNK_ROWS
+        try:
+            batch = list(itertools.islice(self.item_stream, count))
+        except (ValueError, json.JSONDecodeError) as e:
+            self.item_stream = None
+            messagebox.showerror("錯誤", f"讀取歷史紀錄時發生錯誤: {e}")
+            return
+        self.items.extend(batch)
+        if len(batch) < count:
+            self.finish_loading()
+            return
+        # 顯示檔案中保存的計算結果，讀完後再依設定值重新計算
+        self.update_treeview()
+        self.root.after(1, self.load_more_items)
+
+    def is_loading(self) -> bool:
+        """背景載入尚未完成時提示使用者稍候"""
+        if self.item_stream is None:
+            return False
+        messagebox.showinfo("提示", "資料載入中，請稍候。")
+        return True
+
+    def finish_loading(self):
+        """快照讀完後重播變更日誌、套用設定值並重新計算所有物品"""
+        self.item_stream = None
+        try:
+            self.loaded_data["items"] = self.items
+            data = self.journal.replay(self.loaded_data, Item)
+            self.items = data.get("items", [])
+            self.current_chaos = float(data.get("current_chaos", 0.0))
+            self.dc_ratio = float(data.get("dc_ratio", 1.0))
+            self.item_coin_value = float(data.get("item_coin_value", 0.0))
+            self.coin_fees = CoinFees.from_dict(data.get("coin_fees", {}))
+        except (ValueError, TypeError, json.JSONDecodeError) as e:
+            messagebox.showerror("錯誤", f"讀取歷史紀錄時發生錯誤: {e}")
+            return
+
+        self.exchange_rate_label.config(text=f"當前神聖石匯率 (C/D): {self.dc_ratio:.2f}")
+        self.chaos_quantity_label.config(text=f"倉庫混沌石數量: {int(self.current_chaos // 1)}")
+        self.entry_item_coin_value.delete(0, tk.END)
+        self.entry_item_coin_value.insert(0, str(self.item_coin_value))
+
+        # 載入數據後重新計算每個物品的利潤
+        if self.item_index.rebuild(self.items):
+            # 舊資料沒有識別碼，立即寫入快照，之後的日誌紀錄才能對應到物品
+            self.save_items_to_file()
+        with self.graph_lock:
+            self.profit_graph.update_settings(self.current_chaos, self.dc_ratio, self.item_coin_value)
+            self.profit_graph.set_fees(self.coin_fees)
+            self.profit_graph.reset(self.items)
+        self.update_profits()
+
+    def settings_data(self) -> Dict:
+        """需要保存的設定值，並確保數據類型正確"""
+        return {
+            "current_chaos": float(self.current_chaos),
+            "dc_ratio": float(self.dc_ratio),
+            "item_coin_value": float(self.item_coin_value),  # 保存 item_coin_value
+            "coin_fees": self.coin_fees.to_dict()
+        }
 
     def save_items_to_file(self):
-        """將物品資料保存到文件，並確保數據類型正確"""
-        try:
-            with open(self.DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump({
-                    "items": self.items,
-                    "current_chaos": float(self.current_chaos),
-                    "dc_ratio": float(self.dc_ratio),
-                    "item_coin_value": float(self.item_coin_value)  # 保存 item_coin_value
-                }, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            messagebox.showerror("錯誤", f"保存數據時發生錯誤: {e}")
+        """標記下次自動保存時將物品資料完整保存到文件（快照），並清空變更日誌"""
+        self.needs_snapshot = True
+        self.autosave.mark_dirty()
+
+    def record_change(self, op=None, **payload):
+        """記下單筆變更，下次自動保存時與其他變更一起附加到日誌，寫入成本與變更大小成正比"""
+        if op is not None:
+            self.pending_changes.append((op, payload))
+        self.autosave.mark_dirty()
+
+    def prepare_save(self):
+        """（主執行緒）取出尚未保存的變更，回傳在背景執行的寫入函式"""
+        # 設定值寫在物品之前，串流載入時讀到第一筆物品就已知道設定值
+        settings = self.settings_data()
+        changes, self.pending_changes = self.pending_changes, []
+        if self.needs_snapshot:
+            # 快照已包含所有變更，不必再寫日誌
+            self.needs_snapshot = False
+            data = dict(settings, items=self.snapshot_items())
+            return lambda: self.journal.compact(data)
+        return lambda: self.write_changes(changes, settings)
+
+    def snapshot_items(self) -> List[Dict]:
+        """在 graph_lock 內複製所有物品，之後的修改與背景重算不影響寫出的內容"""
+        with self.graph_lock:
+            return [item.to_dict() for item in self.items]
+
+    def write_changes(self, changes, settings: Dict) -> bool:
+        """（背景執行緒）以一次寫入附加日誌紀錄，回傳是否需要壓縮成快照"""
+        self.journal.append_many(changes)
+        self.journal.record_settings(**settings)
+        return self.journal.needs_compaction()
+
+    def on_saved(self, needs_compaction, elapsed_ms: float):
+        self.save_status_label.config(text=f"已保存（寫入 {elapsed_ms:.1f} ms）")
+        if needs_compaction:
+            self.save_items_to_file()
+
+    def show_save_error(self, error: Exception):
+        # 這次的變更沒有寫入，下次保存改寫完整快照
+        self.needs_snapshot = True
+        self.save_status_label.config(text="保存失敗")
+        messagebox.showerror("錯誤", f"保存數據時發生錯誤: {error}")
+
+    def record_price_history(self, items):
+        """在背景將物品目前的價格與 DC 比率附加到價格歷史，價格沒有變動的物品不會重複寫入"""
+        with self.graph_lock:
+            rows = [item.to_dict() for item in items]
+        self.worker.submit(self.price_history.record_items, rows, self.dc_ratio,
+                           on_error=self.show_history_error)
+
+    def show_history_error(self, error: Exception):
+        messagebox.showerror("錯誤", f"保存價格歷史時發生錯誤: {error}")
 
     def on_treeview_click(self, event):
         """當點擊 TreeView 時，檢查是否點擊空白區域並取消選擇"""
@@ -202,6 +240,8 @@ class ItemManagerApp:
 
     def edit_single_column(self, event):
         """處理欄位的單項編輯"""
+        if self.is_loading():
+            return
         selected = self.tree.selection()
         if not selected:
             return
@@ -213,7 +253,7 @@ class ItemManagerApp:
             return
 
         selected_item_id = selected[0]
-        selected_index = self.tree.index(selected_item_id)
+        selected_index = self.row_index(selected_item_id)
         selected_item = self.items[selected_index]
 
         column_mapping = {
@@ -248,16 +288,16 @@ class ItemManagerApp:
 
 
                     # 更新物品中的數值
-                    self.items[selected_index][field_name] = new_value
+                    with self.graph_lock:
+                        self.profit_graph.set_item_value(selected_index, field_name, new_value)
 
-                    # 更新利潤計算
+                    # 更新利潤計算，重算完成後更新顯示
                     self.update_profits()
 
-                    # 更新顯示，確保最新數值被顯示
-                    self.update_treeview()
-
-                    # 保存到文件
-                    self.save_items_to_file()
+                    # 只記錄這次修改的欄位
+                    self.record_change(OP_EDIT, item_id=selected_item[ITEM_ID_KEY], fields={field_name: new_value})
+                    if field_name in ("receive_price", "sell_price", "divine_sell_price"):
+                        self.record_price_history([selected_item])
 
                 except ValueError:
                     messagebox.showerror("錯誤", "請輸入有效的數字。")
@@ -276,6 +316,10 @@ class ItemManagerApp:
         update_exchange_rate_button = ttk.Button(main_frame, text="手動修改DC比率", command=self.manual_update_dc_ratio)
         update_exchange_rate_button.grid(row=0, column=3, padx=5, pady=2)
 
+        # 自動保存狀態與最近一次的寫入耗時
+        self.save_status_label = ttk.Label(main_frame, text="")
+        self.save_status_label.grid(row=2, column=2, padx=10, pady=2, sticky=tk.E)
+
         # 單位物品價值 (金幣) 輸入框
         ttk.Label(main_frame, text="單位物品價值 (金幣):").grid(row=5, column=0, sticky=tk.W, pady=2)
         self.entry_item_coin_value = ttk.Entry(main_frame, width=25)
@@ -287,6 +331,9 @@ class ItemManagerApp:
         self.chaos_quantity_label.grid(row=1, column=2, padx=10, pady=2, sticky=tk.E)
         chaos_button = ttk.Button(main_frame, text="修改混沌石數量", command=self.update_chaos_resources)
         chaos_button.grid(row=1, column=3, padx=5, pady=2)
+        # 從倉庫截圖辨識混沌石數量（poe_core/stash_ocr.py）
+        chaos_ocr_button = ttk.Button(main_frame, text="從截圖讀取", command=self.read_chaos_from_screenshot)
+        chaos_ocr_button.grid(row=1, column=4, padx=5, pady=2)
 
         # 物品名稱
         ttk.Label(main_frame, text="物品名稱:").grid(row=0, column=0, sticky=tk.W, pady=2)
@@ -336,6 +383,20 @@ class ItemManagerApp:
         self.tree.configure(yscroll=scrollbar.set)
         scrollbar.grid(row=7, column=4, sticky="ns")
 
+        # 高亮標籤只需設定一次
+        self.tree.tag_configure("highlight_2000C", background="green")
+        self.tree.tag_configure("highlight_1000C", background="yellow")
+        self.tree.tag_configure("normal", background="white")
+
+        # 虛擬列表接管捲動條
+        self.virtual_tree = None
+        # 背景重算會寫回物品的衍生欄位，繪製時持有 graph_lock，不會讀到重算到一半的列
+        self.tree_rows = TreeviewReconciler(self.tree, self.format_row, self.row_tag, key=item_key,
+                                            lock=self.graph_lock)
+        if self.VIRTUAL_TREEVIEW:
+            self.virtual_tree = VirtualTreeview(self.tree, scrollbar, self.format_row, self.row_tag,
+                                                lock=self.graph_lock)
+
         # 移到程式下方的按鈕
         button_frame = ttk.Frame(self.root, padding="10")
         button_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -348,10 +409,30 @@ class ItemManagerApp:
         export_button = ttk.Button(button_frame, text="匯出為 CSV", command=self.export_to_csv)
         export_button.grid(row=0, column=1, padx=5, pady=5)
 
+        # 自動更新 DC 比率與物品價格
+        ingest_online_button = ttk.Button(button_frame, text="線上更新價格", command=self.ingest_prices_online)
+        ingest_online_button.grid(row=0, column=2, padx=5, pady=5)
+        ingest_file_button = ttk.Button(button_frame, text="從檔案匯入價格", command=self.ingest_prices_from_file)
+        ingest_file_button.grid(row=0, column=3, padx=5, pady=5)
+
+        # 將倉庫混沌石分配到各物品，使總利潤最大
+        portfolio_button = ttk.Button(button_frame, text="最佳分配", command=self.optimize_allocation)
+        portfolio_button.grid(row=0, column=4, padx=5, pady=5)
+
+        # 一次計算多組 DC 比率與混沌石數量下的利潤，不修改目前的設定值
+        scenario_button = ttk.Button(button_frame, text="情境分析", command=self.run_scenario_sweep)
+        scenario_button.grid(row=0, column=5, padx=5, pady=5)
+
+        # 匯出欄式檔（需要 pyarrow），供 pandas／polars 分析
+        columnar_button = ttk.Button(button_frame, text="匯出為 Parquet", command=self.export_to_columnar)
+        columnar_button.grid(row=0, column=6, padx=5, pady=5)
+
         self.tree.bind("<Double-1>", self.edit_single_column)
 
     def manual_update_dc_ratio(self):
         """手動輸入並更新 DC 比率"""
+        if self.is_loading():
+            return
         try:
             new_dc_ratio_str = simpledialog.askstring("輸入 DC 比率", "請輸入新的神聖石對混沌石比率:", parent=self.root)
             if new_dc_ratio_str is None or new_dc_ratio_str.strip() == "":
@@ -363,48 +444,222 @@ class ItemManagerApp:
             self.dc_ratio = new_dc_ratio
             self.exchange_rate_label.config(text=f"當前神聖石匯率 (C/D): {self.dc_ratio:.2f}")
             self.update_profits()
-            self.update_treeview()
-            self.save_items_to_file()
+            self.record_change()
         except ValueError as e:
             messagebox.showerror("錯誤", f"請輸入有效的數字（例如: 1.23 或 145）。\n錯誤訊息: {e}")
 
+    def ingest_prices_online(self):
+        """從 poe.ninja（或未過期的快取）取得價格，更新 DC 比率與同名物品的販賣價格"""
+        if self.is_loading():
+            return
+        # 在背景連線，連點多次只抓取一次
+        self.fetch_worker.submit(self.fetch_price_snapshot, key="fetch", on_done=self.apply_price_snapshot,
+                                 on_error=self.show_fetch_error)
+
+    @staticmethod
+    def fetch_price_snapshot():
+        """（背景執行緒）取得價格快照"""
+        from poe_core.ninja_client import NinjaClient  # poe.ninja 價格（快取、限速）
+        from poe_core.price_ingest import fetch_snapshot
+
+        with NinjaClient() as client:
+            return fetch_snapshot(client)
+
+    def show_fetch_error(self, error: Exception):
+        messagebox.showerror("錯誤", f"無法取得價格資料: {error}")
+
+    def ingest_prices_from_file(self):
+        """從價格快照檔或錄下的 poe.ninja 回應匯入價格"""
+        if self.is_loading():
+            return
+        path = filedialog.askopenfilename(
+            filetypes=[("JSON files", "*.json"), ("Parquet / Arrow files", "*.parquet *.arrow")])
+        if not path:
+            return
+        try:
+            snapshot = load_snapshot(path)
+        except (ImportError, OSError, ValueError) as e:
+            messagebox.showerror("錯誤", f"讀取價格檔時發生錯誤: {e}")
+            return
+        self.apply_price_snapshot(snapshot)
+
+    def apply_price_snapshot(self, snapshot):
+        """批次套用價格快照：所有變動的價格一起寫入後只重算一次（在背景進行），並以一次快照保存"""
+        with self.graph_lock:
+            self.profit_graph.update_settings(self.current_chaos, self.dc_ratio, self.item_coin_value)
+        self.worker.submit(self.apply_snapshot_to_graph, snapshot, on_done=self.on_price_snapshot_applied)
+
+    def apply_snapshot_to_graph(self, snapshot) -> Dict:
+        """（背景執行緒）寫入快照中的價格並重算，結果附上套用後的 DC 比率"""
+        with self.graph_lock:
+            result = apply_snapshot(self.profit_graph, snapshot)
+            # 在鎖內讀取，主執行緒不必再存取 profit_graph
+            result["dc_ratio"] = float(self.profit_graph.settings["dc_ratio"])
+        return result
+
+    def on_price_snapshot_applied(self, result: Dict):
+        self.dc_ratio = result["dc_ratio"]
+        self.exchange_rate_label.config(text=f"當前神聖石匯率 (C/D): {self.dc_ratio:.2f}")
+        self.update_treeview()
+        # 大量物品同時變動，直接寫入完整快照比逐筆記錄日誌更省
+        self.save_items_to_file()
+        self.record_price_history(self.items)
+        messagebox.showinfo("價格已更新", f"DC 比率: {self.dc_ratio:.2f}\n"
+                                         f"對應到 {result['matched']} 個物品，其中 {result['updated']} 個價格有變動。")
+
+    def optimize_allocation(self):
+        """將目前的混沌石分配到各物品（每個物品的總利潤欄位都假設全部混沌石投入該物品，無法同時達成）"""
+        if self.is_loading():
+            return
+        if not self.items:
+            messagebox.showinfo("提示", "沒有物品可以分配。")
+            return
+        from poe_core.portfolio import PortfolioCandidates, optimize_portfolio  # 在物品間分配混沌石
+
+        coin_budget_str = simpledialog.askstring("金幣預算", "請輸入可用的金幣數量（留空為不限）:", parent=self.root)
+        if coin_budget_str is None:
+            return
+        try:
+            coin_budget = parse_fraction(coin_budget_str) if coin_budget_str.strip() else None
+            with self.graph_lock:
+                candidates = PortfolioCandidates.from_items(self.items, self.dc_ratio, self.item_coin_value,
+                                                            self.coin_fees)
+        except ValueError as e:
+            messagebox.showerror("錯誤", str(e))
+            return
+        result = optimize_portfolio(candidates, self.current_chaos, coin_budget)
+        self.show_allocation(result)
+
+    def show_allocation(self, result):
+        """在新視窗中列出分配結果"""
+        window = tk.Toplevel(self.root)
+        window.title("最佳分配")
+        from poe_core.portfolio import bound_text
+
+        ttk.Label(window, text=f"總利潤: {result['total_profit']:.2f}C（{bound_text(result)}）  "
+                               f"使用混沌石: {result['chaos_used']:.2f} / {self.current_chaos:.2f}  "
+                               f"使用金幣: {result['coin_used']:.2f}").grid(row=0, column=0, padx=10, pady=5, sticky=tk.W)
+        columns = ("item_name", "route", "quantity", "chaos", "coin", "profit")
+        headings = ("物品名稱", "賣法", "數量", "所需C", "金幣", "利潤")
+        tree = ttk.Treeview(window, columns=columns, show="headings", height=15)
+        for column, heading in zip(columns, headings):
+            tree.heading(column, text=heading)
+            tree.column(column, width=100)
+        routes = {"C": "C收C賣", "D": "C買D賣"}
+        for allocation in result["allocations"]:
+            tree.insert("", "end", values=(
+                allocation["item_name"],
+                routes[allocation["route"]],
+                allocation["quantity"],
+                f"{allocation['chaos']:.2f}",
+                f"{allocation['coin']:.2f}",
+                f"{allocation['profit']:.2f}",
+            ))
+        tree.grid(row=1, column=0, padx=10, pady=5, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+    def run_scenario_sweep(self):
+        """在多組 DC 比率與混沌石數量下計算所有物品的利潤，列出利潤範圍與損益兩平的 DC 比率"""
+        if self.is_loading():
+            return
+        if not self.items:
+            messagebox.showinfo("提示", "沒有物品可以分析。")
+            return
+        from poe_core.scenario import parse_grid, summarize, sweep_items  # DC 比率與混沌石的情境分析
+
+        dc_str = simpledialog.askstring("情境分析", "請輸入 DC 比率範圍（例如: 140:160:5 或 140,150,160）:",
+                                        parent=self.root, initialvalue=f"{self.dc_ratio:g}")
+        if dc_str is None:
+            return
+        chaos_str = simpledialog.askstring("情境分析", "請輸入混沌石數量（例如: 5000,10000，留空為目前數量）:",
+                                           parent=self.root)
+        if chaos_str is None:
+            return
+        try:
+            dc_ratios = parse_grid(dc_str)
+            current_chaos = parse_grid(chaos_str) if chaos_str.strip() else [self.current_chaos]
+            with self.graph_lock:
+                result = sweep_items(self.items, dc_ratios, current_chaos, [self.item_coin_value],
+                                     fees=self.coin_fees)
+                rows = summarize(self.items, result)
+        except ValueError as e:
+            messagebox.showerror("錯誤", str(e))
+            return
+        self.show_scenarios(rows, dc_ratios, current_chaos)
+
+    def show_scenarios(self, rows, dc_ratios, current_chaos):
+        """在新視窗中列出每個物品在各情境的 C買D賣 總利潤範圍"""
+        window = tk.Toplevel(self.root)
+        window.title("情境分析")
+        ttk.Label(window, text=f"DC 比率: {', '.join(f'{value:g}' for value in dc_ratios)}  "
+                               f"混沌石: {', '.join(f'{value:g}' for value in current_chaos)}"
+                  ).grid(row=0, column=0, padx=10, pady=5, sticky=tk.W)
+        columns = ("item_name", "min_profit", "max_profit", "break_even_dc", "crossover_dc")
+        headings = ("物品名稱", "C買D賣最低總利潤", "C買D賣最高總利潤", "損益兩平DC", "D賣優於C賣DC")
+        tree = ttk.Treeview(window, columns=columns, show="headings", height=15)
+        for column, heading in zip(columns, headings):
+            tree.heading(column, text=heading)
+            tree.column(column, width=120)
+        for row in rows:
+            tree.insert("", "end", values=(
+                row["item_name"],
+                f"{row['min_profit']:.2f}",
+                f"{row['max_profit']:.2f}",
+                f"{row['break_even_dc']:.2f}",
+                f"{row['crossover_dc']:.2f}",
+            ))
+        tree.grid(row=1, column=0, padx=10, pady=5, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+    @staticmethod
+    def format_row(item: Item) -> tuple:
+        """將物品格式化為 TreeView 的一列"""
+        return (
+            item.item_name,
+            f"{item.receive_price:.2f}",
+            f"{item.sell_price:.2f}",
+            f"{item.divine_sell_price:.2f}",
+            f"{item.profit_c_to_c:.2f}",
+            f"{item.profit_c_to_d:.2f}",
+            item.purchasable_with_chaos,
+            f"{item.required_chaos:.2f}",  # 新增的「所需C」欄位
+            f"{item.total_profit_c_to_c:.2f}",
+            f"{item.total_profit_c_to_d:.2f}",
+            f"{item.avg_coin_c:.2f}" if isinstance(item.avg_coin_c, (int, float)) else item.avg_coin_c,
+            f"{item.avg_coin_d:.2f}" if isinstance(item.avg_coin_d, (int, float)) else item.avg_coin_d,
+            f"{item.avg_coin_d_extra:.2f}" if isinstance(item.avg_coin_d_extra, (int, float)) else item.avg_coin_d_extra
+        )
+
+    @staticmethod
+    def row_tag(item: Item) -> str:
+        """根據總利潤決定高亮標籤"""
+        total_profit_c_to_c = item.total_profit_c_to_c
+        total_profit_c_to_d = item.total_profit_c_to_d
+        if total_profit_c_to_c > 2000 or total_profit_c_to_d > 2000:
+            return "highlight_2000C"
+        if total_profit_c_to_c > 1000 or total_profit_c_to_d > 1000:
+            return "highlight_1000C"
+        return "normal"
+
+    def row_index(self, row_id: str) -> int:
+        """由 TreeView 列 ID 取得物品在 self.items 中的索引"""
+        if self.virtual_tree is not None:
+            return self.virtual_tree.index_of(row_id)
+        # 列 ID 對應物品識別碼，再由雜湊索引查位置，不受排序影響
+        return self.item_index.position(self.tree_rows.key_of(row_id))
+
     def update_treeview(self):
         """更新 TreeView 中顯示的資料，並根據總利潤高亮"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        for item in self.items:
-            total_profit_c_to_c = item.get('total_profit_c_to_c', 0.0)
-            total_profit_c_to_d = item.get('total_profit_c_to_d', 0.0)
-
-            tag = "normal"
-            if total_profit_c_to_c > 2000 or total_profit_c_to_d > 2000:
-                tag = "highlight_2000C"
-            elif total_profit_c_to_c > 1000 or total_profit_c_to_d > 1000:
-                tag = "highlight_1000C"
-
-            self.tree.insert('', 'end', values=(
-                item['item_name'],
-                f"{item['receive_price']:.2f}",
-                f"{item['sell_price']:.2f}",
-                f"{item['divine_sell_price']:.2f}",
-                f"{item['profit_c_to_c']:.2f}",
-                f"{item['profit_c_to_d']:.2f}",
-                item['purchasable_with_chaos'],
-                f"{item['required_chaos']:.2f}",  # 新增的「所需C」欄位
-                f"{item['total_profit_c_to_c']:.2f}",
-                f"{item['total_profit_c_to_d']:.2f}",
-                f"{item['avg_coin_c']:.2f}" if isinstance(item['avg_coin_c'], (int, float)) else item['avg_coin_c'],
-                f"{item['avg_coin_d']:.2f}" if isinstance(item['avg_coin_d'], (int, float)) else item['avg_coin_d'],
-                f"{item['avg_coin_d_extra']:.2f}" if isinstance(item['avg_coin_d_extra'], (int, float)) else item['avg_coin_d_extra']
-            ), tags=(tag,))
+        if self.virtual_tree is not None:
+            # 虛擬列表只重繪可見範圍
+            self.virtual_tree.set_items(self.items)
+            return
 
-        self.tree.tag_configure("highlight_2000C", background="green")
-        self.tree.tag_configure("highlight_1000C", background="yellow")
-        self.tree.tag_configure("normal", background="white")
+        # 非虛擬模式：只插入新列、刪除消失的列並修補有變動的列
+        self.tree_rows.sync(self.items)
 
     def calculate_profit(self):
         """計算利潤並添加物品記錄"""
+        if self.is_loading():
+            return
         try:
             # 從 Entry 中獲取輸入值
             receive_price_str = self.entry_receive_price.get()
@@ -426,38 +681,25 @@ class ItemManagerApp:
             return
 
         # 利潤和金幣消耗計算邏輯
-        item_data = {
-            "item_name": self.entry_item_name.get(),
-            "receive_price": receive_price,
-            "sell_price": sell_price,
-            "divine_sell_price": divine_sell_price
-        }
+        item_data = Item(
+            item_name=self.entry_item_name.get(),
+            receive_price=receive_price,
+            sell_price=sell_price,
+            divine_sell_price=divine_sell_price
+        )
 
         # 計算利潤
-        ItemCalculator.calculate_profit(item_data, self.current_chaos, self.dc_ratio, self.item_coin_value)
-
-        # 插入到 TreeView
-        self.tree.insert('', 'end', values=(
-            item_data['item_name'],
-            f"{item_data['receive_price']:.2f}",
-            f"{item_data['sell_price']:.2f}",
-            f"{item_data['divine_sell_price']:.2f}",
-            f"{item_data['profit_c_to_c']:.2f}",  # 使用 profit_c_to_c
-            f"{item_data['profit_c_to_d']:.2f}",  # 使用 profit_c_to_d
-            item_data['purchasable_with_chaos'],
-            f"{item_data['required_chaos']:.2f}",
-            f"{item_data['total_profit_c_to_c']:.2f}",
-            f"{item_data['total_profit_c_to_d']:.2f}",
-            f"{item_data['avg_coin_c']:.2f}" if isinstance(item_data['avg_coin_c'], (int, float)) else item_data['avg_coin_c'],
-            f"{item_data['avg_coin_d']:.2f}" if isinstance(item_data['avg_coin_d'], (int, float)) else item_data['avg_coin_d'],
-            f"{item_data['avg_coin_d_extra']:.2f}" if isinstance(item_data['avg_coin_d_extra'], (int, float)) else item_data['avg_coin_d_extra']
-        ))
+        ItemCalculator.calculate_profit(item_data, self.current_chaos, self.dc_ratio, self.item_coin_value,
+                                        self.coin_fees)
 
         # 將 item_data 添加到 self.items 列表中
-        self.items.append(item_data)
+        with self.graph_lock:
+            self.profit_graph.append_item(item_data)
+        self.item_index.add(item_data)
 
         # 保存並更新顯示
-        self.save_items_to_file()
+        self.record_change(OP_ADD, item=item_data)
+        self.record_price_history([item_data])
         self.update_treeview()
         self.clear_inputs()
 
@@ -471,6 +713,8 @@ class ItemManagerApp:
 
     def update_chaos_resources(self):
         """修改倉庫混沌石數量"""
+        if self.is_loading():
+            return
         try:
             new_chaos_str = simpledialog.askstring("輸入混沌石數量", "請輸入目前混沌石數量:", parent=self.root)
             if new_chaos_str is None or new_chaos_str.strip() == "":
@@ -478,79 +722,111 @@ class ItemManagerApp:
             new_chaos_str = new_chaos_str.strip()
             if not re.match(r'^\d+(\.\d+)?$', new_chaos_str):
                 raise ValueError("輸入的值不是有效的數字")
-            new_chaos_value = float(new_chaos_str)
-            self.current_chaos = new_chaos_value
-            self.chaos_quantity_label.config(text=f"倉庫混沌石數量: {int(self.current_chaos)}")
-            self.update_profits()
-            self.update_treeview()
-            self.save_items_to_file()
+            self.set_current_chaos(float(new_chaos_str))
         except ValueError as e:
             messagebox.showerror("錯誤", f"請輸入有效的數字（例如: 100 或 100.5）。\n錯誤訊息: {e}")
 
+    def set_current_chaos(self, value: float):
+        """更新倉庫混沌石數量並重算"""
+        self.current_chaos = value
+        self.chaos_quantity_label.config(text=f"倉庫混沌石數量: {int(self.current_chaos)}")
+        self.update_profits()
+        self.record_change()
+
+    def read_chaos_from_screenshot(self):
+        """從倉庫截圖辨識混沌石數量（在背景辨識），結果直接寫入倉庫混沌石數量"""
+        if self.is_loading():
+            return
+        path = filedialog.askopenfilename(filetypes=[("Screenshots", "*.png *.jpg *.jpeg *.bmp")])
+        if not path:
+            return
+        if self.stash_reader is None:
+            from poe_core.stash_ocr import StashReader
+            self.stash_reader = StashReader()  # 保留辨識快取，同一張截圖不必重新辨識
+        self.fetch_worker.submit(self.stash_reader.read, path, on_done=self.on_stash_read,
+                                 on_error=lambda e: messagebox.showerror("錯誤", f"辨識截圖時發生錯誤: {e}"))
+
+    def on_stash_read(self, reading):
+        if reading.chaos is None:
+            messagebox.showerror("錯誤", "無法從截圖辨識混沌石數量，請確認倉庫通貨頁在畫面中。")
+            return
+        self.set_current_chaos(float(reading.chaos))
+        divine = "" if reading.divine is None else f"，神聖石 {reading.divine}"
+        messagebox.showinfo("辨識完成", f"混沌石 {reading.chaos}{divine}（耗時 {reading.timings['wall']:.0f} ms）")
+
     def delete_item(self):
         """刪除選中的物品記錄"""
+        if self.is_loading():
+            return
         selected = self.tree.selection()
         if not selected:
             messagebox.showerror("錯誤", "請選擇要刪除的紀錄。")
             return
 
         selected_item_id = selected[0]
-        selected_index = self.tree.index(selected_item_id)
-        del self.items[selected_index]
-
-        self.tree.delete(selected_item_id)
-        self.save_items_to_file()
+        selected_index = self.row_index(selected_item_id)
+        removed_id = self.items[selected_index][ITEM_ID_KEY]
+        with self.graph_lock:
+            self.profit_graph.remove_item(selected_index)
+        self.item_index.remove(removed_id)
+
+        if self.virtual_tree is not None:
+            self.virtual_tree.refresh(selected=[])  # 被刪除的列不再保留選取
+        else:
+            self.update_treeview()
+        self.record_change(OP_DELETE, item_id=removed_id)
 
         messagebox.showinfo("成功", "已成功刪除選中的紀錄。")
 
     def convert_input_to_float(self, input_str):
         """將用戶輸入的字串轉換為浮點數，允許分數格式"""
-        input_str = input_str.strip()
-
-        try:
-            if '/' in input_str:
-                numerator, denominator = input_str.split('/')
-                return float(numerator) / float(denominator)
-            else:
-                return float(input_str)
-        except (ValueError, ZeroDivisionError):
-            raise ValueError("請輸入有效的數字（例如: 1.23, 3/4 或 1/1.11）")
+        return parse_fraction(input_str)
 
     def export_to_csv(self):
         """將物品資料匯出為 CSV"""
-        export_file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if self.is_loading():
+            return
+        export_file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("Gzip CSV files", "*.csv.gz")])
         if not export_file_path:
             return
+        from poe_core.csv_export import export_csv
+
+        # 等背景重算完成，匯出的利潤才是最新的
+        self.worker.flush()
         try:
-            with open(export_file_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
-                fieldnames = [
-                    "item_name", "receive_price", "sell_price",
-                    "divine_sell_price", "profit_c_to_c", "profit_c_to_d",
-                    "purchasable_with_chaos", "receive_coin", "sell_coin", "sell_div_coin", "dc_coin"
-                ]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                for item in self.items:
-                    writer.writerow({
-                        "item_name": item.get('item_name', ''),
-                        "receive_price": item.get('receive_price', 0.0),
-                        "sell_price": item.get('sell_price', 0.0),
-                        "divine_sell_price": item.get('divine_sell_price', 0.0),
-                        "profit_c_to_c": item.get('profit_c_to_c', 0.0),
-                        "profit_c_to_d": item.get('profit_c_to_d', 0.0),
-                        "purchasable_with_chaos": item.get('purchasable_with_chaos', 0),
-                        "receive_coin": item.get('receive_coin', 0.0),
-                        "sell_coin": item.get('sell_coin', 0.0),
-                        "sell_div_coin": item.get('sell_div_coin', 0.0),
-                        "dc_coin": item.get('dc_coin', 0.0)
-                    })
+            # 匯出全部輸入與衍生欄位，分批寫出；檔名以 .gz 結尾時壓縮
+            export_csv(export_file_path, self.items)
             messagebox.showinfo("導出成功", "歷史紀錄已成功導出為 CSV 文件。")
         except Exception as e:
             messagebox.showerror("錯誤", f"導出 CSV 文件時發生錯誤: {e}")
 
 
+    def export_to_columnar(self):
+        """將物品資料與設定值匯出為 Parquet／Arrow 檔（與 JSON 檔可互相轉換），在背景寫入"""
+        if self.is_loading():
+            return
+        export_file_path = filedialog.asksaveasfilename(
+            defaultextension=".parquet", filetypes=[("Parquet files", "*.parquet"), ("Arrow files", "*.arrow")])
+        if not export_file_path:
+            return
+        from poe_core.columnar import write_items
+
+        settings = self.settings_data()
+        # 排在尚未完成的重算之後執行，匯出的利潤是最新的；物品在背景於 graph_lock 內複製後寫出
+        self.worker.submit(
+            lambda: write_items(export_file_path, dict(settings, items=self.snapshot_items())),
+            on_done=lambda _: messagebox.showinfo("導出成功", "歷史紀錄已成功導出為欄式檔。"),
+            on_error=lambda e: messagebox.showerror("錯誤", f"導出欄式檔時發生錯誤: {e}"),
+        )
+
+
 # 主程式執行
 if __name__ == "__main__":
+    startup_profile.mark("載入模組")
     root = tk.Tk()
+    startup_profile.mark("建立 Tk")
     app = ItemManagerApp(root)
-    root.mainloop()
\ No newline at end of file
+    startup_profile.mark("建立視窗")
+    startup_profile.finish_after_first_paint(root, "Profit_v2", close=app.on_close)
+    root.mainloop()
@@ -0,0 +1,94 @@
+import time
+from typing import Callable, Optional
+
+from background_worker import BackgroundWorker
+
+# 預設的自動保存間隔（毫秒）：間隔內的多次修改合併成一次寫入
+AUTOSAVE_INTERVAL_MS = 1000
+
+
+class AutosaveScheduler:
+    """髒旗標加節流的自動保存：修改時只標記，最多每 interval_ms 寫入一次
+
+    prepare() 在主執行緒呼叫，收集要寫入的資料並回傳一個不帶參數的寫入函式，
+    寫入函式交給背景工作執行緒執行並計時；上一次寫入尚未完成時不會開始下一次。
+    """
+
+    def __init__(self, root, worker: BackgroundWorker, prepare: Callable[[], Callable],
+                 interval_ms: int = AUTOSAVE_INTERVAL_MS, on_saved: Optional[Callable] = None,
+                 on_error: Optional[Callable] = None):
+        self.root = root
+        self.worker = worker
+        self.prepare = prepare
+        self.interval_ms = interval_ms
+        self.on_saved = on_saved  # on_saved(寫入函式的回傳值, 寫入毫秒數)
+        self.on_error = on_error
+        self.dirty = False
+        self.writing = False
+        self.timer = None
+        self.stats = {"marks": 0, "writes": 0, "last_ms": 0.0, "max_ms": 0.0, "total_ms": 0.0}
+
+    def mark_dirty(self):
+        """標記有尚未保存的修改，間隔結束時寫入"""
+        self.dirty = True
+        self.stats["marks"] += 1
+        self._schedule()
+
+    def _schedule(self):
+        if self.dirty and self.timer is None and not self.writing:
+            self.timer = self.root.after(self.interval_ms, self._on_timer)
+
+    def _on_timer(self):
+        self.timer = None
+        self.save_now()
+
+    def save_now(self):
+        """立即把目前的修改交給背景寫入（有寫入進行中時等它完成後再寫）"""
+        if not self.dirty or self.writing:
+            return
+        self.dirty = False
+        self.writing = True
+        self.worker.submit(self._timed, self.prepare(), on_done=self._on_written, on_error=self._on_failed)
+
+    @staticmethod
+    def _timed(write: Callable):
+        """（背景執行緒）執行寫入並量測耗時"""
+        start = time.perf_counter()
+        result = write()
+        return result, (time.perf_counter() - start) * 1000
+
+    def _on_written(self, outcome):
+        result, elapsed_ms = outcome
+        self.writing = False
+        self.stats["writes"] += 1
+        self.stats["last_ms"] = elapsed_ms
+        self.stats["max_ms"] = max(self.stats["max_ms"], elapsed_ms)
+        self.stats["total_ms"] += elapsed_ms
+        if self.on_saved is not None:
+            self.on_saved(result, elapsed_ms)
+        self._schedule()
+
+    def _on_failed(self, error: Exception):
+        self.writing = False
+        if self.on_error is not None:
+            self.on_error(error)
+        else:
+            self.root.report_callback_exception(type(error), error, error.__traceback__)
+        self._schedule()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """立即寫入尚未保存的修改並等待完成，例如關閉視窗前；逾時回傳 False"""
+        # 進行中的寫入完成後（回呼中）才能開始下一次；保存後的回呼可能再標記修改（例如需要壓縮成快照）
+        while True:
+            self._cancel_timer()
+            if not self.worker.flush(timeout):
+                return False
+            self._cancel_timer()
+            if not self.dirty:
+                return True
+            self.save_now()
+
+    def _cancel_timer(self):
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = None
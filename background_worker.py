@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Hashable, Optional
+
+# 主執行緒檢查背景工作結果的間隔（毫秒）
+POLL_MS = 15
+
+
+class _Job:
+    __slots__ = ("key", "fn", "args", "on_done", "on_error")
+
+    def __init__(self, key, fn, args, on_done, on_error):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+
+
+class BackgroundWorker:
+    """在單一背景執行緒依序執行工作，結果以 root.after 交回 Tk 主執行緒
+
+    Tk 元件只能在主執行緒操作：工作函式本身不可碰觸 Tk，on_done / on_error 一定在主執行緒呼叫。
+    相同 key 的工作尚未開始時，新送出的工作取代舊的並移到佇列尾端，連續多次修改只執行最後一次；
+    key 為 None 的工作（例如日誌附加）不合併，依送出順序執行。
+    """
+
+    def __init__(self, root, name: str = "worker", poll_ms: int = POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.jobs = deque()
+        self.pending: Dict[Hashable, _Job] = {}  # key -> 尚未開始的工作
+        self.condition = threading.Condition()
+        self.results = queue.Queue()
+        self.busy = False  # 背景執行緒正在執行工作
+        self.running = True
+        self.outstanding = 0  # 已送出但結果尚未交回主執行緒的工作數（只在主執行緒修改）
+        self.polling = False
+        self.stats = {"submitted": 0, "coalesced": 0, "completed": 0, "failed": 0}
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, fn: Callable, *args, key: Optional[Hashable] = None,
+               on_done: Optional[Callable] = None, on_error: Optional[Callable] = None):
+        """送出工作；on_done(結果) 或 on_error(例外) 稍後在主執行緒呼叫"""
+        job = _Job(key, fn, args, on_done, on_error)
+        with self.condition:
+            replaced = self.pending.pop(key, None) if key is not None else None
+            if replaced is not None:
+                self.jobs.remove(replaced)
+                self.outstanding -= 1
+                self.stats["coalesced"] += 1
+            self.jobs.append(job)
+            if key is not None:
+                self.pending[key] = job
+            self.outstanding += 1
+            self.stats["submitted"] += 1
+            self.condition.notify_all()
+        self._schedule_poll()
+
+    def idle(self) -> bool:
+        return self.outstanding == 0
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.jobs and self.running:
+                    self.condition.wait()
+                if not self.jobs:
+                    return
+                job = self.jobs.popleft()
+                if job.key is not None and self.pending.get(job.key) is job:
+                    del self.pending[job.key]
+                self.busy = True
+            try:
+                result, error = job.fn(*job.args), None
+            except Exception as e:
+                result, error = None, e
+            self.results.put((job, result, error))
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+    def _schedule_poll(self):
+        if self.outstanding and not self.polling:
+            self.polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self.polling = False
+        try:
+            self._deliver()
+        finally:
+            self._schedule_poll()
+
+    def _deliver(self):
+        """在主執行緒呼叫已完成工作的回呼"""
+        while True:
+            try:
+                job, result, error = self.results.get_nowait()
+            except queue.Empty:
+                return
+            self.outstanding -= 1
+            if error is None:
+                self.stats["completed"] += 1
+                if job.on_done is not None:
+                    job.on_done(result)
+            else:
+                self.stats["failed"] += 1
+                if job.on_error is not None:
+                    job.on_error(error)
+                else:
+                    # 沒有指定錯誤處理時交給 Tk 的回呼例外處理（預設印出 traceback）
+                    self.root.report_callback_exception(type(error), error, error.__traceback__)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """在主執行緒等待所有已送出的工作完成並呼叫回呼，例如關閉視窗前；逾時回傳 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # 回呼可能再送出新的工作（例如重算完成後保存），直到沒有未完成的工作為止
+        while self.outstanding:
+            with self.condition:
+                while self.jobs or self.busy:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self.condition.wait(remaining)
+            self._deliver()
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """完成剩下的工作後結束背景執行緒"""
+        finished = self.flush(timeout)
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join(timeout)
+        return finished
@@ -0,0 +1,590 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+from unittest import mock
+
+# 無介面的效能測試：以合成資料（100 ~ 1M 筆）計時利潤計算與保存/讀取/匯出路徑，結果寫成 JSON 供跨 commit 比較
+#
+#   python benchmark.py                                  # 全部案例、全部資料量
+#   python benchmark.py --sizes 100,10000 --cases json_load,json_save
+#   python benchmark.py --output new.json --compare old.json
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000, 1000000)
+SINGLE_RUN_ROWS = 100000  # 資料量達到此數量時每個案例只跑一次
+DEFAULT_OUTPUT = "benchmark_results.json"
+
+CURRENT_CHAOS = 50000.0
+DC_RATIO = 150.0
+ITEM_COIN_VALUE = 350.0
+CURRENT_DIVINE = 20.0
+
+# 案例名稱 -> 準備函式；準備函式接收 (資料量, 暫存目錄)，回傳要計時的無參數函式
+CASES: Dict[str, Callable[[int, str], Callable[[], None]]] = {}
+
+# 另外量測峰值記憶體的案例（以 tracemalloc 再執行一次，不影響計時）
+MEMORY_CASES = set()
+
+
+def case(name: str, memory: bool = False):
+    """註冊一個效能測試案例；memory=True 時結果另外記錄執行期間的峰值記憶體"""
+    def register(prepare):
+        CASES[name] = prepare
+        if memory:
+            MEMORY_CASES.add(name)
+        return prepare
+    return register
+
+
+# ---- 合成資料 ----
+
+def make_items(rows: int, seed: int = 0) -> List[Dict]:
+    """產生 items_data.json 格式的物品（輸入欄位加上識別碼）"""
+    rng = random.Random(seed)
+    items = []
+    for index in range(rows):
+        receive_price = round(rng.uniform(0.5, 200.0), 2)
+        items.append({
+            "item_id": f"{index:032x}",
+            "item_name": f"物品 {index}",
+            "receive_price": receive_price,
+            "sell_price": round(receive_price * rng.uniform(0.8, 1.5), 2),
+            "divine_sell_price": round(receive_price * rng.uniform(0.8, 1.5) / DC_RATIO, 4),
+        })
+    return items
+
+
+def make_final_items(rows: int) -> List[Dict]:
+    """Profit_Final 格式：輸入欄位加上已計算的利潤欄位"""
+    app = final_app(make_items(rows))
+    app.update_profits()
+    return app.items
+
+
+def make_v2_items(rows: int) -> list:
+    """Profit_v2 格式：Item 紀錄，利潤欄位已計算"""
+    from poe_core.item_record import Item
+    from poe_core.profit_engine import calculate_profits
+
+    items = [Item(item) for item in make_items(rows)]
+    calculate_profits(items, CURRENT_CHAOS, DC_RATIO, ITEM_COIN_VALUE)
+    return items
+
+
+def final_app(items: List[Dict]):
+    """不建立視窗的 Profit_Final 應用程式，只帶有計算需要的狀態"""
+    import Profit_Final
+
+    app = Profit_Final.ItemManagerApp.__new__(Profit_Final.ItemManagerApp)
+    app.items = items
+    app.current_chaos = CURRENT_CHAOS
+    app.current_divine = CURRENT_DIVINE
+    app.dc_ratio = DC_RATIO
+    return app
+
+
+def v2_app(items: list):
+    """不建立視窗的 Profit_v2 應用程式，只帶有匯出需要的狀態"""
+    import Profit_v2
+
+    app = Profit_v2.ItemManagerApp.__new__(Profit_v2.ItemManagerApp)
+    app.items = items
+    app.item_stream = None
+    app.worker = Profit_v2.BackgroundWorker(None)  # 匯出前等待背景重算；沒有送出工作，不會用到 root
+    return app
+
+
+def exporter(module, path: str, export: Callable[[], None]) -> Callable[[], None]:
+    """以固定路徑取代存檔對話框後執行匯出"""
+    def run():
+        with mock.patch.object(module.filedialog, "asksaveasfilename", return_value=path), \
+                mock.patch.object(module.messagebox, "showinfo"), \
+                mock.patch.object(module.messagebox, "showerror", side_effect=lambda *args: print(*args)):
+            export()
+    return run
+
+
+# ---- 利潤計算 ----
+
+@case("v2_item_calculator")
+def prepare_v2_item_calculator(rows: int, workdir: str):
+    from poe_core import ItemCalculator
+
+    items = make_v2_items(rows)
+
+    def run():
+        for item in items:
+            ItemCalculator.calculate_profit(item, CURRENT_CHAOS, DC_RATIO, ITEM_COIN_VALUE)
+    return run
+
+
+@case("v2_profit_engine")
+def prepare_v2_profit_engine(rows: int, workdir: str):
+    from poe_core.profit_engine import calculate_profits
+
+    items = make_v2_items(rows)
+    return lambda: calculate_profits(items, CURRENT_CHAOS, DC_RATIO, ITEM_COIN_VALUE)
+
+
+@case("v2_recompute_dc_change")
+def prepare_v2_recompute_dc_change(rows: int, workdir: str):
+    from poe_core.recompute_graph import RecomputeGraph
+
+    graph = RecomputeGraph(make_v2_items(rows), CURRENT_CHAOS, DC_RATIO, ITEM_COIN_VALUE)
+    ratios = [DC_RATIO + 1, DC_RATIO]
+
+    def run():
+        ratios.reverse()
+        graph.set_setting("dc_ratio", ratios[0])
+        graph.recompute()
+    return run
+
+
+@case("v2_price_ingest")
+def prepare_v2_price_ingest(rows: int, workdir: str):
+    from poe_core.price_ingest import PriceSnapshot, apply_snapshot
+    from poe_core.recompute_graph import RecomputeGraph
+
+    items = make_v2_items(rows)
+    graph = RecomputeGraph(items, CURRENT_CHAOS, DC_RATIO, ITEM_COIN_VALUE)
+    # 兩份價格快照交替套用，每次所有物品的價格與 DC 比率都有變動
+    snapshots = [
+        PriceSnapshot({item['item_name']: item['sell_price'] + offset for item in items}, DC_RATIO + offset)
+        for offset in (1.0, 0.0)
+    ]
+
+    def run():
+        snapshots.reverse()
+        apply_snapshot(graph, snapshots[0])
+    return run
+
+
+@case("v2_portfolio_optimize")
+def prepare_v2_portfolio_optimize(rows: int, workdir: str):
+    from poe_core.portfolio import PortfolioCandidates, optimize_portfolio
+
+    # 一半的物品有購買庫存上限，金幣預算只夠不受限時的一部分，需要搜尋金幣懲罰值
+    items = make_items(rows)
+    for index, item in enumerate(items):
+        if index % 2:
+            item["chaos_buy_stock"] = 20
+    candidates = PortfolioCandidates.from_items(items, DC_RATIO, ITEM_COIN_VALUE)
+
+    def run():
+        optimize_portfolio(candidates, CURRENT_CHAOS * 100, ITEM_COIN_VALUE * 1000)
+    return run
+
+
+@case("v2_scenario_sweep")
+def prepare_v2_scenario_sweep(rows: int, workdir: str):
+    from poe_core.profit_engine import ProfitEngine
+    from poe_core.scenario import sweep
+
+    # 21 個 DC 比率 x 2 個混沌石數量
+    engine = ProfitEngine.from_items(make_items(rows))
+    dc_ratios = [DC_RATIO - 10 + step for step in range(21)]
+    return lambda: sweep(engine, dc_ratios, [CURRENT_CHAOS, CURRENT_CHAOS * 2], [ITEM_COIN_VALUE])
+
+
+@case("arbitrage_find_cycles")
+def prepare_arbitrage_find_cycles(rows: int, workdir: str):
+    from poe_core.arbitrage import ExchangeGraph
+
+    # 物品數上限 500（節點數），每個物品有 C買、C賣、D賣 三條邊，另加物品之間的隨機報價
+    rng = random.Random(0)
+    items = make_items(min(rows, 500))
+    graph = ExchangeGraph()
+    graph.add_items(items, DC_RATIO, ITEM_COIN_VALUE)
+    prices = {item["item_name"]: item["receive_price"] for item in items}
+    names = list(prices)
+    for _ in range(len(items) * 5):
+        have, want = rng.sample(names, 2)
+        graph.add_rate(have, want, prices[have] / prices[want] * rng.uniform(0.9, 1.02))
+    return graph.find_cycles
+
+
+@case("batch_reprice")
+def prepare_batch_reprice(rows: int, workdir: str):
+    from poe_core.batch import run_batch
+
+    # 讀取 JSON 快照、覆蓋 DC 比率後重算、排序並寫出全部欄位的 CSV
+    path = os.path.join(workdir, "items_data.json")
+    prepare_json_save(rows, workdir)()
+    output = os.path.join(workdir, "batch.csv")
+
+    def run():
+        with open(output, "w", newline="", encoding="utf-8") as out:
+            run_batch(path, out, {"dc_ratio": DC_RATIO + 1})
+    return run
+
+
+@case("stash_ocr_preprocess")
+def prepare_stash_ocr_preprocess(rows: int, workdir: str):
+    from poe_core.stash_ocr import StashReader, load_image
+
+    # 以 Error/ 中的倉庫截圖計時載入、擷取區域與預處理（上限 50 張）；不執行 Tesseract，每次使用新的快取
+    error_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Error")
+    paths = [os.path.join(error_dir, name) for name in ("3.png", "3.jpg")]
+    images = [load_image(paths[index % len(paths)]) for index in range(min(rows, 50))]
+    return lambda: StashReader(recognize=lambda image, psm: "").read_many(images)
+
+
+@case("final_calculate_profit_for_item")
+def prepare_final_calculate_profit_for_item(rows: int, workdir: str):
+    app = final_app(make_items(rows))
+    return app.update_profits
+
+
+# ---- 保存與讀取 ----
+
+@case("json_save")
+def prepare_json_save(rows: int, workdir: str):
+    path = os.path.join(workdir, "items_data.json")
+    data = {"items": make_final_items(rows), "current_chaos": CURRENT_CHAOS,
+            "current_divine": CURRENT_DIVINE, "dc_ratio": DC_RATIO}
+
+    def run():
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+    return run
+
+
+@case("json_load")
+def prepare_json_load(rows: int, workdir: str):
+    path = os.path.join(workdir, "items_data.json")
+    prepare_json_save(rows, workdir)()
+
+    def run():
+        with open(path, "r", encoding="utf-8") as f:
+            json.load(f)
+    return run
+
+
+@case("json_stream_load")
+def prepare_json_stream_load(rows: int, workdir: str):
+    from poe_core.item_loader import iter_json_items
+    from poe_core.item_record import Item
+
+    path = os.path.join(workdir, "items_data.json")
+    prepare_json_save(rows, workdir)()
+
+    def run():
+        for _ in iter_json_items(path, {}, Item):
+            pass
+    return run
+
+
+@case("parquet_save")
+def prepare_parquet_save(rows: int, workdir: str):
+    from poe_core.columnar import write_items
+
+    path = os.path.join(workdir, "items_data.parquet")
+    data = {"items": make_v2_items(rows), "current_chaos": CURRENT_CHAOS, "dc_ratio": DC_RATIO,
+            "item_coin_value": ITEM_COIN_VALUE}
+    return lambda: write_items(path, data)
+
+
+@case("parquet_load")
+def prepare_parquet_load(rows: int, workdir: str):
+    from poe_core.columnar import iter_items
+    from poe_core.item_record import Item
+
+    path = os.path.join(workdir, "items_data.parquet")
+    prepare_parquet_save(rows, workdir)()
+
+    def run():
+        for _ in iter_items(path, {}, Item):
+            pass
+    return run
+
+
+@case("journal_append_edit")
+def prepare_journal_append_edit(rows: int, workdir: str):
+    from poe_core.item_journal import ItemJournal, OP_EDIT
+
+    journal = ItemJournal(os.path.join(workdir, "items_data_v2.json"), compact_every=sys.maxsize)
+    items = make_v2_items(rows)
+    journal.compact({"items": items, "current_chaos": CURRENT_CHAOS})
+
+    def run():
+        # 單筆修改的保存成本，與資料量無關
+        journal.append(OP_EDIT, item_id=items[-1]["item_id"], fields={"sell_price": 1.0})
+    return run
+
+
+@case("journal_append_burst")
+def prepare_journal_append_burst(rows: int, workdir: str):
+    from poe_core.item_journal import ItemJournal, OP_EDIT
+
+    journal = ItemJournal(os.path.join(workdir, "items_data_v2.json"), compact_every=sys.maxsize)
+    items = make_v2_items(rows)
+    journal.compact({"items": items, "current_chaos": CURRENT_CHAOS})
+    changes = [(OP_EDIT, {"item_id": item["item_id"], "fields": {"sell_price": 1.0}}) for item in items[:100]]
+
+    def run():
+        # 自動保存把間隔內的 100 次修改合併成一次寫入
+        journal.append_many(changes)
+    return run
+
+
+@case("journal_compact")
+def prepare_journal_compact(rows: int, workdir: str):
+    from poe_core.item_journal import ItemJournal
+
+    journal = ItemJournal(os.path.join(workdir, "items_data_v2.json"))
+    data = {"current_chaos": CURRENT_CHAOS, "dc_ratio": DC_RATIO, "item_coin_value": ITEM_COIN_VALUE,
+            "items": make_v2_items(rows)}
+    return lambda: journal.compact(data)
+
+
+@case("sqlite_compact")
+def prepare_sqlite_compact(rows: int, workdir: str):
+    from poe_core.item_store import SQLiteItemStore
+
+    store = SQLiteItemStore(os.path.join(workdir, "items_data_v2.db"))
+    data = {"current_chaos": CURRENT_CHAOS, "dc_ratio": DC_RATIO, "item_coin_value": ITEM_COIN_VALUE,
+            "items": make_v2_items(rows)}
+
+    def run():
+        store.compact(data)
+        store.close()  # 暫存目錄刪除前必須關閉資料庫
+    return run
+
+
+@case("sqlite_load")
+def prepare_sqlite_load(rows: int, workdir: str):
+    from poe_core.item_record import Item
+    from poe_core.item_store import SQLiteItemStore
+
+    store = SQLiteItemStore(os.path.join(workdir, "items_data_v2.db"))
+    store.compact({"current_chaos": CURRENT_CHAOS, "items": make_v2_items(rows)})
+    store.close()
+
+    def run():
+        store.load(Item)
+        store.close()
+    return run
+
+
+# ---- 價格歷史 ----
+
+@case("price_history_append")
+def prepare_price_history_append(rows: int, workdir: str):
+    from poe_core.price_history import PriceHistory
+
+    items = make_items(rows)
+    history = PriceHistory(os.path.join(workdir, "history"))
+    history.record_items(items, DC_RATIO)
+
+    def run():
+        # 每次都是新的 DC 比率，所有物品各寫入一筆
+        run.dc_ratio += 1
+        history.record_items(items, run.dc_ratio)
+    run.dc_ratio = DC_RATIO
+    return run
+
+
+@case("price_history_query")
+def prepare_price_history_query(rows: int, workdir: str):
+    from poe_core.price_history import PriceHistory
+
+    # rows 筆紀錄分屬 100 個物品，查詢其中一個物品中間一半的時間範圍
+    directory = os.path.join(workdir, "history")
+    snapshots = max(1, rows // 100)
+    history = PriceHistory(directory)
+    items = make_items(min(rows, 100))
+    for timestamp in range(snapshots):
+        history.record_items(items, DC_RATIO + timestamp, timestamp)
+
+    def run():
+        PriceHistory(directory).query(items[0]["item_name"], snapshots / 4, snapshots * 3 / 4)
+    return run
+
+
+# ---- CSV 匯出 ----
+
+@case("final_csv_export")
+def prepare_final_csv_export(rows: int, workdir: str):
+    import Profit_Final
+
+    app = final_app(make_final_items(rows))
+    return exporter(Profit_Final, os.path.join(workdir, "final.csv"), app.export_to_csv)
+
+
+@case("v2_csv_export")
+def prepare_v2_csv_export(rows: int, workdir: str):
+    import Profit_v2
+
+    app = v2_app(make_v2_items(rows))
+    return exporter(Profit_v2, os.path.join(workdir, "v2.csv"), app.export_to_csv)
+
+
+@case("csv_export", memory=True)
+def prepare_csv_export(rows: int, workdir: str):
+    from poe_core.csv_export import export_csv
+
+    items = make_v2_items(rows)
+    return lambda: export_csv(os.path.join(workdir, "items.csv"), items)
+
+
+@case("csv_export_gzip", memory=True)
+def prepare_csv_export_gzip(rows: int, workdir: str):
+    from poe_core.csv_export import export_csv
+
+    items = make_v2_items(rows)
+    return lambda: export_csv(os.path.join(workdir, "items.csv.gz"), items)
+
+
+@case("csv_export_stream", memory=True)
+def prepare_csv_export_stream(rows: int, workdir: str):
+    from poe_core.csv_export import export_csv
+    from poe_core.item_loader import iter_json_items
+
+    # 從 JSON 快照逐筆讀取並匯出，峰值記憶體應與資料量無關
+    path = os.path.join(workdir, "items_data.json")
+    prepare_json_save(rows, workdir)()
+    return lambda: export_csv(os.path.join(workdir, "stream.csv"), iter_json_items(path, {}))
+
+
+# ---- 執行與比較 ----
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def metadata(repeat: int) -> Dict:
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": numpy_version,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "repeat": repeat,
+    }
+
+
+def run_case(name: str, rows: int, repeat: int) -> Dict:
+    """執行單一案例，取多次執行中最快的一次"""
+    with tempfile.TemporaryDirectory() as workdir:
+        run = CASES[name](rows, workdir)
+        runs = []
+        for _ in range(1 if rows >= SINGLE_RUN_ROWS else repeat):
+            start = time.perf_counter()
+            run()
+            runs.append(time.perf_counter() - start)
+        peak_bytes = measure_peak_memory(run) if name in MEMORY_CASES else None
+    best = min(runs)
+    result = {
+        "case": name,
+        "rows": rows,
+        "seconds": best,
+        "runs": runs,
+        "rows_per_second": rows / best if best > 0 else None,
+    }
+    if peak_bytes is not None:
+        result["peak_kib"] = peak_bytes / 1024
+    return result
+
+
+def measure_peak_memory(run: Callable[[], None]) -> int:
+    """執行一次並回傳期間新配置記憶體的峰值（位元組），不含準備階段已配置的資料"""
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(cases: List[str], sizes: List[int], repeat: int) -> Dict:
+    results = []
+    for name in cases:
+        for rows in sizes:
+            try:
+                result = run_case(name, rows, repeat)
+            except ImportError as e:
+                # 選用套件（例如 pyarrow）沒有安裝時略過該案例
+                print(f"{name:<34}略過：{e}", flush=True)
+                break
+            results.append(result)
+            peak = f" {result['peak_kib']:>10.0f} KiB" if "peak_kib" in result else ""
+            print(f"{name:<34}{rows:>9} 筆 {result['seconds'] * 1000:>12.3f} ms{peak}", flush=True)
+    return {"meta": metadata(repeat), "results": results}
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """與基準結果比較，回傳變慢超過門檻的案例"""
+    previous = {(result["case"], result["rows"]): result["seconds"] for result in baseline["results"]}
+    regressions = []
+    print(f"\n與 {baseline['meta'].get('commit', '')[:12] or '基準'} 比較（比值 = 目前 / 基準）")
+    for result in current["results"]:
+        key = (result["case"], result["rows"])
+        if key not in previous or previous[key] <= 0:
+            continue
+        ratio = result["seconds"] / previous[key]
+        flag = "  ← 變慢" if ratio > threshold else ""
+        print(f"{result['case']:<34}{result['rows']:>9} 筆 {ratio:>8.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append(dict(result, baseline_seconds=previous[key], ratio=ratio))
+    return regressions
+
+
+def parse_list(value: str) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="交易計算器效能測試（不需要視窗）")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="資料量，以逗號分隔")
+    parser.add_argument("--cases", default="", help="只執行指定案例，以逗號分隔")
+    parser.add_argument("--repeat", type=int, default=3, help=f"每個案例的執行次數（{SINGLE_RUN_ROWS} 筆以上只跑一次）")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="結果 JSON 檔路徑")
+    parser.add_argument("--compare", help="與先前的結果 JSON 比較")
+    parser.add_argument("--threshold", type=float, default=1.2, help="比較時視為變慢的比值")
+    parser.add_argument("--list", action="store_true", help="列出所有案例")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+
+    cases = parse_list(args.cases) or list(CASES)
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        parser.error(f"未知的案例: {', '.join(unknown)}")
+    sizes = [int(size) for size in parse_list(args.sizes)]
+
+    report = run_benchmarks(cases, sizes, max(1, args.repeat))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n結果已寫入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,18 @@
+import startup_profile  # 必須最先載入：--profile-startup 時記錄各模組的載入時間
 import tkinter as tk
 from tkinter import messagebox, ttk, simpledialog, filedialog
-import json
-import os
-import csv
-import requests
-from threading import Thread
-from typing import List, Dict
+from typing import Dict
+from virtual_treeview import VirtualTreeview  # 只繪製可見列的虛擬列表
+from treeview_reconciler import TreeviewReconciler  # 只修補有變動的列
+from poe_core import calculate_item_purchasable, trade_profits  # 利潤計算（與其他前端共用）
+from poe_core import ItemIndex, item_key  # 物品唯一識別碼與 O(1) 查找
+from poe_core import OP_ADD, OP_DELETE  # 只附加的變更日誌
+from poe_core import open_item_store  # 依檔名選擇 JSON 日誌或 SQLite 儲存
 
 
 class ItemManagerApp:
     DATA_FILE = "items_data.json"
+    VIRTUAL_TREEVIEW = True  # 虛擬列表模式：只繪製可見範圍的列，重繪成本與資料量無關
 
     def __init__(self, root):
         self.root = root
@@ -22,41 +25,35 @@ class ItemManagerApp:
         self.dc_ratio = 1.0
         self.exchange_rates = {"chaos": 1.0, "divine": 1.0}  # 初始化匯率
 
+        # item_id -> 物品的雜湊索引
+        self.item_index = ItemIndex(self.items)
+
+        # 每次修改只附加一筆紀錄（JSON 日誌）或寫入一筆交易（SQLite），不重寫整個檔案
+        self.journal = open_item_store(self.DATA_FILE)
+
         # 設定 UI
         self.setup_ui()
         self.load_items_from_file()
 
     def calculate_profit(self, receive_price, sell_price, divine_sell_price, dc_ratio):
-        profit_c_to_c = sell_price - receive_price
-        profit_c_to_d = (divine_sell_price * dc_ratio) - receive_price
-        return profit_c_to_c, profit_c_to_d
-
-    def update_profits(self):
-        """更新每個物品的利潤數據，根據新的 DC 比率，同時更新可購買數量"""
-        for item in self.items:
-            # C 買 C 賣利潤 (sell_price - receive_price)
-            item['profit_c_to_c'] = item['sell_price'] - item['receive_price']
-
-            # C 買 D 賣利潤: 神聖石販賣價格 * DC 比率 - 混沌石購買價格
-            item['profit_c_to_d'] = (item['divine_sell_price'] * self.dc_ratio) - item['receive_price']
-
-            # 更新可購買的混沌石數量
-            item['purchasable_with_chaos'] = int(self.current_chaos // item['receive_price']) if item['receive_price'] > 0 else 0
-
-            # 更新可購買的神聖石數量 (轉換成混沌石再除以購買價格)
-            total_chaos_from_divine = self.current_divine * self.dc_ratio
-            item['purchasable_with_divine'] = int(total_chaos_from_divine // item['receive_price']) if item['receive_price'] > 0 else 0
+        return trade_profits(receive_price, sell_price, divine_sell_price, dc_ratio)
 
     def load_items_from_file(self):
         """從文件中加載物品資料"""
-        if os.path.exists(self.DATA_FILE):
+        if self.journal.exists():
             try:
-                with open(self.DATA_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.items = data.get("items", [])
-                    self.current_chaos = data.get("current_chaos", 0.0)
-                    self.current_divine = data.get("current_divine", 0.0)
-                    self.dc_ratio = data.get("dc_ratio", 1.0)
+                # 讀取快照並重播變更日誌
+                data = self.journal.load()
+                self.items = data.get("items", [])
+                self.current_chaos = data.get("current_chaos", 0.0)
+                self.current_divine = data.get("current_divine", 0.0)
+                self.dc_ratio = data.get("dc_ratio", 1.0)
+                # 日誌只記錄設定值的變動，重播過設定值時才需要依最新設定值重算
+                if self.journal.settings_replayed:
+                    self.update_profits()
+                if self.item_index.rebuild(self.items):
+                    # 舊資料沒有識別碼，立即寫入快照，之後的日誌紀錄才能對應到物品
+                    self.save_items_to_file()
             except Exception as e:
                 messagebox.showerror("錯誤", f"讀取歷史紀錄時發生錯誤: {e}")
 
@@ -97,6 +94,19 @@ class ItemManagerApp:
 
         self.tree.bind("<Double-1>", self.edit_single_column)
 
+        # 高亮標籤只需設定一次
+        self.tree.tag_configure("highlight_20C", background="lightgreen")  # 利潤超過 20C 高亮為綠色
+        self.tree.tag_configure("highlight_10C", background="yellow")  # 利潤超過 10C 高亮為黃色
+        self.tree.tag_configure("normal", background="white")  # 正常條目無高亮
+
+        # 以物品對應 TreeView 列，重算後只更新有變動的列；虛擬列表接管捲動條
+        self.virtual_tree = None
+        self.tree_rows = TreeviewReconciler(self.tree, self.format_row, self.row_tag, key=item_key)
+        if self.VIRTUAL_TREEVIEW:
+            scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL)
+            scrollbar.grid(row=7, column=4, sticky="ns")
+            self.virtual_tree = VirtualTreeview(self.tree, scrollbar, self.format_row, self.row_tag)
+
         self.chaos_quantity_label = ttk.Label(main_frame, text=f"倉庫混沌石數量: {int(self.current_chaos // 1)}")
         self.chaos_quantity_label.grid(row=1, column=2, padx=10, pady=2, sticky=tk.E)
         chaos_button = ttk.Button(main_frame, text="修改混沌石數量", command=self.update_chaos_resources)
@@ -155,104 +165,110 @@ class ItemManagerApp:
             self.update_profits()
             self.update_treeview()
 
-            # 保存更新到文件
-            self.save_items_to_file()
+            # 只記錄設定值的變動
+            self.record_change()
 
         except ValueError:
             messagebox.showerror("錯誤", "請輸入有效的數字。")
 
     def update_treeview_row(self, item_index):
         """僅更新指定行的數據"""
-        item = self.items[item_index]
-        self.tree.item(self.tree.get_children()[item_index], values=(
-            item['item_name'],
-            f"{item['receive_price']:.2f}",
-            f"{item['sell_price']:.2f}",
-            f"{item['divine_buy_price']:.2f}",
-            f"{item['divine_sell_price']:.2f}",
-            f"{item['profit_c_to_c']:.2f}",
-            f"{item['profit_c_to_d']:.2f}",
-            item['purchasable_with_chaos'],
-            item['purchasable_with_divine']
-        ))
+        if self.virtual_tree is not None:
+            # 不在可見範圍內的列不需要重繪
+            self.virtual_tree.refresh()
+            return
+        self.tree_rows.update_item(self.items[item_index])
 
     def load_items_from_file(self):
         """從文件中加載物品資料"""
-        if os.path.exists(self.DATA_FILE):
+        if self.journal.exists():
             try:
-                with open(self.DATA_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.items = data.get("items", [])
-                    self.current_chaos = data.get("current_chaos", 0.0)
-                    self.current_divine = data.get("current_divine", 0.0)
-                    self.dc_ratio = data.get("dc_ratio", 1.0)
+                # 讀取快照並重播變更日誌
+                data = self.journal.load()
+                self.items = data.get("items", [])
+                self.current_chaos = data.get("current_chaos", 0.0)
+                self.current_divine = data.get("current_divine", 0.0)
+                self.dc_ratio = data.get("dc_ratio", 1.0)
+                # 日誌只記錄設定值的變動，重播過設定值時才需要依最新設定值重算
+                if self.journal.settings_replayed:
+                    self.update_profits()
+                if self.item_index.rebuild(self.items):
+                    # 舊資料沒有識別碼，立即寫入快照，之後的日誌紀錄才能對應到物品
+                    self.save_items_to_file()
             except Exception as e:
                 messagebox.showerror("錯誤", f"讀取歷史紀錄時發生錯誤: {e}")
 
+    def settings_data(self) -> Dict:
+        """需要保存的設定值"""
+        return {
+            "current_chaos": self.current_chaos,
+            "current_divine": self.current_divine,
+            "dc_ratio": self.dc_ratio
+        }
+
     def save_items_to_file(self):
-        """將物品資料保存到文件"""
+        """將物品資料完整保存到文件（快照），並清空變更日誌"""
+        try:
+            data = {"items": self.items}
+            data.update(self.settings_data())
+            self.journal.compact(data)
+        except Exception as e:
+            messagebox.showerror("錯誤", f"保存數據時發生錯誤: {e}")
+
+    def record_change(self, op=None, **payload):
+        """將單筆變更附加到日誌，寫入成本與變更大小成正比；累積到一定數量時壓縮成完整快照"""
         try:
-            with open(self.DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump({
-                    "items": self.items,
-                    "current_chaos": self.current_chaos,
-                    "current_divine": self.current_divine,
-                    "dc_ratio": self.dc_ratio
-                }, f, ensure_ascii=False, indent=4)
+            if op is not None:
+                self.journal.append(op, **payload)
+            self.journal.record_settings(**self.settings_data())
+            if self.journal.needs_compaction():
+                self.save_items_to_file()
         except Exception as e:
             messagebox.showerror("錯誤", f"保存數據時發生錯誤: {e}")
 
+    @staticmethod
+    def format_row(item: Dict) -> tuple:
+        """將物品格式化為 TreeView 的一列"""
+        return (
+            item.get('item_name', ''),
+            f"{item.get('receive_price', 0.0):.2f}",
+            f"{item.get('sell_price', 0.0):.2f}",
+            f"{item.get('divine_buy_price', 0.0):.2f}",
+            f"{item.get('divine_sell_price', 0.0):.2f}",
+            f"{item.get('profit_c_to_c', 0.0):.2f}",
+            f"{item.get('profit_c_to_d', 0.0):.2f}",
+            item.get('purchasable_with_chaos', 0),
+            item.get('purchasable_with_divine', 0)
+        )
+
+    @staticmethod
+    def row_tag(item: Dict) -> str:
+        """根據利潤值設置高亮顯示的標籤"""
+        profit_c_to_c = item.get('profit_c_to_c', 0.0)
+        profit_c_to_d = item.get('profit_c_to_d', 0.0)
+        if profit_c_to_c > 20 or profit_c_to_d > 20:
+            return "highlight_20C"
+        if profit_c_to_c > 10 or profit_c_to_d > 10:
+            return "highlight_10C"
+        return "normal"
+
+    def row_index(self, row_id: str) -> int:
+        """由 TreeView 列 ID 取得物品在 self.items 中的索引，不受排序影響"""
+        if self.virtual_tree is not None:
+            return self.virtual_tree.index_of(row_id)
+        return self.item_index.position(self.tree_rows.key_of(row_id))
+
     def display_item_in_treeview(self, item_data):
         """顯示物品在 TreeView 中"""
-        self.tree.insert('', 'end', values=(
-            item_data.get('item_name', ''),
-            f"{item_data.get('receive_price', 0.0):.2f}",
-            f"{item_data.get('sell_price', 0.0):.2f}",
-            f"{item_data.get('divine_buy_price', 0.0):.2f}",
-            f"{item_data.get('divine_sell_price', 0.0):.2f}",
-            f"{item_data.get('profit_c_to_c', 0.0):.2f}",
-            f"{item_data.get('profit_c_to_d', 0.0):.2f}",
-            item_data.get('purchasable_with_chaos', 0),
-            item_data.get('purchasable_with_divine', 0)
-        ))
+        self.update_treeview()
 
     def update_treeview(self):
-        """更新 TreeView 中顯示的資料"""
-        # 首先清空 TreeView 中的所有條目
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # 重新插入 items 列表中的所有條目
-        for item in self.items:
-            # 檢查利潤是否超過 10C 或 20C
-            profit_c_to_c = item['profit_c_to_c']
-            profit_c_to_d = item['profit_c_to_d']
-
-            # 設置高亮顯示的邏輯，根據利潤值設置顏色
-            if profit_c_to_c > 20 or profit_c_to_d > 20:
-                tag = "highlight_20C"
-            elif profit_c_to_c > 10 or profit_c_to_d > 10:
-                tag = "highlight_10C"
-            else:
-                tag = "normal"
-
-         # 插入新項目到 TreeView 並應用標籤
-        self.tree.insert('', 'end', values=(
-            item['item_name'],
-            f"{item['receive_price']:.2f}",
-            f"{item['sell_price']:.2f}",
-            f"{item['divine_buy_price']:.2f}",
-            f"{item['divine_sell_price']:.2f}",
-            f"{item['profit_c_to_c']:.2f}",
-            f"{item['profit_c_to_d']:.2f}",
-            item['purchasable_with_chaos'],
-            item['purchasable_with_divine']
-        ), tags=(tag,))
-
-        # 配置不同標籤的顏色
-        self.tree.tag_configure("highlight_20C", background="lightgreen")  # 利潤超過 20C 高亮為綠色
-        self.tree.tag_configure("highlight_10C", background="yellow")  # 利潤超過 10C 高亮為黃色
-        self.tree.tag_configure("normal", background="white")  # 正常條目無高亮
+        """更新 TreeView 中顯示的資料：只插入新列、刪除消失的列並修補有變動的列"""
+        if self.virtual_tree is not None:
+            # 虛擬列表只重繪可見範圍
+            self.virtual_tree.set_items(self.items)
+            return
+        self.tree_rows.sync(self.items)
 
     def edit_single_column(self, event):
         """處理欄位的單項編輯"""
@@ -267,7 +283,7 @@ class ItemManagerApp:
             return
 
         selected_item_id = selected[0]
-        selected_index = self.tree.index(selected_item_id)
+        selected_index = self.row_index(selected_item_id)
         selected_item = self.items[selected_index]
 
         column_mapping = {
@@ -296,19 +312,15 @@ class ItemManagerApp:
                     # 僅更新指定行，而非整個 TreeView
                     self.update_treeview_row(selected_index)
 
-                    # 保存更新的資料
-                    self.save_items_to_file()
+                    # 衍生欄位也一併變動，記錄整筆物品
+                    self.record_change(OP_ADD, item=self.items[selected_index])
 
                 except ValueError:
                     messagebox.showerror("錯誤", "請確保輸入的是有效的數字。")
 
     def calculate_profit_for_item(self, item: Dict):
         """計算單個物品的利潤和可購買數量"""
-        item['profit_c_to_c'] = item['sell_price'] - item['receive_price']
-        item['profit_c_to_d'] = (item['divine_sell_price'] * self.dc_ratio) - item['receive_price']
-        item['purchasable_with_chaos'] = int(self.current_chaos // item['receive_price']) if item['receive_price'] > 0 else 0
-        total_chaos_from_divine = self.current_divine * self.dc_ratio
-        item['purchasable_with_divine'] = int(total_chaos_from_divine // item['receive_price']) if item['receive_price'] > 0 else 0
+        calculate_item_purchasable(item, self.current_chaos, self.current_divine, self.dc_ratio)
 
     def update_profits(self):
         """更新每個物品的利潤數據"""
@@ -323,11 +335,16 @@ class ItemManagerApp:
             return
 
         selected_item_id = selected[0]
-        selected_index = self.tree.index(selected_item_id)
+        selected_index = self.row_index(selected_item_id)
+        removed_id = item_key(self.items[selected_index])
         del self.items[selected_index]
+        self.item_index.remove(removed_id)
 
-        self.tree.delete(selected_item_id)
-        self.save_items_to_file()
+        if self.virtual_tree is not None:
+            self.virtual_tree.refresh(selected=[])  # 被刪除的列不再保留選取
+        else:
+            self.update_treeview()
+        self.record_change(OP_DELETE, item_id=removed_id)
 
         messagebox.showinfo("成功", "已成功刪除選中的紀錄。")
 
@@ -341,7 +358,7 @@ class ItemManagerApp:
             self.chaos_quantity_label.config(text=f"倉庫混沌石數量: {int(self.current_chaos // 1)}")
             self.update_profits()
             self.update_treeview()
-            self.save_items_to_file()
+            self.record_change()
         except ValueError:
             messagebox.showerror("錯誤", "請輸入有效的數字。")
 
@@ -355,12 +372,14 @@ class ItemManagerApp:
             self.divine_quantity_label.config(text=f"倉庫神聖石數量: {int(self.current_divine)}")
             self.update_profits()
             self.update_treeview()
-            self.save_items_to_file()
+            self.record_change()
         except ValueError:
             messagebox.showerror("錯誤", "請輸入有效的數字。")
 
     def export_to_csv(self):
         """將物品資料匯出為 CSV"""
+        import csv  # 只在匯出時載入
+
         export_file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
         if not export_file_path:
             return
@@ -396,6 +415,10 @@ class ItemManagerApp:
 
 # 主程式執行
 if __name__ == "__main__":
+    startup_profile.mark("載入模組")
     root = tk.Tk()
+    startup_profile.mark("建立 Tk")
     app = ItemManagerApp(root)
+    startup_profile.mark("建立視窗")
+    startup_profile.finish_after_first_paint(root, "item_manager_app")
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""交易計算器的核心函式庫：利潤計算、物品儲存與匯率處理
+
+不依賴 tkinter，各圖形介面（Profit_v2、Profit_Final、item_manager_app、profit_calculator_gui、
+Profit_calculator_gui_plus）與命令列版 profit_calculator 都只是這個套件外的一層介面，
+也可以直接在批次作業或效能測試中使用。
+
+匯出的名稱在第一次取用時才載入所在的模組：只用到儲存與單筆計算的前端不會載入 numpy，
+沒有連線的前端不會載入 HTTP 客戶端，縮短程式（尤其是打包後的執行檔）的啟動時間。
+"""
+
+import importlib
+
+# 匯出名稱 -> 所在模組
+_EXPORTS = {
+    "ExchangeGraph": "arbitrage",
+    "format_cycle": "arbitrage",
+    "run_batch": "batch",
+    "ItemCalculator": "calculator",
+    "bill_trade": "calculator",
+    "build_item_totals": "calculator",
+    "calculate_item_purchasable": "calculator",
+    "calculate_item_totals": "calculator",
+    "coin_adjusted_profits": "calculator",
+    "divine_trade": "calculator",
+    "parse_fraction": "calculator",
+    "profit_c_to_c": "calculator",
+    "profit_c_to_d": "calculator",
+    "purchasable": "calculator",
+    "trade_profits": "calculator",
+    "BILL_FEES": "coin_routes",
+    "COIN_PER_CHAOS": "coin_routes",
+    "DEFAULT_FEES": "coin_routes",
+    "FAUSTUS_COIN_PER_TRADE": "coin_routes",
+    "CoinFees": "coin_routes",
+    "is_columnar_path": "columnar",
+    "EXPORT_COLUMNS": "csv_export",
+    "export_csv": "csv_export",
+    "write_csv": "csv_export",
+    "DERIVED_FIELDS": "item_fields",
+    "LOSS_TEXT": "item_fields",
+    "parse_divine_price": "item_fields",
+    "ITEM_ID_KEY": "item_index",
+    "ItemIndex": "item_index",
+    "item_key": "item_index",
+    "new_item_id": "item_index",
+    "OP_ADD": "item_journal",
+    "OP_DELETE": "item_journal",
+    "OP_EDIT": "item_journal",
+    "OP_SETTINGS": "item_journal",
+    "ItemJournal": "item_journal",
+    "iter_json_items": "item_loader",
+    "json_default": "item_loader",
+    "read_json": "item_loader",
+    "write_json": "item_loader",
+    "Item": "item_record",
+    "SQLiteItemStore": "item_store",
+    "is_sqlite_path": "item_store",
+    "migrate_json_to_sqlite": "item_store",
+    "open_item_store": "item_store",
+    "NinjaClient": "ninja_client",
+    "PriceFeedError": "ninja_client",
+    "RequestBudget": "ninja_client",
+    "PortfolioCandidates": "portfolio",
+    "optimize_portfolio": "portfolio",
+    "PriceHistory": "price_history",
+    "ProfitEngine": "profit_engine",
+    "calculate_profits": "profit_engine",
+    "RecomputeGraph": "recompute_graph",
+    "StashReader": "stash_ocr",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # 之後直接取用，不再經過 __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
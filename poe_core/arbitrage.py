@@ -0,0 +1,237 @@
+import math
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .coin_routes import DEFAULT_FEES, CoinFees
+from .price_ingest import DIVINE_ORB, normalize_name
+from .profit_engine import parse_divine_price
+
+CHAOS_ORB = "Chaos Orb"
+
+# 比率乘積至少要超過 1 + MIN_PROFIT 才視為套利，避免浮點誤差把互為倒數的報價當成循環
+MIN_PROFIT = 1e-9
+
+
+class ExchangeGraph:
+    """交換比率圖：節點為通貨或物品，邊 (have -> want, rate) 表示 1 個 have 可換到 rate 個 want
+
+    每條邊可帶有每單位 have 的金幣費用，依節點的混沌石價值與費用表的 coin_per_chaos 折算後從比率中扣除，
+    因此循環的比率乘積就是扣除金幣後的實際報酬。
+    """
+
+    def __init__(self, fees: CoinFees = DEFAULT_FEES):
+        self.fees = fees
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.chaos_values: List[float] = []
+        self.sources: List[int] = []
+        self.targets: List[int] = []
+        self.rates: List[float] = []  # 扣除金幣費用後的比率
+        self.add_node(CHAOS_ORB, 1.0)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.rates)
+
+    def add_node(self, name: str, chaos_value: Optional[float] = None) -> int:
+        """加入節點（名稱不分大小寫），已存在時只在提供混沌石價值且原本未知時更新"""
+        key = normalize_name(name)
+        node = self.index.get(key)
+        if node is None:
+            node = len(self.names)
+            self.index[key] = node
+            self.names.append(name)
+            self.chaos_values.append(math.nan)
+        if chaos_value is not None and chaos_value > 0 and math.isnan(self.chaos_values[node]):
+            self.chaos_values[node] = float(chaos_value)
+        return node
+
+    def add_rate(self, have: str, want: str, rate: float, coin: float = 0.0) -> bool:
+        """加入一條邊：1 個 have 換 rate 個 want，每單位 have 支付 coin 金幣；扣除費用後無利可圖的邊不加入"""
+        if not rate or rate <= 0 or not math.isfinite(rate):
+            return False
+        source, target = self.add_node(have), self.add_node(want)
+        if source == target:
+            return False
+        if coin:
+            have_value = self.chaos_values[source]
+            if not have_value > 0:
+                # 不知道 have 的混沌石價值就無法折算金幣費用
+                return False
+            rate *= 1.0 - self.fees.coin_in_chaos(coin) / have_value
+            if rate <= 0:
+                return False
+        self.sources.append(source)
+        self.targets.append(target)
+        self.rates.append(rate)
+        return True
+
+    def add_overviews(self, overviews: Dict[str, Dict]):
+        """加入 poe.ninja overview 資料
+
+        通貨類有買賣兩邊的報價（receive：買入 1 個需要的混沌石；pay：賣出時 1 混沌石需要的數量），
+        物品類只有單一價格，另有 divineValue 時加入與神聖石之間的邊。
+        """
+        lines = [line for data in overviews.values() for line in data.get("lines", [])]
+        # 先登記所有節點的混沌石價值，之後加入邊時才能折算金幣
+        for line in lines:
+            name = line.get("currencyTypeName") or line.get("name")
+            if name:
+                self.add_node(name, line.get("chaosEquivalent") or line.get("chaosValue"))
+        for line in lines:
+            if "currencyTypeName" in line:
+                name = line["currencyTypeName"]
+                receive = (line.get("receive") or {}).get("value") or line.get("chaosEquivalent")
+                pay = (line.get("pay") or {}).get("value")
+                sell = 1.0 / pay if pay else line.get("chaosEquivalent")
+                if receive:
+                    self.add_rate(CHAOS_ORB, name, 1.0 / receive)
+                if sell:
+                    self.add_rate(name, CHAOS_ORB, sell)
+            elif line.get("name"):
+                name, chaos_value = line["name"], line.get("chaosValue")
+                if chaos_value:
+                    self.add_rate(CHAOS_ORB, name, 1.0 / chaos_value)
+                    self.add_rate(name, CHAOS_ORB, chaos_value)
+                divine_value = line.get("divineValue")
+                if divine_value:
+                    self.add_rate(DIVINE_ORB, name, 1.0 / divine_value)
+                    self.add_rate(name, DIVINE_ORB, divine_value)
+
+    def add_items(self, items: Iterable[Dict], dc_ratio: float, item_coin_value: float = 0.0):
+        """加入已保存的物品（Profit_v2 格式）：C買、C賣、D賣 三條邊與 D/C 匯率，金幣費用依費用表計算"""
+        self.add_node(DIVINE_ORB, dc_ratio)
+        for item in items:
+            name = item.get("item_name")
+            receive_price = float(item.get("receive_price") or 0)
+            if not name or receive_price <= 0:
+                continue
+            divine_sell_price = parse_divine_price(item.get("divine_sell_price", 0))
+            sell_div_num_chaos = divine_sell_price * dc_ratio
+            coin = self.fees.unit_costs(item_coin_value, item["sell_price"], sell_div_num_chaos, dc_ratio)
+            self.add_node(name, receive_price)
+            # 購買物品的金幣以每 1 混沌石計
+            self.add_rate(CHAOS_ORB, name, 1.0 / receive_price, item_coin_value / receive_price)
+            self.add_rate(name, CHAOS_ORB, item["sell_price"], coin["c_to_c"] - item_coin_value)
+            self.add_rate(name, DIVINE_ORB, divine_sell_price, coin["c_to_d"] - item_coin_value)
+        d_to_c = self.fees.route_inputs(dc_ratio)["d_to_c_coin"]
+        self.add_rate(DIVINE_ORB, CHAOS_ORB, dc_ratio, d_to_c)
+        self.add_rate(CHAOS_ORB, DIVINE_ORB, 1.0 / dc_ratio, d_to_c / dc_ratio)
+
+    def find_cycles(self, max_cycles: int = 20, min_profit: float = MIN_PROFIT) -> List[Dict]:
+        """以 Bellman-Ford 在 -log(比率) 權重上找負環，即比率乘積大於 1 的套利循環（長度不限）
+
+        每輪以 numpy 同時鬆弛所有邊，O(節點數 x 邊數)，數百個節點、數千條邊只需數十毫秒。
+        回傳依報酬率由高到低排序的 [{"path": [節點名稱..., 起點], "rates": [...], "profit": 報酬率}]。
+        """
+        count = len(self.names)
+        if not self.rates:
+            return []
+        sources = np.asarray(self.sources)
+        targets = np.asarray(self.targets)
+        rates = np.asarray(self.rates)
+        weights = -np.log(rates)
+        tolerance = math.log1p(min_profit) / max(count, 1)
+
+        # 虛擬起點連到所有節點，距離都從 0 開始
+        distance = np.zeros(count)
+        predecessor = np.full(count, -1)
+        relaxed = np.zeros(0, dtype=np.int64)
+        for _ in range(count):
+            candidate = distance[sources] + weights
+            improving = np.flatnonzero(candidate < distance[targets] - tolerance)
+            if len(improving) == 0:
+                return []
+            # 同一節點有多條邊可鬆弛時取最小值
+            order = improving[np.lexsort((candidate[improving], targets[improving]))]
+            first = np.concatenate([[True], targets[order][1:] != targets[order][:-1]])
+            best = order[first]
+            distance[targets[best]] = candidate[best]
+            predecessor[targets[best]] = best
+            relaxed = targets[best]
+
+        # 第 count 輪仍能鬆弛的節點位於負環上或可由負環到達；沿前驅邊走 count 步必定進入環內
+        cycles = {}
+        for start in relaxed.tolist():
+            node = start
+            for _ in range(count):
+                if predecessor[node] < 0:
+                    break
+                node = sources[predecessor[node]]
+            if predecessor[node] < 0:
+                continue
+            cycle_edges = []
+            current = node
+            while True:
+                edge = predecessor[current]
+                cycle_edges.append(edge)
+                current = sources[edge]
+                if current == node or len(cycle_edges) > count:
+                    break
+            if current != node:
+                continue
+            cycle_edges.reverse()
+            key = frozenset(cycle_edges)
+            if key not in cycles:
+                cycles[key] = cycle_edges
+            if len(cycles) >= max_cycles:
+                break
+
+        results = []
+        for cycle_edges in cycles.values():
+            cycle_edges = _rotate_to_chaos(cycle_edges, sources)
+            cycle_rates = rates[cycle_edges]
+            product = float(np.prod(cycle_rates))
+            if product <= 1.0 + min_profit:
+                continue
+            path = [self.names[sources[edge]] for edge in cycle_edges] + [self.names[sources[cycle_edges[0]]]]
+            results.append({"path": path, "rates": cycle_rates.tolist(), "profit": product - 1.0})
+        results.sort(key=lambda cycle: cycle["profit"], reverse=True)
+        return results
+
+
+def _rotate_to_chaos(cycle_edges: List[int], sources: np.ndarray) -> List[int]:
+    """循環從混沌石（節點 0）開始，不經過混沌石時從編號最小的節點開始"""
+    nodes = [int(sources[edge]) for edge in cycle_edges]
+    start = nodes.index(min(nodes))
+    return cycle_edges[start:] + cycle_edges[:start]
+
+
+def format_cycle(cycle: Dict) -> str:
+    """將循環格式化為 "Chaos Orb -> A (x1.2) -> Chaos Orb (x0.9)，報酬 +3.21%" """
+    steps = [cycle["path"][0]] + [f"{name} (x{rate:.4g})" for name, rate in zip(cycle["path"][1:], cycle["rates"])]
+    return f"{' -> '.join(steps)}，報酬 {cycle['profit'] * 100:+.2f}%"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .item_store import open_item_store
+    from .ninja_client import DEFAULT_LEAGUE, NinjaClient
+
+    # 以 poe.ninja 價格（或快取）與已保存的物品尋找套利循環
+    parser = argparse.ArgumentParser(description="尋找多步交換的套利循環")
+    parser.add_argument("--league", default=DEFAULT_LEAGUE)
+    parser.add_argument("--offline", action="store_true", help="只使用快取的 poe.ninja 資料")
+    parser.add_argument("--items", help="一併加入已保存的物品（.json 或 .db）")
+    parser.add_argument("--max-cycles", type=int, default=20)
+    args = parser.parse_args()
+
+    graph = ExchangeGraph()
+    with NinjaClient(args.league, offline=args.offline) as client:
+        overviews = client.fetch_all()
+    graph.add_overviews(overviews)
+    if args.items:
+        data = open_item_store(args.items).load() or {}
+        graph.fees = CoinFees.from_dict(data.get("coin_fees", {}))
+        dc_ratio = graph.chaos_values[graph.add_node(DIVINE_ORB)]
+        graph.add_items(data.get("items", []), dc_ratio if dc_ratio > 0 else data.get("dc_ratio", 1.0),
+                        data.get("item_coin_value", 0.0))
+    cycles = graph.find_cycles(args.max_cycles)
+    print(f"{len(graph)} 個節點、{graph.edge_count} 條邊，找到 {len(cycles)} 個套利循環")
+    for cycle in cycles:
+        print(format_cycle(cycle))
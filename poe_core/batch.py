@@ -0,0 +1,185 @@
+import csv
+import gzip
+import json
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, TextIO
+
+import numpy as np
+
+from .calculator import parse_fraction
+from .coin_routes import CoinFees
+from .columnar import is_columnar_path, iter_items as iter_columnar_items
+from .item_fields import DERIVED_FIELDS, ITEM_INPUTS, parse_divine_price
+from .item_journal import ItemJournal
+from .item_store import open_item_store
+from .profit_engine import SETTING_INPUTS, ProfitEngine
+
+# 預設輸出的欄位：物品名稱、價格與所有衍生欄位（與 Profit_v2 的資料相同）
+DEFAULT_FIELDS = ("item_name",) + ITEM_INPUTS + DERIVED_FIELDS
+
+# 預設的排序欄位（由大到小）
+DEFAULT_SORT = "total_profit_c_to_d"
+
+# 每批轉換與寫出的列數，輸出時不必一次把全部結果轉成 Python 值
+WRITE_CHUNK_ROWS = 10000
+
+
+def iter_input_items(path: str, settings: Dict) -> Iterator[Dict]:
+    """逐筆讀取物品（.json 快照加日誌、.db/.sqlite、.parquet/.arrow 或 .csv/.csv.gz），檔案中的設定值寫入 settings"""
+    if path.lower().endswith((".csv", ".csv.gz")):
+        yield from _iter_csv_items(path)
+        return
+    if is_columnar_path(path):
+        yield from iter_columnar_items(path, settings)
+        return
+    store = open_item_store(path)
+    if not store.exists():
+        raise FileNotFoundError(f"找不到物品資料: {path}")
+    try:
+        if isinstance(store, ItemJournal) and os.path.exists(store.journal_path):
+            # 有尚未壓縮的日誌時必須讀完快照才能重播
+            data = store.load()
+            settings.update((key, value) for key, value in data.items() if key != "items")
+            yield from data["items"]
+        else:
+            yield from store.iter_snapshot(settings)
+    finally:
+        if hasattr(store, "close"):
+            store.close()
+
+
+def _iter_csv_items(path: str) -> Iterator[Dict]:
+    """CSV 需有 item_name、receive_price、sell_price、divine_sell_price 欄（例如 Profit_v2 匯出的檔案，可為 .csv.gz）"""
+    if path.lower().endswith(".gz"):
+        f = gzip.open(path, "rt", newline="", encoding="utf-8-sig")
+    else:
+        f = open(path, "r", newline="", encoding="utf-8-sig")
+    with f:
+        reader = csv.DictReader(f)
+        missing = [field for field in ("item_name",) + ITEM_INPUTS if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV 缺少欄位: {', '.join(missing)}")
+        for line, row in enumerate(reader, start=2):
+            try:
+                yield {
+                    "item_name": row["item_name"],
+                    "receive_price": parse_fraction(row["receive_price"]),
+                    "sell_price": parse_fraction(row["sell_price"]),
+                    "divine_sell_price": row["divine_sell_price"].strip(),
+                }
+            except ValueError as e:
+                raise ValueError(f"第 {line} 列: {e}")
+
+
+class BatchColumns:
+    """讀取時只保留名稱與三個價格欄位，不保存整個物品字典"""
+
+    def __init__(self, items: Iterable[Dict]):
+        self.names: List[str] = []
+        receive_price, sell_price, divine_sell_price = [], [], []
+        for item in items:
+            self.names.append(str(item.get("item_name", "")))
+            receive_price.append(float(item["receive_price"]))
+            sell_price.append(float(item["sell_price"]))
+            divine_sell_price.append(parse_divine_price(item["divine_sell_price"]))
+        self.engine = ProfitEngine(receive_price, sell_price, divine_sell_price)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def rank(result: Dict[str, np.ndarray], sort_field: str, count: int, ascending: bool = False,
+         top: Optional[int] = None) -> np.ndarray:
+    """依欄位排序的列號（穩定排序，同值保持原順序），NaN 排在最後"""
+    if sort_field not in result:
+        raise ValueError(f"無法排序的欄位: {sort_field}")
+    values = np.broadcast_to(np.asarray(result[sort_field], dtype=np.float64), (count,))
+    order = np.argsort(values if ascending else -values, kind="stable")
+    return order if top is None else order[:top]
+
+
+def column_values(field: str, columns: BatchColumns, result: Dict[str, np.ndarray], rows: np.ndarray) -> list:
+    if field == "item_name":
+        return [columns.names[row] for row in rows.tolist()]
+    if field in ITEM_INPUTS:
+        return getattr(columns.engine, field)[rows].tolist()
+    return ProfitEngine.to_values(field, result, rows)
+
+
+def write_rows(out: TextIO, columns: BatchColumns, result: Dict[str, np.ndarray], order: np.ndarray,
+               fields: Sequence[str], output_format: str = "csv") -> int:
+    """依 order 分批寫出結果，回傳寫出的列數"""
+    writer = csv.writer(out) if output_format == "csv" else None
+    if writer is not None:
+        writer.writerow(fields)
+    for start in range(0, len(order), WRITE_CHUNK_ROWS):
+        rows = order[start:start + WRITE_CHUNK_ROWS]
+        values = [column_values(field, columns, result, rows) for field in fields]
+        if writer is not None:
+            writer.writerows(zip(*values))
+        else:
+            out.writelines(json.dumps(dict(zip(fields, row)), ensure_ascii=False) + "\n" for row in zip(*values))
+    return len(order)
+
+
+def run_batch(input_path: str, out: TextIO, overrides: Optional[Dict[str, float]] = None,
+              sort_field: str = DEFAULT_SORT, ascending: bool = False, top: Optional[int] = None,
+              fields: Sequence[str] = DEFAULT_FIELDS, output_format: str = "csv") -> Dict:
+    """讀取物品、套用設定值、以批次引擎重算並依排序寫出，回傳 {"rows", "written", "settings"}
+
+    設定值依序取自檔案、overrides（None 的項目不覆蓋）；金幣費用表取自檔案的 coin_fees。
+    """
+    unknown = [field for field in fields if field not in DEFAULT_FIELDS]
+    if unknown:
+        raise ValueError(f"未知的欄位: {', '.join(unknown)}")
+    settings = {}
+    columns = BatchColumns(iter_input_items(input_path, settings))
+    for name, value in (overrides or {}).items():
+        if value is not None:
+            settings[name] = value
+    values = [float(settings.get(name, 0.0)) for name in SETTING_INPUTS]
+    fees = CoinFees.from_dict(settings.get("coin_fees", {}))
+    result = columns.engine.compute(*values, fees)
+    order = rank(result, sort_field, len(columns), ascending, top)
+    written = write_rows(out, columns, result, order, fields, output_format)
+    return {"rows": len(columns), "written": written, "settings": dict(zip(SETTING_INPUTS, values))}
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    # 不開視窗重算整個物品檔並依利潤排序輸出，例如排程重新定價大量觀察清單
+    parser = argparse.ArgumentParser(description="批次重算物品利潤並排序輸出")
+    parser.add_argument("input", help="物品資料（.json、.db/.sqlite、.parquet/.arrow 或 .csv/.csv.gz）")
+    parser.add_argument("--dc-ratio", type=float, help="覆蓋檔案中的 DC 比率")
+    parser.add_argument("--chaos", type=float, help="覆蓋檔案中的倉庫混沌石數量")
+    parser.add_argument("--coin-value", type=float, help="覆蓋檔案中的物品金幣價值")
+    parser.add_argument("--sort", default=DEFAULT_SORT, help=f"排序欄位，預設 {DEFAULT_SORT}（由大到小）")
+    parser.add_argument("--ascending", action="store_true", help="由小到大排序")
+    parser.add_argument("--top", type=int, help="只輸出前 N 筆")
+    parser.add_argument("--fields", help="輸出的欄位（逗號分隔），預設為全部")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("--output", help="輸出檔路徑，預設寫到標準輸出")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    overrides = {"dc_ratio": args.dc_ratio, "current_chaos": args.chaos, "item_coin_value": args.coin_value}
+    fields = [field.strip() for field in args.fields.split(",")] if args.fields else DEFAULT_FIELDS
+    try:
+        if args.output:
+            with open(args.output, "w", newline="", encoding="utf-8") as out:
+                summary = run_batch(args.input, out, overrides, args.sort, args.ascending, args.top, fields,
+                                    args.format)
+        else:
+            summary = run_batch(args.input, sys.stdout, overrides, args.sort, args.ascending, args.top, fields,
+                                args.format)
+    except (ImportError, OSError, ValueError) as e:
+        print(f"錯誤: {e}", file=sys.stderr)
+        sys.exit(1)
+    # 摘要寫到標準錯誤，標準輸出只有結果，可直接接到管線
+    print(f"{summary['rows']} 筆物品，輸出 {summary['written']} 筆，"
+          f"DC {summary['settings']['dc_ratio']:g}、混沌石 {summary['settings']['current_chaos']:g}、"
+          f"金幣 {summary['settings']['item_coin_value']:g}，耗時 {(time.perf_counter() - start) * 1000:.0f} ms",
+          file=sys.stderr)
@@ -0,0 +1,230 @@
+from fractions import Fraction
+from typing import Dict
+
+from .coin_routes import BILL_FEES, DEFAULT_FEES, CoinFees
+from .item_record import Item
+from .item_fields import LOSS_TEXT
+
+# 各前端共用的單筆利潤公式。不同前端的紀錄欄位不同（例如 C買D賣 的成本是混沌石購買價格或神聖石購買價格），
+# 因此保留各自的計算函式，但都由同一組基本公式組成。
+
+
+def parse_fraction(value_str: str) -> float:
+    """將使用者輸入的數字或分數字串（例如 "1.23"、"3/4"、"1/1.11"）轉換為浮點數"""
+    value_str = value_str.strip()
+    try:
+        if '/' in value_str:
+            numerator, denominator = value_str.split('/')
+            return float(numerator) / float(denominator)
+        return float(value_str)
+    except (ValueError, ZeroDivisionError):
+        raise ValueError("請輸入有效的數字（例如: 1.23, 3/4 或 1/1.11）")
+
+
+def profit_c_to_c(receive_price: float, sell_price: float) -> float:
+    """C收C賣單個利潤"""
+    return sell_price - receive_price
+
+
+def profit_c_to_d(divine_sell_price: float, dc_ratio: float, cost: float) -> float:
+    """C買D賣單個利潤：神聖石販賣價格換算成混沌石後扣除成本"""
+    return (divine_sell_price * dc_ratio) - cost
+
+
+def purchasable(budget: float, price: float) -> int:
+    """以 budget 混沌石可購買的數量，價格無效時為 0"""
+    return int(budget // price) if price > 0 else 0
+
+
+def trade_profits(receive_price: float, sell_price: float, divine_sell_price: float, dc_ratio: float):
+    """回傳 (C收C賣利潤, C買D賣利潤)"""
+    return (profit_c_to_c(receive_price, sell_price),
+            profit_c_to_d(divine_sell_price, dc_ratio, receive_price))
+
+
+def calculate_item_totals(item: Dict, current_chaos: float, dc_ratio: float):
+    """計算單個物品的利潤、總利潤和可購買數量（Profit_Final 格式）"""
+    item['profit_c_to_c'], item['profit_c_to_d'] = trade_profits(
+        item['receive_price'], item['sell_price'], item['divine_sell_price'], dc_ratio)
+
+    # 計算可購買數量
+    item['purchasable_with_chaos'] = purchasable(current_chaos, item['receive_price'])
+
+    # 計算每 1000 混沌石可購買數量
+    item['purchasable_with_1000_chaos'] = purchasable(1000, item['receive_price'])
+
+    # 計算總利潤（取混沌石或神聖石能買的最大數量來計算）
+    item['total_profit_c_to_c'] = item['profit_c_to_c'] * item['purchasable_with_chaos']
+    item['total_profit_c_to_d'] = item['profit_c_to_d'] * item['purchasable_with_chaos']
+
+
+def build_item_totals(item_name: str, receive_price: float, sell_price: float, divine_sell_price: float,
+                      current_chaos: float, current_divine: float, dc_ratio: float) -> Dict:
+    """建立新物品紀錄，總利潤以混沌石或神聖石能買的最大數量計算（Profit_Final 新增物品）"""
+    c_to_c, c_to_d = trade_profits(receive_price, sell_price, divine_sell_price, dc_ratio)
+
+    # 可購買數量計算
+    purchasable_with_chaos = purchasable(current_chaos, receive_price)
+    purchasable_with_divine = purchasable(current_divine * dc_ratio, receive_price)
+
+    # 總利潤計算
+    max_purchasable = max(purchasable_with_chaos, purchasable_with_divine)
+    return {
+        "item_name": item_name,
+        "receive_price": receive_price,
+        "sell_price": sell_price,
+        "divine_sell_price": divine_sell_price,
+        "dc_ratio": dc_ratio,
+        "profit_c_to_c": c_to_c,
+        "profit_c_to_d": c_to_d,
+        "purchasable_with_chaos": purchasable_with_chaos,
+        "purchasable_with_divine": purchasable_with_divine,
+        "total_profit_c_to_c": c_to_c * max_purchasable if max_purchasable > 0 else 0.0,
+        "total_profit_c_to_d": c_to_d * max_purchasable if max_purchasable > 0 else 0.0
+    }
+
+
+def calculate_item_purchasable(item: Dict, current_chaos: float, current_divine: float, dc_ratio: float):
+    """計算單個物品的利潤和混沌石、神聖石各自可購買的數量（item_manager_app 格式）"""
+    item['profit_c_to_c'], item['profit_c_to_d'] = trade_profits(
+        item['receive_price'], item['sell_price'], item['divine_sell_price'], dc_ratio)
+    item['purchasable_with_chaos'] = purchasable(current_chaos, item['receive_price'])
+    item['purchasable_with_divine'] = purchasable(current_divine * dc_ratio, item['receive_price'])
+
+
+def divine_trade(receive_price: float, sell_price: float, divine_buy_price: float, divine_sell_price: float,
+                 dc_ratio: float, current_chaos: float, current_divine: float) -> Dict:
+    """以神聖石購買價格為 C買D賣 成本的計算（Profit_calculator_gui_plus 格式）"""
+    return {
+        "profit_c_to_c": profit_c_to_c(receive_price, sell_price),
+        "profit_c_to_d": profit_c_to_d(divine_sell_price, dc_ratio, divine_buy_price),
+        "purchasable_with_chaos": purchasable(current_chaos, receive_price),
+        "purchasable_with_divine": purchasable(current_divine * dc_ratio, divine_buy_price)
+    }
+
+
+def bill_trade(receive_price: float, sell_price: float, dc_ratio: float, item_coin_value: float, bill1: float,
+               current_chaos: float, current_divine: float, fees: CoinFees = BILL_FEES) -> Dict:
+    """以「1個D目前可買數量」換算 D賣價格，並計算賺取 1C 所需金幣成本（profit_calculator_gui 格式）"""
+    # 計算換D賣的等價價值
+    sell_div_num_chaos = (1 / bill1) * dc_ratio if bill1 != 0 else 0
+
+    # 各路線的單位金幣成本（收東西的金幣 + 賣出時的金幣；D換C 另計）
+    coin = fees.unit_costs(item_coin_value, sell_price, sell_div_num_chaos, dc_ratio)
+    d_to_c_coin_cost = coin["d_to_c"]  # D換C的金幣成本
+
+    prof_c_to_c = profit_c_to_c(receive_price, sell_price)
+    prof_c_to_d = sell_div_num_chaos - receive_price
+
+    # 賺取1C所需的金幣成本（C收C賣）
+    coin_cost_c_to_c = coin["c_to_c"] / prof_c_to_c if prof_c_to_c != 0 else 0
+
+    # 賺取1C所需的金幣成本（C買D賣，含D換C成本）
+    if prof_c_to_d != 0:
+        coin_cost_c_to_d = (coin["c_to_d"] + d_to_c_coin_cost) / prof_c_to_d
+    else:
+        coin_cost_c_to_d = 0
+
+    purchasable_with_chaos = purchasable(current_chaos, receive_price)
+    purchasable_with_divine = purchasable(current_divine * dc_ratio, receive_price)
+    return {
+        "sell_div_num_chaos": sell_div_num_chaos,
+        "profit_c_to_c": prof_c_to_c,
+        "profit_c_to_d": prof_c_to_d,
+        "coin_cost_c_to_c": coin_cost_c_to_c,
+        "coin_cost_c_to_d": coin_cost_c_to_d,
+        "d_to_c_coin_cost": d_to_c_coin_cost,
+        "purchasable_with_chaos": purchasable_with_chaos,
+        "purchasable_with_divine": purchasable_with_divine,
+        "total_purchasable": purchasable_with_chaos + purchasable_with_divine
+    }
+
+
+def coin_adjusted_profits(item: Dict, chaos_to_divine_ratio: float,
+                          chaos_to_coin_ratio: float = DEFAULT_FEES.coin_per_chaos) -> Dict:
+    """扣除金幣成本（折合混沌石）後的利潤，並依庫存量推薦交易通貨（profit_calculator 命令列格式）"""
+    chaos_profit = profit_c_to_c(item["chaos_buy"], item["chaos_sell"])
+    divine_profit = profit_c_to_d(item["divine_sell"], chaos_to_divine_ratio, item["chaos_buy"])
+    item_cost_in_chaos = CoinFees(coin_per_chaos=chaos_to_coin_ratio).coin_in_chaos(item["coin_value"])
+    return {
+        "chaos_profit": chaos_profit,
+        "divine_profit": divine_profit,
+        "item_cost_in_chaos": item_cost_in_chaos,
+        "final_chaos_profit": chaos_profit - item_cost_in_chaos,
+        "final_divine_profit": divine_profit - item_cost_in_chaos,
+        # 庫存量較多的一方賣出較快
+        "recommended": "D" if item["divine_sell_stock"] > item["chaos_sell_stock"] else "C"
+    }
+
+
+class ItemCalculator:
+    """單筆物品的完整利潤與金幣計算（Profit_v2 格式）；批次計算請用 ProfitEngine，結果相同"""
+
+    @staticmethod
+    def calculate_profit(item: Item, current_chaos: float, dc_ratio: float, item_coin_value: float,
+                         fees: CoinFees = DEFAULT_FEES):
+        # 缺少的衍生欄位由 Item 在讀取時補上預設值
+        route = fees.route_inputs(dc_ratio)  # 各路線的單位金幣成本
+
+        # 加上這段初始化可購買數量的邏輯
+        if 'purchasable_with_chaos' not in item or item['purchasable_with_chaos'] == 0:
+            item['purchasable_with_chaos'] = purchasable(current_chaos, item['receive_price'])
+
+        receive_price = item['receive_price']  # 購買價格 (混沌石)
+        sell_price = item['sell_price']  # 出售價格 (混沌石)
+
+        # 嘗試將「神聖石販賣價格」轉換為數字
+        try:
+            divine_sell_price = float(Fraction(str(item['divine_sell_price'])))  # 轉換為浮點數
+        except ValueError:
+            raise ValueError("請輸入有效的數字（例如: 1.23 或 3/4）")
+
+        # C收C賣利潤計算
+        item['profit_c_to_c'] = round(sell_price - receive_price, 2)
+
+        # C買D賣利潤計算
+        sell_div_num_chaos = round(divine_sell_price * dc_ratio, 2)  # 神聖石販賣價格轉混沌石價值
+        item['profit_c_to_d'] = round(sell_div_num_chaos - receive_price, 2)
+
+        # 可購買數量
+        item['purchasable_with_chaos'] = purchasable(current_chaos, receive_price)
+
+        # 計算所需C
+        item['required_chaos'] = item['purchasable_with_chaos'] * receive_price  # 所需C = 購買數量 * 購買價格
+
+        # C收C賣總利潤計算
+        item['total_profit_c_to_c'] = round(item['profit_c_to_c'] * item['purchasable_with_chaos'], 2)
+
+        # C買D賣總利潤計算
+        item['total_profit_c_to_d'] = round(item['profit_c_to_d'] * item['purchasable_with_chaos'], 2)
+
+        # C收C賣金幣計算
+        item['receive_coin'] = round(item_coin_value * item['purchasable_with_chaos'], 2)  # 購買物品的金幣消耗
+        item['sell_coin'] = round(item['purchasable_with_chaos'] * sell_price, 2)  # 出售物品的金幣收益
+        chaos_sale_coin = round(item['purchasable_with_chaos'] * sell_price * route['chaos_sale_coin_rate'], 2)
+        all_coin_c = round(item['receive_coin'] + chaos_sale_coin, 2)  # C收C賣的總金幣消耗（預設費用表不計賣出的金幣）
+        avg_coin_c = round(all_coin_c / item['total_profit_c_to_c'], 2) if item['total_profit_c_to_c'] > 0 else 0
+        item['avg_coin_c'] = avg_coin_c
+
+        # C買D賣金幣計算
+        item['sell_div_coin'] = round(item['purchasable_with_chaos'] * sell_div_num_chaos * route['divine_sale_coin_rate'], 2)  # C買D賣 販賣時的金幣消耗
+        all_coin_d = round(item['receive_coin'] + item['sell_div_coin'], 2)  # C買D賣的總金幣消耗
+        avg_coin_d = round(all_coin_d / item['profit_c_to_d'], 2) if item['profit_c_to_d'] > 0 else LOSS_TEXT
+        item['avg_coin_d'] = avg_coin_d
+
+        # 使用新邏輯來計算 avg_coin_d 和 avg_coin_d_extra
+        if item['total_profit_c_to_d'] <= 0:
+            # 當交易利潤為負數或等於 0
+            item['avg_coin_d'] = LOSS_TEXT
+            item['avg_coin_d_extra'] = LOSS_TEXT
+        else:
+            # 正常情況下計算
+            item['avg_coin_d'] = round(all_coin_d / item['total_profit_c_to_d'], 2)
+            # 字典格式的物品第一次計算時還沒有 extra_coin
+            item['avg_coin_d_extra'] = round((all_coin_d + item.get('extra_coin', 0.0)) / item['total_profit_c_to_d'], 2)
+
+        # 額外金幣成本計算 (D換C)
+        extra_coin = round(item['purchasable_with_chaos'] * route['d_to_c_coin'], 2)  # D換C 額外支付的金幣
+        item['extra_coin'] = extra_coin
+        avg_coin_d_extra = round((all_coin_d + extra_coin) / item['profit_c_to_d'], 2) if item['profit_c_to_d'] > 0 else LOSS_TEXT
+        item['avg_coin_d_extra'] = avg_coin_d_extra
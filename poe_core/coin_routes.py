@@ -0,0 +1,77 @@
+from typing import Dict
+
+# 金幣（gold）費用模型：各交易路線每單位的金幣成本都由同一張費用表計算
+#
+#   C收C賣（C → 物品 → C）：購買金幣 + 混沌石販賣金額 * chaos_sale_per_chaos
+#   C買D賣（C → 物品 → D）：購買金幣 + 神聖石販賣換算的混沌石 * divine_sale_per_chaos
+#   D換C（透過 Faustus）   ：每筆 faustus_per_trade + 每個神聖石的混沌石價值 * faustus_per_chaos
+#
+# 購買金幣即各前端輸入的「物品金幣價值」（item_coin_value / coin_value），屬於設定值而不在費用表中。
+
+# D換C 時每筆交易需支付給 Faustus 的金幣
+FAUSTUS_COIN_PER_TRADE = 25
+
+# 1 混沌石約可換得的金幣數量，用於把金幣成本折合成混沌石
+COIN_PER_CHAOS = 25
+
+# 由費用表與設定值預先算好的純量，供利潤引擎的欄位依賴圖使用
+ROUTE_INPUTS = ("chaos_sale_coin_rate", "divine_sale_coin_rate", "d_to_c_coin")
+
+
+class CoinFees:
+    """金幣費用表，不同前端的記帳方式以不同的費用表表示"""
+
+    FIELDS = ("chaos_sale_per_chaos", "divine_sale_per_chaos", "faustus_per_trade", "faustus_per_chaos",
+              "coin_per_chaos")
+
+    def __init__(self, chaos_sale_per_chaos: float = 0.0, divine_sale_per_chaos: float = 1.0,
+                 faustus_per_trade: float = FAUSTUS_COIN_PER_TRADE, faustus_per_chaos: float = 0.0,
+                 coin_per_chaos: float = COIN_PER_CHAOS):
+        self.chaos_sale_per_chaos = chaos_sale_per_chaos
+        self.divine_sale_per_chaos = divine_sale_per_chaos
+        self.faustus_per_trade = faustus_per_trade
+        self.faustus_per_chaos = faustus_per_chaos
+        self.coin_per_chaos = coin_per_chaos
+
+    def to_dict(self) -> Dict[str, float]:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CoinFees":
+        """由設定檔建立費用表，缺少的項目使用預設值，未知的項目忽略"""
+        return cls(**{field: float(data[field]) for field in cls.FIELDS if field in data})
+
+    def __eq__(self, other):
+        return isinstance(other, CoinFees) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"CoinFees({', '.join(f'{key}={value!r}' for key, value in self.to_dict().items())})"
+
+    def route_inputs(self, dc_ratio):
+        """每次設定值變動時預先計算的各路線單位金幣成本（dc_ratio 可為純量或陣列）"""
+        return {
+            "chaos_sale_coin_rate": self.chaos_sale_per_chaos,
+            "divine_sale_coin_rate": self.divine_sale_per_chaos,
+            "d_to_c_coin": self.faustus_per_trade + self.faustus_per_chaos * dc_ratio,
+        }
+
+    def unit_costs(self, item_coin_value: float, sell_price: float, sell_div_num_chaos: float,
+                   dc_ratio: float) -> Dict[str, float]:
+        """單個物品走各路線的金幣成本：{"c_to_c", "c_to_d", "d_to_c"}"""
+        return {
+            "c_to_c": item_coin_value + sell_price * self.chaos_sale_per_chaos,
+            "c_to_d": item_coin_value + sell_div_num_chaos * self.divine_sale_per_chaos,
+            "d_to_c": self.faustus_per_trade + self.faustus_per_chaos * dc_ratio,
+        }
+
+    def coin_in_chaos(self, coin: float) -> float:
+        """金幣成本折合混沌石"""
+        return coin / self.coin_per_chaos
+
+
+# Profit_v2 / ItemCalculator：C收C賣只計購買金幣，C買D賣另計神聖石販賣金額，D換C 每筆 25 金幣
+DEFAULT_FEES = CoinFees()
+
+# profit_calculator_gui：販賣金額每 1 混沌石 25 金幣，D換C 按神聖石的混沌石價值計費
+BILL_FEES = CoinFees(chaos_sale_per_chaos=FAUSTUS_COIN_PER_TRADE, divine_sale_per_chaos=FAUSTUS_COIN_PER_TRADE,
+                     faustus_per_trade=0.0, faustus_per_chaos=FAUSTUS_COIN_PER_TRADE)
@@ -0,0 +1,340 @@
+import json
+import math
+import os
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from .item_fields import DERIVED_FIELDS, ITEM_INPUTS, LOSS_FIELDS, LOSS_TEXT, parse_divine_price
+from .item_index import ITEM_ID_KEY
+from .item_record import FIELD_SET, Item
+
+# Parquet／Arrow 欄式檔：物品表、價格快照與價格歷史，欄位有固定型別，可直接以 pandas／polars 讀取。
+# pyarrow 是選用套件，只在讀寫這些檔案時才載入；沒有安裝時其餘功能不受影響。
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+
+# 壓縮方式（Parquet 與 Arrow IPC 都支援）
+COMPRESSION = "zstd"
+
+# 每批轉換的列數；讀取時逐批產生物品，寫入時逐批轉成 Arrow 陣列
+BATCH_ROWS = 65536
+
+# 結構描述中保存 JSON 值（設定值、快照資訊）的鍵
+SETTINGS_KEY = b"poe_core.settings"
+SNAPSHOT_KEY = b"poe_core.snapshot"
+KIND_KEY = b"poe_core.kind"
+
+# 檔案種類 -> 錯誤訊息中的名稱
+KIND_NAMES = {"items": "物品表", "snapshot": "價格快照", "history": "價格歷史"}
+
+# 物品字典中不在欄位表內的鍵，以 JSON 字串存在這一欄
+EXTRA_COLUMN = "extra"
+
+# 衍生欄位中的整數欄位，其餘皆為 float64
+INTEGER_FIELDS = ("purchasable_with_chaos",)
+
+
+def is_columnar_path(path: str) -> bool:
+    return path.lower().endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS)
+
+
+def _pyarrow():
+    """載入 pyarrow；沒有安裝時給出可以照做的錯誤訊息"""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("讀寫 Parquet／Arrow 檔需要安裝 pyarrow（pip install pyarrow）") from None
+    return pyarrow
+
+
+def item_schema():
+    """物品表的欄位與型別：名稱與識別碼為字串，價格與衍生欄位為 float64（購買數量為 int64）
+
+    缺少的欄位存為 null；avg_coin_d、avg_coin_d_extra 虧損時的 LOSS_TEXT 存為 NaN（正常的平均金幣不會是 NaN），
+    讀回時換回 LOSS_TEXT。
+    """
+    pa = _pyarrow()
+    fields = [pa.field(ITEM_ID_KEY, pa.string()), pa.field("item_name", pa.string())]
+    fields += [pa.field(field, pa.float64()) for field in ITEM_INPUTS]
+    fields += [pa.field(field, pa.int64() if field in INTEGER_FIELDS else pa.float64()) for field in DERIVED_FIELDS]
+    fields.append(pa.field(EXTRA_COLUMN, pa.string()))
+    return pa.schema(fields)
+
+
+# 物品表中有獨立欄位的鍵（識別碼、輸入欄位、衍生欄位）
+ITEM_COLUMNS = (ITEM_ID_KEY, "item_name") + ITEM_INPUTS + DERIVED_FIELDS
+
+# 虧損時存為 NaN 的欄位（虧損值不是數字的欄位）
+NAN_LOSS_FIELDS = frozenset(field for field, value in LOSS_FIELDS.items() if value == LOSS_TEXT)
+
+
+def _extra_of(item) -> str:
+    """物品中不在欄位表內的鍵（例如庫存量），以 JSON 字串保存；沒有時為 None"""
+    if isinstance(item, Item):
+        extra = item._extra
+    else:
+        extra = {key: value for key, value in item.items() if key not in FIELD_SET}
+    return json.dumps(extra, ensure_ascii=False) if extra else None
+
+
+def _column_value(field: str, value):
+    if field in NAN_LOSS_FIELDS and value == LOSS_TEXT:
+        return math.nan
+    if field in ITEM_INPUTS and isinstance(value, str):
+        # 舊檔中的分數字串（例如 "3/4"）轉為數字
+        return parse_divine_price(value)
+    return value
+
+
+def _items_batch(items: List, schema):
+    pa = _pyarrow()
+    arrays = []
+    for field in ITEM_COLUMNS:
+        values = [_column_value(field, item.get(field)) for item in items]
+        arrays.append(pa.array(values, type=schema.field(field).type))
+    arrays.append(pa.array([_extra_of(item) for item in items], type=pa.string()))
+    return pa.record_batch(arrays, schema=schema)
+
+
+def _batches(items: Iterable, size: int = BATCH_ROWS) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _with_metadata(schema, kind: str, values: Dict[bytes, object] = None):
+    """在結構描述中記下檔案種類與 JSON 值"""
+    metadata = {KIND_KEY: kind.encode()}
+    for key, value in (values or {}).items():
+        metadata[key] = json.dumps(value, ensure_ascii=False).encode("utf-8")
+    return schema.with_metadata(metadata)
+
+
+def _check_kind(schema, kind: str, path: str):
+    found = (schema.metadata or {}).get(KIND_KEY, b"").decode()
+    if found and found != kind:
+        raise ValueError(f"{path} 是{KIND_NAMES.get(found, found)}檔，不是{KIND_NAMES[kind]}檔")
+
+
+class _TableWriter:
+    """依副檔名寫出 Parquet 或 Arrow IPC 檔，逐批寫入；先寫到暫存檔再取代原檔"""
+
+    def __init__(self, path: str, schema):
+        pa = _pyarrow()
+        self.path = path
+        self.temp_path = path + ".tmp"
+        if path.lower().endswith(PARQUET_EXTENSIONS):
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(self.temp_path, schema, compression=COMPRESSION)
+        elif path.lower().endswith(ARROW_EXTENSIONS):
+            self.writer = pa.ipc.new_file(self.temp_path, schema,
+                                          options=pa.ipc.IpcWriteOptions(compression=COMPRESSION))
+        else:
+            raise ValueError(f"不支援的欄式檔格式: {path}（請使用 .parquet 或 .arrow）")
+
+    def write(self, batch):
+        self.writer.write_batch(batch)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.writer.close()
+        if exc_type is None:
+            os.replace(self.temp_path, self.path)
+        elif os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+def _read_schema(path: str):
+    pa = _pyarrow()
+    if path.lower().endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+        return pq.read_schema(path)
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).schema
+
+
+def _iter_batches(path: str, columns=None):
+    """逐批讀取欄式檔（Parquet 依列群組、Arrow IPC 以 memory map）"""
+    pa = _pyarrow()
+    if path.lower().endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+        yield from pq.ParquetFile(path).iter_batches(batch_size=BATCH_ROWS, columns=columns)
+    elif path.lower().endswith(ARROW_EXTENSIONS):
+        with pa.memory_map(path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index)
+                yield batch if columns is None else batch.select(columns)
+    else:
+        raise ValueError(f"不支援的欄式檔格式: {path}（請使用 .parquet 或 .arrow）")
+
+
+# ---- 物品表 ----
+
+def write_items(path: str, data: Dict):
+    """將與 JSON 檔相同結構的資料（{"items": [...], 設定值...}）寫成欄式檔，設定值存在結構描述中"""
+    settings = {key: value for key, value in data.items() if key != "items"}
+    schema = _with_metadata(item_schema(), "items", {SETTINGS_KEY: settings})
+    with _TableWriter(path, schema) as writer:
+        for batch in _batches(data.get("items", [])):
+            writer.write(_items_batch(batch, schema))
+
+
+def iter_items(path: str, settings: Dict, item_factory: Callable = dict) -> Iterator[Dict]:
+    """逐批讀取欄式檔中的物品（逐筆產生），檔案中的設定值寫入 settings"""
+    schema = _read_schema(path)
+    _check_kind(schema, "items", path)
+    settings.update(json.loads((schema.metadata or {}).get(SETTINGS_KEY, b"{}")))
+    present = [field for field in ITEM_COLUMNS if field in schema.names]
+    for batch in _iter_batches(path):
+        columns = batch.to_pydict()
+        extras = columns.get(EXTRA_COLUMN, [None] * batch.num_rows)
+        # 這一批中沒有 null 的一般欄位直接以 zip 組成字典，其餘（可能缺少或虧損的欄位）逐欄判斷
+        dense = [field for field in present
+                 if field not in NAN_LOSS_FIELDS and batch.column(batch.schema.get_field_index(field)).null_count == 0]
+        sparse = [(field, columns[field], field in NAN_LOSS_FIELDS) for field in present if field not in dense]
+        for row, values in enumerate(zip(*(columns[field] for field in dense))):
+            item = dict(zip(dense, values))
+            for field, column, loss in sparse:
+                value = column[row]
+                if value is not None:
+                    item[field] = LOSS_TEXT if loss and value != value else value
+            if extras[row] is not None:
+                item.update(json.loads(extras[row]))
+            yield item_factory(item)
+
+
+def read_items(path: str, item_factory: Callable = dict) -> Dict:
+    """讀取欄式檔，回傳與 JSON 檔相同結構的資料"""
+    data = {}
+    data["items"] = list(iter_items(path, data, item_factory))
+    return data
+
+
+# ---- 價格快照 ----
+
+def write_snapshot(path: str, snapshot):
+    """將 price_ingest.PriceSnapshot 寫成欄式檔（item_name、chaos_value 兩欄，DC 比率與時間在結構描述中）"""
+    pa = _pyarrow()
+    schema = _with_metadata(
+        pa.schema([pa.field("item_name", pa.string()), pa.field("chaos_value", pa.float64())]),
+        "snapshot", {SNAPSHOT_KEY: {"dc_ratio": snapshot.dc_ratio, "fetched_at": snapshot.fetched_at}},
+    )
+    names = list(snapshot.prices)
+    with _TableWriter(path, schema) as writer:
+        for start in range(0, len(names), BATCH_ROWS):
+            chunk = names[start:start + BATCH_ROWS]
+            writer.write(pa.record_batch([pa.array(chunk, type=pa.string()),
+                                          pa.array([snapshot.prices[name] for name in chunk], type=pa.float64())],
+                                         schema=schema))
+
+
+def read_snapshot(path: str):
+    """讀取 write_snapshot 寫出的欄式檔，回傳 PriceSnapshot"""
+    from .price_ingest import PriceSnapshot
+
+    schema = _read_schema(path)
+    _check_kind(schema, "snapshot", path)
+    info = json.loads((schema.metadata or {}).get(SNAPSHOT_KEY, b"{}"))
+    prices = {}
+    for batch in _iter_batches(path, ["item_name", "chaos_value"]):
+        columns = batch.to_pydict()
+        prices.update(zip(columns["item_name"], columns["chaos_value"]))
+    return PriceSnapshot(prices, info.get("dc_ratio"), info.get("fetched_at"))
+
+
+# ---- 價格歷史 ----
+
+def write_history(path: str, history) -> int:
+    """將 PriceHistory 的全部紀錄寫成欄式檔（物品名稱以字典編碼），回傳筆數"""
+    pa = _pyarrow()
+    from .price_history import HISTORY_FIELDS
+
+    schema = _with_metadata(pa.schema(
+        [pa.field("timestamp", pa.float64()), pa.field("item_name", pa.dictionary(pa.uint32(), pa.string()))]
+        + [pa.field(field, pa.float64()) for field in HISTORY_FIELDS]
+    ), "history")
+    names = pa.array(history.item_names(), type=pa.string())
+    count = len(history)
+    with _TableWriter(path, schema) as writer:
+        for start in range(0, count, BATCH_ROWS):
+            end = min(start + BATCH_ROWS, count)
+            indices = pa.array(history.column("item")[start:end], type=pa.uint32())
+            arrays = [pa.array(history.column("timestamp")[start:end], type=pa.float64()),
+                      pa.DictionaryArray.from_arrays(indices, names)]
+            arrays += [pa.array(history.column(field)[start:end], type=pa.float64()) for field in HISTORY_FIELDS]
+            writer.write(pa.record_batch(arrays, schema=schema))
+    return count
+
+
+def read_history(path: str, history) -> int:
+    """將欄式檔中的紀錄依時間順序附加到 PriceHistory（與最後一筆相同的價格不重複寫入），回傳寫入的筆數"""
+    from .price_history import HISTORY_FIELDS
+
+    _check_kind(_read_schema(path), "history", path)
+    written = 0
+    rows, timestamp = [], None
+    for batch in _iter_batches(path):
+        columns = batch.to_pydict()
+        prices = [columns[field] for field in HISTORY_FIELDS]
+        for index, (time_value, name) in enumerate(zip(columns["timestamp"], columns["item_name"])):
+            if time_value != timestamp and rows:
+                written += history.append(rows, timestamp)
+                rows = []
+            timestamp = time_value
+            rows.append((name, {field: values[index] for field, values in zip(HISTORY_FIELDS, prices)}))
+    if rows:
+        written += history.append(rows, timestamp)
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    # 依副檔名轉換物品檔：JSON（或 SQLite）-> Parquet／Arrow，或反過來；--history 匯出／匯入價格歷史
+    parser = argparse.ArgumentParser(description="物品資料與價格歷史的 Parquet／Arrow 轉換")
+    parser.add_argument("source", help="來源：.json、.db、.parquet、.arrow，或 --history 時的歷史目錄／欄式檔")
+    parser.add_argument("target", help="目的地，格式依副檔名決定")
+    parser.add_argument("--history", action="store_true", help="轉換價格歷史（目錄 <-> 欄式檔）")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        if args.history:
+            from .price_history import PriceHistory
+
+            if is_columnar_path(args.source):
+                count = read_history(args.source, PriceHistory(args.target))
+            else:
+                count = write_history(args.target, PriceHistory(args.source))
+        elif is_columnar_path(args.source):
+            from .item_store import open_item_store
+
+            data = read_items(args.source)
+            count = len(data["items"])
+            store = open_item_store(args.target)
+            store.compact(data)
+            if hasattr(store, "close"):
+                store.close()
+        else:
+            from .batch import iter_input_items
+
+            settings = {}
+            data = {"items": list(iter_input_items(args.source, settings))}
+            data.update(settings)
+            count = len(data["items"])
+            write_items(args.target, data)
+    except (ImportError, OSError, ValueError) as e:
+        print(f"錯誤: {e}", file=sys.stderr)
+        sys.exit(1)
+    size = f"（{os.path.getsize(args.target) / 1024:.0f} KiB）" if os.path.isfile(args.target) else ""
+    print(f"已轉換 {count} 筆到 {args.target}{size}，耗時 {(time.perf_counter() - start) * 1000:.0f} ms")
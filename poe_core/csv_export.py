@@ -0,0 +1,114 @@
+import csv
+import gzip
+import itertools
+import operator
+from typing import Dict, Iterable, Iterator, List, Sequence, TextIO
+
+from .item_fields import DERIVED_FIELDS, ITEM_INPUTS
+from .item_record import DERIVED_DEFAULTS, Item
+
+# 可匯出的欄位登錄表：欄位名稱 -> 物品缺少該欄位時寫入的值（涵蓋所有輸入與衍生欄位）
+EXPORT_COLUMNS: Dict[str, object] = dict(
+    {"item_name": ""},
+    **{field: 0.0 for field in ITEM_INPUTS},
+    **{field: DERIVED_DEFAULTS[field] for field in DERIVED_FIELDS},
+)
+
+# 預設匯出全部欄位，順序與登錄表相同
+DEFAULT_COLUMNS = tuple(EXPORT_COLUMNS)
+
+# 每次交給 csv.writer.writerows 的列數；只有這一批資料會同時轉成列，記憶體用量與總筆數無關
+CHUNK_ROWS = 5000
+
+
+def is_gzip_path(path: str) -> bool:
+    return path.lower().endswith(".gz")
+
+
+def open_export(path: str, compress: bool = None) -> TextIO:
+    """開啟匯出檔；檔名以 .gz 結尾（或 compress=True）時以 gzip 壓縮寫入"""
+    if compress is None:
+        compress = is_gzip_path(path)
+    # utf-8-sig 讓 Excel 正確辨識中文
+    if compress:
+        return gzip.open(path, "wt", newline="", encoding="utf-8-sig", compresslevel=6)
+    return open(path, "w", newline="", encoding="utf-8-sig")
+
+
+def check_columns(columns: Sequence[str]):
+    unknown = [column for column in columns if column not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"未知的欄位: {', '.join(unknown)}")
+
+
+def iter_rows(items: Iterable, columns: Sequence[str] = DEFAULT_COLUMNS) -> Iterator[tuple]:
+    """逐筆產生要寫出的列（物品字典或 Item 紀錄皆可）"""
+    fields = [(column, EXPORT_COLUMNS[column]) for column in columns]
+    # Item 紀錄以 attrgetter 一次取出所有欄位（未設定的衍生欄位由 Item 補上預設值），
+    # 字典以 itemgetter；缺少欄位時才逐欄以 get 補上預設值
+    by_attribute = operator.attrgetter(*columns)
+    by_key = operator.itemgetter(*columns)
+    single = len(columns) == 1
+    for item in items:
+        try:
+            row = by_attribute(item) if isinstance(item, Item) else by_key(item)
+        except (AttributeError, KeyError):
+            get = item.get
+            yield tuple([get(column, default) for column, default in fields])
+            continue
+        yield (row,) if single else row
+
+
+def iter_chunks(rows: Iterable[tuple], size: int = CHUNK_ROWS) -> Iterator[List[tuple]]:
+    """將列分成固定大小的批次"""
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_csv(out: TextIO, items: Iterable, columns: Sequence[str] = DEFAULT_COLUMNS,
+              chunk_rows: int = CHUNK_ROWS) -> int:
+    """將物品分批寫成 CSV（第一列為欄位名稱），回傳寫出的筆數；items 可以是產生器"""
+    check_columns(columns)
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    count = 0
+    for chunk in iter_chunks(iter_rows(items, columns), chunk_rows):
+        writer.writerows(chunk)
+        count += len(chunk)
+    return count
+
+
+def export_csv(path: str, items: Iterable, columns: Sequence[str] = DEFAULT_COLUMNS, compress: bool = None) -> int:
+    """將物品匯出到 CSV 檔（.csv.gz 時壓縮），回傳寫出的筆數"""
+    check_columns(columns)
+    with open_export(path, compress) as out:
+        return write_csv(out, items, columns)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    from .batch import iter_input_items
+
+    # 直接從資料檔串流匯出（不必先把全部物品讀進記憶體），例如：
+    #   python -m poe_core.csv_export items_data_v2.json items.csv.gz --columns item_name,total_profit_c_to_d
+    parser = argparse.ArgumentParser(description="將物品資料匯出為 CSV（可 gzip 壓縮）")
+    parser.add_argument("input", help="物品資料（.json、.db/.sqlite、.parquet/.arrow 或 .csv/.csv.gz）")
+    parser.add_argument("output", help="輸出的 CSV 檔，以 .gz 結尾時壓縮")
+    parser.add_argument("--columns", help=f"匯出的欄位（逗號分隔），可用: {', '.join(DEFAULT_COLUMNS)}")
+    args = parser.parse_args()
+
+    columns = [column.strip() for column in args.columns.split(",")] if args.columns else DEFAULT_COLUMNS
+    start = time.perf_counter()
+    try:
+        count = export_csv(args.output, iter_input_items(args.input, {}), columns)
+    except (ImportError, OSError, ValueError) as e:
+        print(f"錯誤: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"已匯出 {count} 筆到 {args.output}，耗時 {(time.perf_counter() - start) * 1000:.0f} ms")
@@ -0,0 +1,38 @@
+from fractions import Fraction
+
+# 物品欄位與價格解析：不依賴 numpy，只用到儲存與單筆計算的前端可以不載入 numpy
+
+# 虧損時平均金幣欄位顯示的文字（與 ItemCalculator 一致）
+LOSS_TEXT = "無法計算（虧損）"
+
+# 由引擎計算並寫回物品字典的衍生欄位
+DERIVED_FIELDS = (
+    "profit_c_to_c", "profit_c_to_d", "purchasable_with_chaos", "required_chaos",
+    "total_profit_c_to_c", "total_profit_c_to_d", "receive_coin", "sell_coin",
+    "avg_coin_c", "sell_div_coin", "avg_coin_d", "extra_coin", "avg_coin_d_extra"
+)
+
+# 可能虧損的欄位與虧損時寫入的值（avg_coin_c 為 0，其餘為 LOSS_TEXT）
+LOSS_FIELDS = {
+    "avg_coin_c": 0,
+    "avg_coin_d": LOSS_TEXT,
+    "avg_coin_d_extra": LOSS_TEXT,
+}
+
+
+# 設定值（全部物品共用的純量）
+SETTING_INPUTS = ("current_chaos", "dc_ratio", "item_coin_value")
+
+# 每個物品各自的輸入欄位
+ITEM_INPUTS = ("receive_price", "sell_price", "divine_sell_price")
+
+
+def parse_divine_price(value) -> float:
+    """將神聖石販賣價格（數字或 "3/4" 之類的分數字串）轉換為浮點數"""
+    # 數字直接轉換即可，結果與 Fraction(str(value)) 相同，且省去字串解析
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    try:
+        return float(Fraction(str(value)))
+    except ValueError:
+        raise ValueError("請輸入有效的數字（例如: 1.23 或 3/4）")
@@ -0,0 +1,75 @@
+import uuid
+from typing import Dict, List, Optional
+
+# 每個物品保存在 JSON 中的唯一識別碼欄位
+ITEM_ID_KEY = "item_id"
+
+
+def new_item_id() -> str:
+    """產生新的物品唯一識別碼"""
+    return uuid.uuid4().hex
+
+
+def item_key(item: Dict) -> str:
+    """取得物品的唯一識別碼（供 TreeviewReconciler 作為列的 key）"""
+    return item[ITEM_ID_KEY]
+
+
+class ItemIndex:
+    """item_id -> 物品、item_id -> 列表位置 的雜湊索引，新增、修改、刪除時保持與物品列表同步"""
+
+    def __init__(self, items: List[Dict]):
+        self.items = items
+        self.by_id: Dict[str, Dict] = {}
+        self.positions: Dict[str, int] = {}
+        self.rebuild(items)
+
+    def rebuild(self, items: Optional[List[Dict]] = None) -> int:
+        """重建索引（載入或排序後使用），缺少或重複的識別碼會重新產生，回傳新產生的數量"""
+        if items is not None:
+            self.items = items
+        self.by_id.clear()
+        self.positions.clear()
+        assigned = 0
+        for position, item in enumerate(self.items):
+            item_id = item.get(ITEM_ID_KEY)
+            if not item_id or item_id in self.by_id:
+                item_id = item[ITEM_ID_KEY] = new_item_id()
+                assigned += 1
+            self.by_id[item_id] = item
+            self.positions[item_id] = position
+        return assigned
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.by_id
+
+    def get(self, item_id: str) -> Dict:
+        return self.by_id[item_id]
+
+    def position(self, item_id: str) -> int:
+        """物品在列表中的位置"""
+        return self.positions[item_id]
+
+    def add(self, item: Dict) -> str:
+        """登記已附加到列表尾端的物品，回傳其識別碼"""
+        item_id = item.get(ITEM_ID_KEY)
+        if not item_id or item_id in self.by_id:
+            item_id = item[ITEM_ID_KEY] = new_item_id()
+        self.by_id[item_id] = item
+        self.positions[item_id] = len(self.by_id) - 1
+        return item_id
+
+    def remove(self, item_id: str) -> int:
+        """登記已從列表移除的物品，回傳其原本的位置；之後的物品位置往前移一格
+
+        刪除仍是 O(n)（與呼叫端的 list.pop / del 相同）：列表保持使用者看到的順序，
+        因此不採用與尾端交換的刪除方式；一次只刪除一筆，成本由 del 主導。
+        """
+        position = self.positions.pop(item_id)
+        del self.by_id[item_id]
+        for following_position, following in enumerate(self.items[position:], position):
+            self.positions[following[ITEM_ID_KEY]] = following_position
+        return position
@@ -0,0 +1,132 @@
+import json
+import os
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .item_index import ITEM_ID_KEY
+from .item_loader import iter_json_items, json_default, write_json
+
+# 日誌紀錄的操作類型
+OP_ADD = "add"  # 新增（或整筆取代）物品：{"op": "add", "item": {...}}
+OP_EDIT = "edit"  # 修改物品欄位：{"op": "edit", "item_id": ..., "fields": {...}}
+OP_DELETE = "delete"  # 刪除物品：{"op": "delete", "item_id": ...}
+OP_SETTINGS = "settings"  # 修改頂層設定值：{"op": "settings", "values": {...}}
+
+
+class ItemJournal:
+    """只附加的變更日誌：每次修改寫一行精簡紀錄，累積到一定數量後壓縮成完整快照
+
+    快照就是原本的 items_data*.json（格式不變），日誌是同名加上 .journal 的 JSON Lines 檔。
+    所有操作都是冪等的，因此快照寫入後、日誌清空前當機，重播也不會出錯。
+    """
+
+    def __init__(self, snapshot_path: str, compact_every: int = 500):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        self.compact_every = compact_every
+        self.pending = 0  # 尚未壓縮進快照的紀錄數量
+        self.last_settings: Optional[Dict] = None  # 最後寫入的設定值，未變動時不重複記錄
+        self.settings_replayed = False  # 上次載入時是否重播了設定值紀錄（物品的衍生欄位需要依新設定值重算）
+
+    def exists(self) -> bool:
+        return os.path.exists(self.snapshot_path) or os.path.exists(self.journal_path)
+
+    def load(self, item_factory: Callable = dict) -> Optional[Dict]:
+        """讀取快照並依序重播日誌，回傳與原本 JSON 相同結構的資料；兩個檔案都不存在時回傳 None"""
+        if not self.exists():
+            return None
+        data = {}
+        data["items"] = list(self.iter_snapshot(data, item_factory))
+        return self.replay(data, item_factory)
+
+    def iter_snapshot(self, data: Dict, item_factory: Callable = dict) -> Iterator[Dict]:
+        """串流讀取快照中的物品（逐筆產生），快照中的設定值寫入 data"""
+        if os.path.exists(self.snapshot_path):
+            yield from iter_json_items(self.snapshot_path, data, item_factory)
+
+    def replay(self, data: Dict, item_factory: Callable = dict) -> Dict:
+        """在已讀完快照的 data["items"] 上依序重播日誌"""
+        self.pending = 0
+        self.settings_replayed = False
+        if os.path.exists(self.journal_path):
+            items = data.setdefault("items", [])
+            by_id = {item[ITEM_ID_KEY]: item for item in items if ITEM_ID_KEY in item}
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 最後一行可能因當機而不完整，略過即可
+                        continue
+                    self._replay(record, data, items, by_id, item_factory)
+                    self.settings_replayed |= record.get("op") == OP_SETTINGS
+                    self.pending += 1
+            # 只保留目前仍對應到識別碼的物品（已刪除或被取代的會被濾掉，沒有識別碼的舊資料保留）
+            data["items"] = [item for item in items if ITEM_ID_KEY not in item or by_id.get(item[ITEM_ID_KEY]) is item]
+        self.last_settings = {key: value for key, value in data.items() if key != "items"}
+        return data
+
+    @staticmethod
+    def _replay(record: Dict, data: Dict, items: list, by_id: Dict[str, Dict], item_factory: Callable = dict):
+        op = record.get("op")
+        if op == OP_ADD:
+            item = record["item"]
+            existing = by_id.get(item[ITEM_ID_KEY])
+            if existing is not None:
+                existing.clear()
+                existing.update(item)
+            else:
+                item = item_factory(item)
+                items.append(item)
+                by_id[item[ITEM_ID_KEY]] = item
+        elif op == OP_EDIT:
+            item = by_id.get(record["item_id"])
+            if item is not None:
+                item.update(record["fields"])
+        elif op == OP_DELETE:
+            by_id.pop(record["item_id"], None)
+        elif op == OP_SETTINGS:
+            data.update(record["values"])
+
+    def append(self, op: str, **payload):
+        """附加一筆精簡紀錄到日誌"""
+        self.append_many([(op, payload)])
+
+    def append_many(self, changes: Iterable[Tuple[str, Dict]]):
+        """以一次寫入附加多筆 (op, payload) 紀錄"""
+        lines = []
+        for op, payload in changes:
+            record = {"op": op}
+            record.update(payload)
+            lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=json_default) + "\n")
+        if not lines:
+            return
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+        self.pending += len(lines)
+
+    def record_add(self, item: Dict):
+        self.append(OP_ADD, item=item)
+
+    def record_edit(self, item_id: str, **fields):
+        self.append(OP_EDIT, item_id=item_id, fields=fields)
+
+    def record_delete(self, item_id: str):
+        self.append(OP_DELETE, item_id=item_id)
+
+    def record_settings(self, **values):
+        """記錄設定值，與上次記錄相同時略過"""
+        if self.last_settings is not None and all(self.last_settings.get(key) == value for key, value in values.items()):
+            return
+        self.append(OP_SETTINGS, values=values)
+        self.last_settings = dict(self.last_settings or {}, **values)
+
+    def needs_compaction(self) -> bool:
+        return self.pending >= self.compact_every
+
+    def compact(self, data: Dict):
+        """寫入完整快照並清空日誌"""
+        write_json(self.snapshot_path, data)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.pending = 0
+        self.last_settings = {key: value for key, value in data.items() if key != "items"}
@@ -0,0 +1,134 @@
+import json
+import os
+import re
+from typing import Callable, Dict, Iterator
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+NUMBER_END = re.compile(r"[,\]}\s]")  # 數字之後必定出現的字元
+
+
+def json_default(obj):
+    """json.dump 的 default：物品紀錄（如 item_record.Item）以 to_dict() 輸出"""
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"無法轉為 JSON: {type(obj).__name__}")
+    return to_dict()
+
+
+def read_json(path: str):
+    """一次讀取整個 JSON 檔（小型資料檔使用；大型物品檔請用 iter_json_items）"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(path: str, data):
+    """以與各前端相同的格式（縮排 4、保留中文）寫入 JSON 檔
+
+    先寫入同目錄的暫存檔再以 os.replace 取代，寫到一半當機時原本的檔案仍然完整。
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4, default=json_default)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class _ChunkReader:
+    """以固定大小分塊讀取文字檔，提供 raw_decode 所需的緩衝區"""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """讀入下一塊，已到檔尾時回傳 False"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """略過空白並回傳下一個字元，檔尾時回傳空字串"""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"預期 {char!r}，實際為 {found!r}", self.buffer, self.pos)
+        self.pos += 1
+
+    def decode(self, decoder: json.JSONDecoder):
+        """解析下一個完整的 JSON 值；值被分塊截斷時讀入更多資料後重試"""
+        if self.peek() in "-0123456789":
+            # 數字沒有結尾符號，被分塊截斷時仍能解析成功，需先確認緩衝區內已有數字之後的字元
+            while not NUMBER_END.search(self.buffer, self.pos) and self.fill():
+                pass
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            self.pos = end
+            return value
+
+
+def iter_json_items(path: str, settings: Dict, item_factory: Callable = dict,
+                    chunk_size: int = 1 << 16) -> Iterator[Dict]:
+    """串流解析 items_data*.json，逐筆產生物品，不必等整個檔案解析完
+
+    支援 {"items": [...], 其他設定值} 與舊版的純物品列表兩種格式；
+    設定值在讀到時寫入 settings（新版快照把設定值放在物品之前，第一筆物品產生時即可使用）。
+    """
+    value_decoder = json.JSONDecoder()
+    item_decoder = json.JSONDecoder(object_pairs_hook=item_factory)
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _ChunkReader(f, chunk_size)
+        first = reader.peek()
+        if first == "[":
+            yield from _iter_array(reader, item_decoder)
+            return
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.decode(value_decoder)
+            reader.expect(":")
+            if key == "items":
+                yield from _iter_array(reader, item_decoder)
+            else:
+                settings[key] = reader.decode(value_decoder)
+            if reader.peek() == ",":
+                reader.pos += 1
+                continue
+            reader.expect("}")
+            return
+
+
+def _iter_array(reader: _ChunkReader, decoder: json.JSONDecoder) -> Iterator[Dict]:
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.decode(decoder)
+        if reader.peek() == ",":
+            reader.pos += 1
+            continue
+        reader.expect("]")
+        return
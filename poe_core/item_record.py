@@ -0,0 +1,169 @@
+import itertools
+from typing import Dict, Iterator
+
+from .item_index import ITEM_ID_KEY
+from .item_fields import DERIVED_FIELDS, ITEM_INPUTS
+
+# 使用者輸入的欄位
+INPUT_FIELDS = ("item_name",) + ITEM_INPUTS
+
+# 由 ProfitEngine 計算的欄位在舊檔中可能不存在，讀取時才補上預設值
+DERIVED_DEFAULTS = {
+    'profit_c_to_c': 0.0,
+    'profit_c_to_d': 0.0,
+    'purchasable_with_chaos': 0,
+    'required_chaos': 0.0,
+    'total_profit_c_to_c': 0.0,
+    'total_profit_c_to_d': 0.0,
+    'receive_coin': 0.0,
+    'sell_coin': 0.0,
+    'avg_coin_c': 0.0,
+    'sell_div_coin': 0.0,
+    'avg_coin_d': 0.0,
+    'extra_coin': 0.0,
+    'avg_coin_d_extra': 0.0,
+}
+
+ITEM_FIELDS = (ITEM_ID_KEY,) + INPUT_FIELDS + DERIVED_FIELDS
+FIELD_SET = frozenset(ITEM_FIELDS)
+
+
+class Item:
+    """以 __slots__ 保存的物品紀錄：欄位固定（識別碼、輸入欄位、衍生欄位），記憶體遠小於字典
+
+    同時支援 item.receive_price 與 item['receive_price'] 兩種存取方式，其餘模組不需修改。
+    尚未設定的衍生欄位讀取時回傳預設值但不寫入，保存時只輸出已設定的欄位；
+    舊檔中不在欄位表內的鍵保存在 _extra，JSON 讀寫前後內容不變。
+    """
+
+    __slots__ = ITEM_FIELDS + ("_extra",)
+
+    def __init__(self, data=(), **fields):
+        self._extra = None
+        self.update(data, **fields)
+
+    def __getattr__(self, name):
+        # 只有在欄位尚未設定時才會呼叫
+        if name in DERIVED_DEFAULTS:
+            return DERIVED_DEFAULTS[name]
+        raise AttributeError(name)
+
+    def __getitem__(self, key):
+        if key in FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        if key in FIELD_SET:
+            return _is_set(self, key)
+        return self._extra is not None and key in self._extra
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __len__(self) -> int:
+        return len(self.to_dict())
+
+    def items(self):
+        return self.to_dict().items()
+
+    def values(self):
+        return self.to_dict().values()
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return DERIVED_DEFAULTS.get(key, default)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, data=(), **fields):
+        pairs = data.items() if hasattr(data, "items") else data
+        for key, value in itertools.chain(pairs, fields.items()):
+            # 載入時每筆物品都會經過這裡，已知欄位直接 setattr，省去 __setitem__ 的呼叫
+            if key in FIELD_SET:
+                setattr(self, key, value)
+            else:
+                self[key] = value
+
+    def clear(self):
+        for field in ITEM_FIELDS:
+            if _is_set(self, field):
+                delattr(self, field)
+        self._extra = None
+
+    def to_dict(self) -> Dict:
+        """轉為可寫入 JSON 的字典（只包含已設定的欄位）"""
+        data = {}
+        for field, get in SLOT_GETTERS:
+            try:
+                data[field] = get(self)
+            except AttributeError:
+                pass
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def __getstate__(self) -> Dict:
+        # 預設的 __getstate__ 會透過 getattr 取得延遲預設值，改為只保存已設定的欄位
+        return self.to_dict()
+
+    def __setstate__(self, state: Dict):
+        self._extra = None
+        self.update(state)
+
+    def __eq__(self, other):
+        if isinstance(other, Item):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Item({self.to_dict()!r})"
+
+
+# 直接讀取 slot（不經過 __getattr__ 的延遲預設值）
+SLOT_GETTERS = tuple((field, getattr(Item, field).__get__) for field in ITEM_FIELDS)
+
+
+def _is_set(item: Item, field: str) -> bool:
+    """欄位是否已設定（不含延遲補上的預設值）"""
+    try:
+        object.__getattribute__(item, field)
+    except AttributeError:
+        return False
+    return True
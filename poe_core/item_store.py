@@ -0,0 +1,329 @@
+import json
+import os
+import sqlite3
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .item_index import ITEM_ID_KEY, new_item_id
+from .item_journal import ItemJournal, OP_ADD, OP_EDIT, OP_DELETE, OP_SETTINGS
+from .item_loader import json_default
+
+# 副檔名為以下其中之一時改用 SQLite 儲存
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# 可排序查詢（有索引）的欄位
+INDEXED_COLUMNS = ("item_name", "total_profit_c_to_c", "total_profit_c_to_d")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    item_name TEXT NOT NULL DEFAULT '',
+    total_profit_c_to_c REAL,
+    total_profit_c_to_d REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_items_position ON items(position);
+CREATE INDEX IF NOT EXISTS idx_items_item_name ON items(item_name);
+CREATE INDEX IF NOT EXISTS idx_items_total_profit_c_to_c ON items(total_profit_c_to_c);
+CREATE INDEX IF NOT EXISTS idx_items_total_profit_c_to_d ON items(total_profit_c_to_d);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# meta 表中的旗標：整批寫入物品後設定值又被修改過，物品的衍生欄位需要依新設定值重算
+SETTINGS_CHANGED_KEY = "settings_changed"
+
+# trigram 分詞支援子字串搜尋（包含中文名稱），舊版 SQLite 不支援時改用 LIKE
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(item_name, content='items', content_rowid='rowid', tokenize='trigram');
+"""
+
+# 逐筆變更時由觸發器同步全文索引；整批取代時先移除觸發器，寫入後一次重建
+FTS_TRIGGERS = ("items_fts_insert", "items_fts_delete", "items_fts_update")
+FTS_TRIGGER_STATEMENTS = (
+    """CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, item_name) VALUES (new.rowid, new.item_name);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, item_name) VALUES ('delete', old.rowid, old.item_name);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF item_name ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, item_name) VALUES ('delete', old.rowid, old.item_name);
+        INSERT INTO items_fts(rowid, item_name) VALUES (new.rowid, new.item_name);
+    END;""",
+)
+FTS_TRIGGER_SCHEMA = "\n".join(FTS_TRIGGER_STATEMENTS)
+
+FTS_MIN_KEYWORD = 3  # trigram 至少需要 3 個字元
+
+
+def item_name_of(item: Dict) -> str:
+    """物品名稱（profit_calculator.py 的物品使用 name 欄位）"""
+    return str(item.get("item_name", item.get("name", "")))
+
+
+def is_sqlite_path(path: str) -> bool:
+    return path.lower().endswith(SQLITE_SUFFIXES)
+
+
+def open_item_store(path: str):
+    """依檔名選擇儲存後端：.db/.sqlite 使用 SQLiteItemStore，其餘使用 JSON 快照加變更日誌"""
+    if is_sqlite_path(path):
+        return SQLiteItemStore(path)
+    return ItemJournal(path)
+
+
+class SQLiteItemStore:
+    """SQLite 物品儲存：每個變更是一筆小交易，搜尋與排序查詢走索引，不需要把全部物品載入記憶體
+
+    介面與 ItemJournal 相同（load、append、record_settings、compact…），可直接替換應用程式的儲存後端。
+    物品的完整內容以 JSON 保存在 data 欄，名稱與總利潤另存為有索引的欄位。
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.pending = 0  # 介面相容：每筆變更都直接寫入，不需要壓縮
+        self.last_settings: Optional[Dict] = None
+        self.settings_replayed = False  # 與 ItemJournal 相同：載入的設定值比物品的衍生欄位新
+        self.connection: Optional[sqlite3.Connection] = None
+        self.has_fts = False
+
+    def exists(self) -> bool:
+        return os.path.exists(self.db_path)
+
+    def connect(self) -> sqlite3.Connection:
+        """開啟資料庫並建立資料表與索引"""
+        if self.connection is None:
+            # 前端在主執行緒載入、在背景執行緒寫入；同一時間只有一個執行緒使用連線，因此允許跨執行緒
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection.executescript(SCHEMA)
+            try:
+                self.connection.executescript(FTS_SCHEMA + FTS_TRIGGER_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                self.has_fts = False
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    @staticmethod
+    def _row(item: Dict, position: int) -> tuple:
+        return (
+            item[ITEM_ID_KEY],
+            position,
+            item_name_of(item),
+            item.get("total_profit_c_to_c"),
+            item.get("total_profit_c_to_d"),
+            json.dumps(item, ensure_ascii=False, default=json_default),
+        )
+
+    def _next_position(self) -> int:
+        (position,) = self.connect().execute("SELECT COALESCE(MAX(position), -1) + 1 FROM items").fetchone()
+        return position
+
+    # ---- 設定值 ----
+
+    def load_settings(self) -> Dict:
+        rows = self.connect().execute("SELECT key, value FROM settings").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_settings(self, **values):
+        with self.connect() as connection:
+            self._write_settings(connection, values)
+            connection.execute(
+                "INSERT INTO meta(key, value) VALUES (?, '1') ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (SETTINGS_CHANGED_KEY,),
+            )
+        self.last_settings = dict(self.last_settings or {}, **values)
+
+    @staticmethod
+    def _write_settings(connection: sqlite3.Connection, values: Dict):
+        connection.executemany(
+            "INSERT INTO settings(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            [(key, json.dumps(value)) for key, value in values.items()],
+        )
+
+    def record_settings(self, **values):
+        """記錄設定值，與上次記錄相同時略過"""
+        if self.last_settings is not None and all(self.last_settings.get(key) == value for key, value in values.items()):
+            return
+        self.set_settings(**values)
+
+    # ---- 物品 ----
+
+    def count(self) -> int:
+        (count,) = self.connect().execute("SELECT COUNT(*) FROM items").fetchone()
+        return count
+
+    def get_item(self, item_id: str) -> Optional[Dict]:
+        row = self.connect().execute("SELECT data FROM items WHERE item_id = ?", (item_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_items(self, batch_size: int = 1000, item_factory: Callable = dict) -> Iterator[Dict]:
+        """依列表順序分批讀取物品"""
+        decoder = json.JSONDecoder(object_pairs_hook=item_factory)
+        cursor = self.connect().execute("SELECT data FROM items ORDER BY position")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for (data,) in rows:
+                yield decoder.decode(data)
+
+    def upsert_item(self, item: Dict) -> str:
+        """新增物品，或以相同識別碼整筆取代（保留原本位置）"""
+        if not item.get(ITEM_ID_KEY):
+            item[ITEM_ID_KEY] = new_item_id()
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT INTO items(item_id, position, item_name, total_profit_c_to_c, total_profit_c_to_d, data) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(item_id) DO UPDATE SET "
+                "item_name = excluded.item_name, total_profit_c_to_c = excluded.total_profit_c_to_c, "
+                "total_profit_c_to_d = excluded.total_profit_c_to_d, data = excluded.data",
+                self._row(item, self._next_position()),
+            )
+        return item[ITEM_ID_KEY]
+
+    def update_item(self, item_id: str, **fields) -> bool:
+        """只修改物品的部分欄位，找不到物品時回傳 False"""
+        item = self.get_item(item_id)
+        if item is None:
+            return False
+        item.update(fields)
+        self.upsert_item(item)
+        return True
+
+    def delete_item(self, item_id: str):
+        with self.connect() as connection:
+            connection.execute("DELETE FROM items WHERE item_id = ?", (item_id,))
+
+    def search(self, keyword: str, limit: Optional[int] = None) -> List[Dict]:
+        """名稱包含關鍵字（不分大小寫）的物品；關鍵字夠長時使用全文索引，否則使用 LIKE"""
+        connection = self.connect()
+        if self.has_fts and len(keyword) >= FTS_MIN_KEYWORD:
+            query = ("SELECT items.data FROM items_fts JOIN items ON items.rowid = items_fts.rowid "
+                     "WHERE items_fts MATCH ? ORDER BY items.position")
+            parameters = ['"' + keyword.replace('"', '""') + '"']
+        else:
+            escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query = "SELECT data FROM items WHERE item_name LIKE ? ESCAPE '\\' ORDER BY position"
+            parameters = [f"%{escaped}%"]
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(int(limit))
+        return [json.loads(data) for (data,) in connection.execute(query, parameters)]
+
+    def top_items(self, column: str = "total_profit_c_to_c", limit: int = 20, descending: bool = True) -> List[Dict]:
+        """依有索引的欄位排序取前幾筆"""
+        if column not in INDEXED_COLUMNS:
+            raise KeyError(f"欄位沒有索引: {column}")
+        order = "DESC" if descending else "ASC"
+        rows = self.connect().execute(
+            f"SELECT data FROM items WHERE {column} IS NOT NULL ORDER BY {column} {order} LIMIT ?", (int(limit),)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    # ---- 與 ItemJournal 相同的介面 ----
+
+    def load(self, item_factory: Callable = dict) -> Optional[Dict]:
+        """讀取全部物品與設定值，回傳與 JSON 檔相同結構的資料；資料庫不存在時回傳 None"""
+        if not self.exists():
+            return None
+        data = {}
+        data["items"] = list(self.iter_snapshot(data, item_factory))
+        return self.replay(data, item_factory)
+
+    def iter_snapshot(self, data: Dict, item_factory: Callable = dict) -> Iterator[Dict]:
+        """先讀設定值寫入 data，再依序逐批產生物品"""
+        data.update(self.load_settings())
+        yield from self.iter_items(item_factory=item_factory)
+
+    def replay(self, data: Dict, item_factory: Callable = dict) -> Dict:
+        """資料庫沒有待重播的日誌，只記下目前的設定值與設定值是否在整批寫入物品後被修改過"""
+        row = self.connect().execute("SELECT value FROM meta WHERE key = ?", (SETTINGS_CHANGED_KEY,)).fetchone()
+        self.settings_replayed = row is not None
+        self.last_settings = {key: value for key, value in data.items() if key != "items"}
+        return data
+
+    def append(self, op: str, **payload):
+        """直接套用一筆變更（與日誌紀錄格式相同）"""
+        if op == OP_ADD:
+            self.upsert_item(payload["item"])
+        elif op == OP_EDIT:
+            self.update_item(payload["item_id"], **payload["fields"])
+        elif op == OP_DELETE:
+            self.delete_item(payload["item_id"])
+        elif op == OP_SETTINGS:
+            self.set_settings(**payload["values"])
+
+    def append_many(self, changes: Iterable[Tuple[str, Dict]]):
+        """依序套用多筆 (op, payload) 變更"""
+        for op, payload in changes:
+            self.append(op, **payload)
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def compact(self, data: Dict):
+        """以完整資料取代資料庫內容（單一交易）"""
+        for item in data.get("items", []):
+            if not item.get(ITEM_ID_KEY):
+                item[ITEM_ID_KEY] = new_item_id()
+        connection = self.connect()
+        with connection:
+            # 觸發器的移除與重建也在同一個交易中，寫入失敗時一併回復
+            connection.execute("BEGIN")
+            if self.has_fts:
+                for trigger in FTS_TRIGGERS:
+                    connection.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            connection.execute("DELETE FROM items")
+            connection.executemany(
+                "INSERT INTO items(item_id, position, item_name, total_profit_c_to_c, total_profit_c_to_d, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self._row(item, position) for position, item in enumerate(data.get("items", []))),
+            )
+            if self.has_fts:
+                connection.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+            settings = {key: value for key, value in data.items() if key != "items"}
+            self._write_settings(connection, settings)
+            # 物品與設定值一起寫入，衍生欄位已是最新
+            connection.execute("DELETE FROM meta WHERE key = ?", (SETTINGS_CHANGED_KEY,))
+            if self.has_fts:
+                for statement in FTS_TRIGGER_STATEMENTS:
+                    connection.execute(statement)
+        self.last_settings = settings
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str) -> int:
+    """將 JSON 快照（含變更日誌）匯入 SQLite 資料庫，回傳匯入的物品數量"""
+    journal = ItemJournal(json_path)
+    data = journal.load()
+    if data is None:
+        raise FileNotFoundError(json_path)
+    store = SQLiteItemStore(db_path)
+    try:
+        store.compact(data)
+        if journal.settings_replayed:
+            # 日誌中的設定值變動尚未反映到物品上，保留重算旗標
+            store.set_settings(**store.last_settings)
+    finally:
+        store.close()
+    return len(data["items"])
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        print("用法: python -m poe_core.item_store <items_data.json> <items_data.db>")
+        sys.exit(1)
+    print(f"已匯入 {migrate_json_to_sqlite(sys.argv[1], sys.argv[2])} 個物品。")
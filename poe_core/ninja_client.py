@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from urllib.parse import quote
+
+# poe.ninja 價格資料
+NINJA_BASE_URL = "https://poe.ninja/api/data"
+DEFAULT_LEAGUE = "Settlers"
+
+# 類別 -> API 端點（通貨類與物品類的端點不同）
+CATEGORIES = {
+    "Currency": "currencyoverview",
+    "Fragment": "itemoverview",
+    "Scarab": "itemoverview",
+}
+
+DEFAULT_CACHE_DIR = "ninja_cache"
+DEFAULT_TTL = 600  # 快取有效秒數，poe.ninja 大約每小時更新
+DEFAULT_TIMEOUT = 10  # 單次請求逾時秒數
+
+
+class PriceFeedError(Exception):
+    """無法取得價格資料（網路錯誤且沒有可用的快取）"""
+
+
+class RequestBudget:
+    """請求配額：任意 per_seconds 秒內最多送出 max_requests 個請求，超過時等待；可在多個執行緒間共用"""
+
+    def __init__(self, max_requests: int = 10, per_seconds: float = 60.0, clock=time.monotonic, sleep=time.sleep):
+        self.max_requests = max_requests
+        self.per_seconds = per_seconds
+        self.clock = clock
+        self.sleep = sleep
+        self.sent = deque()  # 配額時間窗內已送出請求的時間
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """取得一個請求配額，必要時等待最早的請求離開時間窗"""
+        while True:
+            with self.lock:
+                now = self.clock()
+                while self.sent and now - self.sent[0] >= self.per_seconds:
+                    self.sent.popleft()
+                if len(self.sent) < self.max_requests:
+                    self.sent.append(now)
+                    return
+                wait = self.sent[0] + self.per_seconds - now
+            self.sleep(wait)
+
+
+def overview_url(category: str, league: str = DEFAULT_LEAGUE, base_url: str = NINJA_BASE_URL) -> str:
+    """指定類別與聯盟的 poe.ninja overview 網址"""
+    return f"{base_url}/{CATEGORIES[category]}?league={quote(league)}&type={quote(category)}"
+
+
+class NinjaClient:
+    """poe.ninja 價格客戶端：共用連線池、同時抓取多個類別、以 ETag/TTL 快取在硬碟上，並遵守請求配額
+
+    快取檔就是錄下來的 API 回應（每個聯盟、類別一個 JSON 檔），offline=True 時只讀快取不連網；
+    base_url 可指向本機的測試伺服器。
+    """
+
+    def __init__(self, league: str = DEFAULT_LEAGUE, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 ttl: float = DEFAULT_TTL, budget: Optional[RequestBudget] = None,
+                 timeout: float = DEFAULT_TIMEOUT, max_workers: int = len(CATEGORIES),
+                 base_url: str = NINJA_BASE_URL, offline: bool = False, session=None):
+        self.league = league
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.budget = budget if budget is not None else RequestBudget()
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.base_url = base_url
+        self.offline = offline
+        self.session = session
+
+    def get_session(self):
+        """建立共用的 requests.Session，連線池大小與同時請求數相同"""
+        if self.session is None:
+            # 只有線上查價需要 requests，離線計算與批次作業不必安裝
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self.session = session
+        return self.session
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def cache_path(self, category: str) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"{self.league}_{category}.json")
+
+    def read_cache(self, category: str) -> Optional[Dict]:
+        """讀取快取紀錄 {"url", "etag", "fetched_at", "data"}，不存在或損毀時回傳 None"""
+        path = self.cache_path(category)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def write_cache(self, category: str, entry: Dict):
+        """寫入暫存檔後再改名，寫到一半當機也不會留下損毀的快取"""
+        path = self.cache_path(category)
+        if path is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def fetch(self, category: str) -> Dict:
+        """取得單一類別的 overview 資料：快取未過期時直接使用，過期時以 ETag 條件請求"""
+        url = overview_url(category, self.league, self.base_url)
+        cached = self.read_cache(category)
+        if cached is not None and (self.offline or time.time() - cached.get("fetched_at", 0) < self.ttl):
+            return cached["data"]
+        if self.offline:
+            raise PriceFeedError(f"離線模式下沒有 {self.league} {category} 的快取資料")
+
+        headers = {}
+        if cached is not None and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        self.budget.acquire()
+        try:
+            response = self.get_session().get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and cached is not None:
+                # 資料未變動，只更新快取時間
+                cached["fetched_at"] = time.time()
+                self.write_cache(category, cached)
+                return cached["data"]
+            response.raise_for_status()  # 檢查請求是否成功
+            data = response.json()
+        except Exception as e:
+            if cached is not None:
+                print(f"API 請求失敗，改用過期的快取資料: {e}")
+                return cached["data"]
+            raise PriceFeedError(f"API 請求失敗: {e}") from e
+
+        self.write_cache(category, {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "fetched_at": time.time(),
+            "data": data,
+        })
+        return data
+
+    def fetch_all(self, categories: Iterable[str] = tuple(CATEGORIES)) -> Dict[str, Dict]:
+        """同時抓取多個類別，回傳 {類別: overview 資料}；任何一個類別失敗時拋出 PriceFeedError"""
+        categories = list(categories)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(categories)) or 1) as executor:
+            results = executor.map(self.fetch, categories)
+            return dict(zip(categories, results))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # 錄製目前的 API 回應到快取目錄，可作為離線或測試用的資料
+    parser = argparse.ArgumentParser(description="下載 poe.ninja 價格資料到快取目錄")
+    parser.add_argument("--league", default=DEFAULT_LEAGUE)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--ttl", type=float, default=0, help="快取有效秒數，預設 0（一律向 API 確認）")
+    args = parser.parse_args()
+    with NinjaClient(args.league, args.cache_dir, ttl=args.ttl) as client:
+        for category, data in client.fetch_all().items():
+            print(f"{category}: {len(data.get('lines', []))} 筆")
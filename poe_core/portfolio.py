@@ -0,0 +1,328 @@
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .calculator import profit_c_to_c, profit_c_to_d
+from .coin_routes import DEFAULT_FEES, CoinFees
+from .profit_engine import parse_divine_price
+
+# 每個物品有兩種賣法：C收C賣（C）與 C買D賣（D），兩者共用同一份購買庫存
+ROUTES = ("C", "D")
+
+# 拉格朗日乘數的二分搜尋次數，足以讓金幣用量收斂到浮點精度
+LAGRANGE_ITERATIONS = 60
+
+# 精確解（動態規劃）的規模上限：物品數 x 預算格數（記錄選擇用），以及 數量組合數 x 預算格數（計算量）；
+# 超過時只用拉格朗日近似解，並在結果中附上與上限的差距
+EXACT_MAX_CELLS = 1_000_000
+EXACT_MAX_WORK = 20_000_000
+
+
+class PortfolioCandidates:
+    """分配問題的輸入：每個物品一列的 numpy 陣列
+
+    cost 為單個購買價格（混沌石），profit_c / profit_d 為兩種賣法的單個利潤，
+    coin_c / coin_d 為單個金幣消耗，cap_c / cap_d 為兩種賣法各自的販賣庫存，buy_cap 為購買庫存；
+    沒有庫存資料時為 inf（不限數量）。
+    """
+
+    def __init__(self, names: List[str], cost, profit_c, profit_d, coin_c, coin_d,
+                 cap_c=None, cap_d=None, buy_cap=None):
+        self.names = list(names)
+        count = len(self.names)
+
+        def column(values, default=math.inf):
+            if values is None:
+                return np.full(count, default)
+            return np.asarray(values, dtype=np.float64).reshape(count)
+
+        self.cost = column(cost)
+        self.profit_c = column(profit_c)
+        self.profit_d = column(profit_d)
+        self.coin_c = column(coin_c)
+        self.coin_d = column(coin_d)
+        self.cap_c = column(cap_c)
+        self.cap_d = column(cap_d)
+        self.buy_cap = column(buy_cap)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_items(cls, items, dc_ratio: float, item_coin_value: float,
+                   fees: CoinFees = DEFAULT_FEES) -> "PortfolioCandidates":
+        """Profit_v2 格式的物品：單個金幣消耗依費用表計算（與 avg_coin_c / avg_coin_d 相同）
+
+        物品若帶有 chaos_buy_stock / chaos_sell_stock / divine_sell_stock 欄位，則作為數量上限。
+        """
+        names, cost, profit_c, profit_d, coin_c, coin_d = [], [], [], [], [], []
+        cap_c, cap_d, buy_cap = [], [], []
+        for item in items:
+            receive_price = float(item["receive_price"])
+            sell_div_num_chaos = _round2(parse_divine_price(item["divine_sell_price"]) * dc_ratio)
+            coin = fees.unit_costs(item_coin_value, item["sell_price"], sell_div_num_chaos, dc_ratio)
+            names.append(item.get("item_name", ""))
+            cost.append(receive_price)
+            profit_c.append(_round2(profit_c_to_c(receive_price, item["sell_price"])))
+            profit_d.append(_round2(sell_div_num_chaos - receive_price))
+            coin_c.append(coin["c_to_c"])
+            coin_d.append(coin["c_to_d"])
+            cap_c.append(_stock(item, "chaos_sell_stock"))
+            cap_d.append(_stock(item, "divine_sell_stock"))
+            buy_cap.append(_stock(item, "chaos_buy_stock"))
+        return cls(names, cost, profit_c, profit_d, coin_c, coin_d, cap_c, cap_d, buy_cap)
+
+    @classmethod
+    def from_stock_items(cls, items, chaos_to_divine_ratio: float,
+                         chaos_to_coin_ratio: float) -> "PortfolioCandidates":
+        """profit_calculator 命令列格式的物品：利潤已扣除折合混沌石的金幣成本，金幣消耗為 coin_value"""
+        names, cost, profit_c, profit_d, coin = [], [], [], [], []
+        cap_c, cap_d, buy_cap = [], [], []
+        for item in items:
+            item_cost_in_chaos = item["coin_value"] / chaos_to_coin_ratio
+            names.append(item["name"])
+            cost.append(item["chaos_buy"])
+            profit_c.append(profit_c_to_c(item["chaos_buy"], item["chaos_sell"]) - item_cost_in_chaos)
+            profit_d.append(profit_c_to_d(item["divine_sell"], chaos_to_divine_ratio, item["chaos_buy"]) - item_cost_in_chaos)
+            coin.append(item["coin_value"])
+            cap_c.append(_stock(item, "chaos_sell_stock"))
+            cap_d.append(_stock(item, "divine_sell_stock"))
+            buy_cap.append(_stock(item, "chaos_buy_stock"))
+        return cls(names, cost, profit_c, profit_d, coin, coin, cap_c, cap_d, buy_cap)
+
+    def lanes(self, penalty: float):
+        """依金幣懲罰 penalty 展開成 (物品, 賣法) 的通道，回傳 (物品列號, 賣法, 成本, 利潤, 金幣, 數量上限)
+
+        同一物品先走扣除懲罰後較賺的賣法，另一個賣法只能用剩下的購買庫存。
+        兩個賣法的購買價格相同，較賺的一方單位成本報酬也較高，貪婪法一定先用完它。
+        """
+        score_c = self.profit_c - penalty * self.coin_c
+        score_d = self.profit_d - penalty * self.coin_d
+        first_d = score_d > score_c
+        first_cap = np.minimum(np.where(first_d, self.cap_d, self.cap_c), self.buy_cap)
+        # 購買庫存不限時不扣除（避免 inf - inf），剩餘量仍為 inf
+        buy_left = self.buy_cap - np.where(np.isinf(self.buy_cap), 0.0, first_cap)
+        second_cap = np.minimum(np.where(first_d, self.cap_c, self.cap_d), buy_left)
+        rows = np.arange(len(self))
+        route_d = np.concatenate([first_d, ~first_d])
+        return (
+            np.concatenate([rows, rows]),
+            route_d,
+            np.concatenate([self.cost, self.cost]),
+            np.where(route_d, np.concatenate([self.profit_d, self.profit_d]), np.concatenate([self.profit_c, self.profit_c])),
+            np.where(route_d, np.concatenate([self.coin_d, self.coin_d]), np.concatenate([self.coin_c, self.coin_c])),
+            np.concatenate([first_cap, second_cap]),
+        )
+
+
+def _round2(value) -> float:
+    return round(float(value), 2)
+
+
+def _stock(item, key: str) -> float:
+    value = item.get(key)
+    return math.inf if value is None else max(float(value), 0.0)
+
+
+def _fractional(cost, value, capacity, budget: float):
+    """連續背包：依單位成本報酬由高到低裝滿，回傳 (各通道數量, 總價值)"""
+    quantity = np.zeros(len(cost))
+    usable = np.flatnonzero((value > 0) & (capacity > 0) & (cost > 0))
+    if len(usable) == 0 or budget <= 0:
+        return quantity, 0.0
+    order = usable[np.argsort(-(value[usable] / cost[usable]), kind="stable")]
+    spend = cost[order] * capacity[order]
+    before = np.concatenate([[0.0], np.cumsum(spend)[:-1]])
+    full = before + spend <= budget
+    quantity[order[full]] = capacity[order[full]]
+    partial = np.flatnonzero(~full)
+    if len(partial):
+        lane = order[partial[0]]
+        quantity[lane] = (budget - before[partial[0]]) / cost[lane]
+    return quantity, float(value @ quantity)
+
+
+def _units(values, scale: float = 100.0):
+    """將價格（至多兩位小數）換算為整數單位，回傳 (整數陣列, 每單位的值)；無法精確換算時回傳 None"""
+    scaled = np.asarray(values, dtype=np.float64) * scale
+    whole = np.round(scaled)
+    if len(whole) == 0 or not np.all(np.isfinite(whole)) or np.any(np.abs(scaled - whole) > 1e-6):
+        return None
+    whole = whole.astype(np.int64)
+    step = int(np.gcd.reduce(whole[whole > 0])) if np.any(whole > 0) else 1
+    return whole // step, step / scale
+
+
+def _exact(candidates: PortfolioCandidates, budget: float, coin_budget: float):
+    """小規模時以動態規劃求整數最佳解，回傳各物品 (C收C賣數量, C買D賣數量)；規模太大或價格無法換算時回傳 None
+
+    狀態為（已用混沌石, 已用金幣）的整數格子，每個物品選一組 (C 數量, D 數量)，同時遵守兩種賣法的販賣庫存與共用的購買庫存。
+    """
+    # 利潤不為正的賣法在最佳解中一定是 0（改為 0 不減少利潤，也不增加用量）
+    use_c = (candidates.profit_c > 0) & (candidates.cap_c > 0)
+    use_d = (candidates.profit_d > 0) & (candidates.cap_d > 0)
+    rows = np.flatnonzero((use_c | use_d) & (candidates.cost > 0) & (candidates.buy_cap > 0))
+    quantities = (np.zeros(len(candidates)), np.zeros(len(candidates)))
+    if len(rows) == 0 or budget <= 0:
+        return quantities
+
+    chaos = _units(candidates.cost[rows])
+    if chaos is None:
+        return None
+    chaos_cost, chaos_step = chaos
+    chaos_cells = int(math.floor(budget / chaos_step + 1e-9)) + 1
+    coin_c, coin_d, coin_step, coin_cells = np.zeros(len(rows), np.int64), np.zeros(len(rows), np.int64), 1.0, 1
+    if math.isfinite(coin_budget):
+        coins = _units(np.concatenate([np.where(use_c[rows], candidates.coin_c[rows], 0.0),
+                                       np.where(use_d[rows], candidates.coin_d[rows], 0.0)]))
+        if coins is None or np.any(coins[0] < 0):
+            return None
+        coin_c, coin_d = coins[0][:len(rows)], coins[0][len(rows):]
+        coin_step = coins[1]
+        if np.any(coins[0] > 0):
+            coin_cells = int(math.floor(max(coin_budget, 0.0) / coin_step + 1e-9)) + 1
+    cells = chaos_cells * coin_cells
+    if len(rows) * cells > EXACT_MAX_CELLS:
+        return None
+
+    # 每個物品可選的 (C 數量, D 數量)：兩者合計不超過購買庫存與混沌石預算
+    choices = []
+    work = 0
+    for index, row in enumerate(rows.tolist()):
+        total = min(candidates.buy_cap[row], (chaos_cells - 1) // chaos_cost[index])
+        limit_c = int(min(candidates.cap_c[row], total)) if use_c[row] else 0
+        limit_d = int(min(candidates.cap_d[row], total)) if use_d[row] else 0
+        total = int(total)
+        count_c = np.arange(limit_c + 1)
+        work += int(np.sum(np.minimum(limit_d, total - count_c) + 1)) * cells
+        if work > EXACT_MAX_WORK:
+            return None
+        choices.append([(x_c, x_d) for x_c in range(limit_c + 1) for x_d in range(min(limit_d, total - x_c) + 1)])
+
+    best = np.zeros((chaos_cells, coin_cells))
+    picks = np.zeros((len(rows), chaos_cells, coin_cells), dtype=np.int32)
+    for index, row in enumerate(rows.tolist()):
+        previous = best
+        best = previous.copy()
+        pick = picks[index]
+        for choice, (x_c, x_d) in enumerate(choices[index]):
+            if choice == 0:
+                continue
+            used_chaos = (x_c + x_d) * int(chaos_cost[index])
+            used_coin = x_c * int(coin_c[index]) + x_d * int(coin_d[index])
+            if used_chaos >= chaos_cells or used_coin >= coin_cells:
+                continue
+            value = x_c * candidates.profit_c[row] + x_d * candidates.profit_d[row]
+            shifted = previous[:chaos_cells - used_chaos, :coin_cells - used_coin] + value
+            target = best[used_chaos:, used_coin:]
+            better = shifted > target
+            target[better] = shifted[better]
+            pick[used_chaos:, used_coin:][better] = choice
+
+    # 由最後一格往回找出每個物品的選擇
+    chaos_left, coin_left = chaos_cells - 1, coin_cells - 1
+    for index in range(len(rows) - 1, -1, -1):
+        x_c, x_d = choices[index][picks[index, chaos_left, coin_left]]
+        row = rows[index]
+        quantities[0][row], quantities[1][row] = x_c, x_d
+        chaos_left -= (x_c + x_d) * int(chaos_cost[index])
+        if coin_cells > 1:
+            coin_left -= x_c * int(coin_c[index]) + x_d * int(coin_d[index])
+    return quantities
+
+
+def optimize_portfolio(candidates: PortfolioCandidates, current_chaos: float,
+                       coin_budget: Optional[float] = None) -> Dict:
+    """將 current_chaos 分配到各物品與賣法，使總利潤最大；不超過庫存與金幣預算
+
+    以拉格朗日鬆弛處理金幣預算：二分搜尋金幣的懲罰值，使扣除懲罰後的連續背包解不超過預算，
+    再依該順序以整數數量貪婪分配，剩下的預算用於其餘有利潤的通道。
+    每次求解都是 O(n log n) 的向量運算，數千個物品只需數毫秒。
+    物品數與預算都小（見 EXACT_MAX_CELLS、EXACT_MAX_WORK）時改以動態規劃求得整數最佳解。
+
+    回傳 {"allocations": [...], "total_profit", "chaos_used", "coin_used", "upper_bound", "gap", "exact"}：
+    exact 為 True 時是最佳解（upper_bound 等於 total_profit）；否則 upper_bound 為連續鬆弛的利潤上限，
+    gap 為總利潤距離上限的比例，最佳解一定落在兩者之間。
+    """
+    coin_budget = math.inf if coin_budget is None else float(coin_budget)
+    budget = float(current_chaos)
+    penalty = 0.0
+    rows, route_d, cost, profit, coin, capacity = candidates.lanes(0.0)
+    quantity, upper_bound = _fractional(cost, profit, capacity, budget)
+    if math.isfinite(coin_budget) and coin @ quantity > coin_budget:
+        # 懲罰值大於最高的 利潤/金幣 時，所有要消耗金幣的通道都不再有利可圖
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratios = np.where(coin > 0, profit / coin, 0.0)
+        low, high = 0.0, float(np.max(ratios, initial=0.0)) + 1.0
+        for _ in range(LAGRANGE_ITERATIONS):
+            middle = (low + high) / 2
+            lanes = candidates.lanes(middle)
+            quantity, _ = _fractional(lanes[2], lanes[3] - middle * lanes[4], lanes[5], budget)
+            if lanes[4] @ quantity > coin_budget:
+                low = middle
+            else:
+                high = middle
+        penalty = high
+        rows, route_d, cost, profit, coin, capacity = candidates.lanes(penalty)
+        _, relaxed = _fractional(cost, profit - penalty * coin, capacity, budget)
+        # 弱對偶：任何懲罰值下的鬆弛解加上 懲罰 * 金幣預算 都不小於最佳利潤
+        upper_bound = min(upper_bound, relaxed + penalty * coin_budget)
+
+    usable = np.flatnonzero((profit > 0) & (capacity > 0) & (cost > 0))
+    adjusted = (profit[usable] - penalty * coin[usable]) / cost[usable]
+    # 先依懲罰後的報酬率分配，再以原始報酬率用掉剩下的預算
+    primary = usable[np.argsort(-adjusted, kind="stable")]
+    fallback = usable[np.argsort(-(profit[usable] / cost[usable]), kind="stable")]
+
+    buy_left = candidates.buy_cap.copy()
+    taken = np.zeros(len(cost))
+    chaos_left, coin_left = budget, coin_budget
+    for lane in np.concatenate([primary, fallback]).tolist():
+        row = rows[lane]
+        limit = min(capacity[lane] - taken[lane], buy_left[row], chaos_left // cost[lane])
+        if coin[lane] > 0 and math.isfinite(coin_left):
+            limit = min(limit, coin_left // coin[lane])
+        if limit < 1:
+            continue
+        limit = math.floor(limit)
+        taken[lane] += limit
+        buy_left[row] -= limit
+        chaos_left -= limit * cost[lane]
+        coin_left -= limit * coin[lane]
+
+    exact = _exact(candidates, budget, coin_budget)
+    if exact is not None:
+        # 通道與物品、賣法的對應與近似解相同，直接換成最佳數量
+        taken = np.where(route_d, exact[1][rows], exact[0][rows])
+        upper_bound = float(taken @ profit)
+
+    total_profit = float(taken @ profit)
+    allocations = []
+    for lane in np.flatnonzero(taken).tolist():
+        quantity = int(taken[lane])
+        allocations.append({
+            "item_name": candidates.names[rows[lane]],
+            "route": ROUTES[int(route_d[lane])],
+            "quantity": quantity,
+            "chaos": _round2(quantity * cost[lane]),
+            "coin": _round2(quantity * coin[lane]),
+            "profit": _round2(quantity * profit[lane]),
+        })
+    allocations.sort(key=lambda allocation: allocation["profit"], reverse=True)
+    return {
+        "allocations": allocations,
+        "total_profit": _round2(total_profit),
+        "chaos_used": _round2(float(taken @ cost)),
+        "coin_used": _round2(float(taken @ coin)),
+        "upper_bound": _round2(upper_bound),
+        "gap": max(upper_bound - total_profit, 0.0) / upper_bound if upper_bound > 0 else 0.0,
+        "exact": exact is not None,
+    }
+
+
+def bound_text(result: Dict) -> str:
+    """結果與最佳解的關係（供各前端顯示）：精確解標示為最佳解，否則列出上限與最大差距"""
+    if result["exact"]:
+        return "最佳解"
+    return f"上限 {result['upper_bound']:.2f}C，與最佳解最多差 {result['gap']:.1%}"
@@ -0,0 +1,267 @@
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .item_loader import write_json
+from .profit_engine import parse_divine_price
+
+# 每筆歷史紀錄的價格欄位，未知的值（例如 poe.ninja 沒有購買價格）存為 NaN
+HISTORY_FIELDS = ("receive_price", "sell_price", "divine_sell_price", "dc_ratio")
+
+# 欄位 -> 檔案中的資料型別（固定小端序，檔案可跨平台搬移）
+COLUMN_DTYPES = {
+    "timestamp": np.dtype("<f8"),
+    "item": np.dtype("<u4"),  # items.json 中的物品編號
+    "receive_price": np.dtype("<f8"),
+    "sell_price": np.dtype("<f8"),
+    "divine_sell_price": np.dtype("<f8"),
+    "dc_ratio": np.dtype("<f8"),
+}
+
+DEFAULT_HISTORY_DIR = "price_history"
+
+
+class _DirectoryLock:
+    """跨行程的寫入鎖（目錄中的 .lock 檔）：Exchange.py 與 Profit_v2 可能同時寫入同一個歷史目錄"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, ".lock")
+        self.file = None
+
+    def __enter__(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.file = open(self.path, "a+b")
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)  # 被占用時重試約 10 秒
+            else:
+                import fcntl
+
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        except OSError:
+            self.file.close()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self.file.close()
+
+
+class PriceHistory:
+    """每個物品的價格歷史，以欄式二進位檔保存
+
+    目錄中每個欄位一個只附加的檔案（timestamp.f8、item.u4、receive_price.f8 ...），
+    一筆紀錄 44 bytes，約為 JSON 的四分之一；查詢時以 memmap 讀取，只載入需要的欄位。
+    與該物品上一筆紀錄完全相同的價格不會重複寫入。
+    多個行程可共用同一個目錄：附加時持有目錄的檔案鎖，並先重新讀取其他行程寫入的名稱表與紀錄。
+    """
+
+    def __init__(self, directory: str = DEFAULT_HISTORY_DIR):
+        self.directory = directory
+        self.names_path = os.path.join(directory, "items.json")
+        self.lock = threading.Lock()
+        self.file_lock = _DirectoryLock(directory)
+        self._reset()
+        if os.path.exists(self.names_path):
+            with self.file_lock:
+                self._load()
+
+    def _reset(self):
+        self.names: List[str] = []
+        self.numbers: Dict[str, int] = {}
+        self.last: Dict[int, Tuple[float, ...]] = {}  # 物品編號 -> 最後一筆紀錄的價格
+        self.count = 0
+        self.order: Optional[np.ndarray] = None  # 依 (物品, 時間) 排序的列號，查詢時才建立
+        self.starts: Optional[np.ndarray] = None
+        self.last_timestamp = -math.inf
+        self.disk_state = None  # 上次讀取或寫入後檔案的狀態，其他行程寫入後會不同
+
+    def column_path(self, field: str) -> str:
+        return os.path.join(self.directory, f"{field}.{COLUMN_DTYPES[field].kind}{COLUMN_DTYPES[field].itemsize}")
+
+    def _disk_state(self) -> Tuple:
+        """名稱表的修改時間與大小、各欄位檔的大小"""
+        def stat(path):
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                return None
+            return info.st_mtime_ns, info.st_size
+
+        return (stat(self.names_path),) + tuple(stat(self.column_path(field)) for field in COLUMN_DTYPES)
+
+    def _refresh(self):
+        """（持有檔案鎖時）其他行程寫入過時重新載入名稱表與每個物品的最後價格"""
+        if self._disk_state() != self.disk_state:
+            self._reset()
+            self._load()
+
+    def _load(self):
+        """（持有檔案鎖時）讀取名稱表與各欄位，截掉寫入中途當機留下的不完整紀錄"""
+        if not os.path.exists(self.names_path):
+            self.disk_state = self._disk_state()
+            return
+        with open(self.names_path, "r", encoding="utf-8") as f:
+            self.names = json.load(f)
+        self.numbers = {name: number for number, name in enumerate(self.names)}
+        # 寫入中途當機時各欄位長度可能不同，以最短的欄位為準
+        lengths = [
+            os.path.getsize(self.column_path(field)) // dtype.itemsize if os.path.exists(self.column_path(field)) else 0
+            for field, dtype in COLUMN_DTYPES.items()
+        ]
+        self.count = min(lengths)
+        for field, dtype in COLUMN_DTYPES.items():
+            path = self.column_path(field)
+            if os.path.exists(path) and os.path.getsize(path) != self.count * dtype.itemsize:
+                with open(path, "r+b") as f:
+                    f.truncate(self.count * dtype.itemsize)
+        if self.count:
+            items = self.column("item")
+            timestamps = self.column("timestamp")
+            self.last_timestamp = float(timestamps[-1])
+            # 每個物品最後一次出現的列
+            reversed_items = items[::-1]
+            numbers, positions = np.unique(reversed_items, return_index=True)
+            last_rows = self.count - 1 - positions
+            prices = [self.column(field)[last_rows] for field in HISTORY_FIELDS]
+            for index, number in enumerate(numbers.tolist()):
+                self.last[number] = tuple(float(column[index]) for column in prices)
+        self.disk_state = self._disk_state()
+
+    def __len__(self):
+        return self.count
+
+    def item_names(self) -> List[str]:
+        return list(self.names)
+
+    def column(self, field: str) -> np.ndarray:
+        """以 memmap 讀取整個欄位（唯讀）"""
+        if self.count == 0:
+            return np.empty(0, dtype=COLUMN_DTYPES[field])
+        return np.memmap(self.column_path(field), dtype=COLUMN_DTYPES[field], mode="r", shape=(self.count,))
+
+    def append(self, rows: Iterable[Tuple[str, Dict]], timestamp: Optional[float] = None) -> int:
+        """附加一次價格快照：rows 為 (物品名稱, {欄位: 價格})，缺少的欄位存為 NaN；回傳實際寫入的筆數"""
+        with self.lock, self.file_lock:
+            self._refresh()
+            # 時間戳記不可倒退，查詢才能用二分搜尋
+            timestamp = max(time.time() if timestamp is None else float(timestamp), self.last_timestamp)
+            new_names = []
+            batch_items, batch_prices = [], []
+            for name, values in rows:
+                prices = tuple(_to_float(values.get(field)) for field in HISTORY_FIELDS)
+                number = self.numbers.get(name)
+                if number is None:
+                    number = len(self.names)
+                    self.names.append(name)
+                    self.numbers[name] = number
+                    new_names.append(name)
+                elif _same_prices(self.last.get(number), prices):
+                    continue
+                self.last[number] = prices
+                batch_items.append(number)
+                batch_prices.append(prices)
+            if not batch_items:
+                return 0
+
+            if new_names:
+                # 名稱表先寫入，紀錄中的物品編號一定找得到名稱
+                write_json(self.names_path, self.names)
+            prices = np.array(batch_prices, dtype=np.float64).reshape(len(batch_items), len(HISTORY_FIELDS))
+            columns = {
+                "timestamp": np.full(len(batch_items), timestamp),
+                "item": np.array(batch_items),
+            }
+            for index, field in enumerate(HISTORY_FIELDS):
+                columns[field] = prices[:, index]
+            for field, dtype in COLUMN_DTYPES.items():
+                with open(self.column_path(field), "ab") as f:
+                    f.write(columns[field].astype(dtype).tobytes())
+            self.count += len(batch_items)
+            self.last_timestamp = timestamp
+            self.order = None
+            self.disk_state = self._disk_state()
+            return len(batch_items)
+
+    def record_items(self, items: Iterable[Dict], dc_ratio: float, timestamp: Optional[float] = None) -> int:
+        """記錄物品目前的購買、販賣、神聖石販賣價格與 DC 比率"""
+        return self.append(
+            ((item.get("item_name", ""), {
+                "receive_price": item.get("receive_price"),
+                "sell_price": item.get("sell_price"),
+                "divine_sell_price": item.get("divine_sell_price"),
+                "dc_ratio": dc_ratio,
+            }) for item in items),
+            timestamp,
+        )
+
+    def record_prices(self, prices: Dict[str, float], dc_ratio: Optional[float], timestamp: Optional[float] = None) -> int:
+        """記錄市場價格（poe.ninja 的混沌石價值記為販賣價格）"""
+        return self.append(
+            ((name, {"sell_price": value, "dc_ratio": dc_ratio}) for name, value in prices.items()),
+            timestamp,
+        )
+
+    def _index(self):
+        """依物品排序的列號（同一物品內維持時間順序），新紀錄寫入後才需要重建"""
+        if self.order is None or len(self.order) != self.count:
+            items = self.column("item")
+            self.order = np.argsort(items, kind="stable")
+            self.starts = np.searchsorted(items[self.order], np.arange(len(self.names) + 1))
+        return self.order, self.starts
+
+    def query(self, item_name: str, start: Optional[float] = None, end: Optional[float] = None,
+              fields: Iterable[str] = HISTORY_FIELDS) -> Dict[str, np.ndarray]:
+        """查詢單一物品在 [start, end] 時間範圍內的紀錄，回傳 {"timestamp": ..., 欄位: ...}"""
+        with self.lock:
+            fields = list(fields)
+            number = self.numbers.get(item_name)
+            if number is None or self.count == 0:
+                return {field: np.empty(0, dtype=COLUMN_DTYPES[field]) for field in ["timestamp"] + fields}
+            order, starts = self._index()
+            rows = order[starts[number]:starts[number + 1]]
+            timestamps = self.column("timestamp")[rows]
+            low = 0 if start is None else np.searchsorted(timestamps, start, side="left")
+            high = len(rows) if end is None else np.searchsorted(timestamps, end, side="right")
+            rows = rows[low:high]
+            result = {"timestamp": np.array(timestamps[low:high])}
+            for field in fields:
+                result[field] = np.array(self.column(field)[rows])
+            return result
+
+
+def _to_float(value) -> float:
+    """價格轉為浮點數（接受 "3/4" 之類的分數字串），無法轉換時為 NaN"""
+    if value is None:
+        return math.nan
+    try:
+        return parse_divine_price(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _same_prices(last: Optional[Tuple[float, ...]], prices: Tuple[float, ...]) -> bool:
+    """兩筆價格是否相同（NaN 視為相同）"""
+    if last is None:
+        return False
+    return all(a == b or (math.isnan(a) and math.isnan(b)) for a, b in zip(last, prices))
@@ -0,0 +1,139 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .columnar import is_columnar_path  # pyarrow 只在讀寫欄式檔時才載入
+from .item_loader import read_json, write_json
+from .profit_engine import ITEM_INPUTS
+from .recompute_graph import RecomputeGraph
+
+# 神聖石在 poe.ninja 通貨資料中的名稱，其混沌石價值即為 DC 比率
+DIVINE_ORB = "Divine Orb"
+
+# 預設以市場價格更新的欄位
+DEFAULT_PRICE_FIELD = "sell_price"
+
+
+def normalize_name(name: str) -> str:
+    """比對物品名稱用的鍵：忽略前後空白與大小寫"""
+    return str(name).strip().casefold()
+
+
+class PriceSnapshot:
+    """某一時間點的市場價格：DC 比率與 {物品名稱: 混沌石價值}"""
+
+    def __init__(self, prices: Dict[str, float], dc_ratio: Optional[float] = None,
+                 fetched_at: Optional[float] = None):
+        self.prices = prices
+        self.dc_ratio = dc_ratio
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.by_key = {normalize_name(name): value for name, value in prices.items()}
+
+    def __len__(self):
+        return len(self.prices)
+
+    def lookup(self, item_name: str) -> Optional[float]:
+        """依物品名稱查詢混沌石價值，找不到時回傳 None"""
+        return self.by_key.get(normalize_name(item_name))
+
+    def to_dict(self) -> Dict:
+        return {"fetched_at": self.fetched_at, "dc_ratio": self.dc_ratio, "prices": self.prices}
+
+    @classmethod
+    def from_overviews(cls, overviews: Dict[str, Dict], fetched_at: Optional[float] = None) -> "PriceSnapshot":
+        """由 poe.ninja overview 資料（{類別: {"lines": [...]}}）建立價格快照"""
+        prices = {}
+        for data in overviews.values():
+            for line in data.get("lines", []):
+                if "currencyTypeName" in line:
+                    # 通貨類的名稱與價格欄位與物品類不同
+                    name, value = line["currencyTypeName"], line.get("chaosEquivalent")
+                else:
+                    name, value = line.get("name"), line.get("chaosValue")
+                if name and isinstance(value, (int, float)) and value > 0:
+                    prices[name] = float(value)
+        return cls(prices, prices.get(DIVINE_ORB), fetched_at)
+
+
+def fetch_snapshot(client) -> PriceSnapshot:
+    """以 NinjaClient 抓取（或讀取快取）所有類別並建立價格快照"""
+    return PriceSnapshot.from_overviews(client.fetch_all())
+
+
+def load_snapshot(path: str) -> PriceSnapshot:
+    """讀取價格檔：save_snapshot 保存的快照（JSON 或 Parquet／Arrow）、單一 overview、NinjaClient 的快取檔，或 {類別: overview}"""
+    if is_columnar_path(path):
+        from .columnar import read_snapshot
+        return read_snapshot(path)
+    data = read_json(path)
+    if not isinstance(data, dict):
+        raise ValueError("價格檔格式錯誤")
+    if "prices" in data:
+        return PriceSnapshot(data["prices"], data.get("dc_ratio"), data.get("fetched_at"))
+    if "lines" in data:
+        return PriceSnapshot.from_overviews({"overview": data})
+    if "data" in data:
+        return PriceSnapshot.from_overviews({"overview": data["data"]}, data.get("fetched_at"))
+    return PriceSnapshot.from_overviews(data)
+
+
+def save_snapshot(snapshot: PriceSnapshot, path: str):
+    """保存價格快照，副檔名為 .parquet／.arrow 時寫成欄式檔"""
+    if is_columnar_path(path):
+        from .columnar import write_snapshot
+        write_snapshot(path, snapshot)
+    else:
+        write_json(path, snapshot.to_dict())
+
+
+def field_value(chaos_value: float, field: str, dc_ratio: float) -> float:
+    """將混沌石價值換算為指定欄位的單位（神聖石販賣價格以 D 計價）"""
+    if field == "divine_sell_price":
+        return chaos_value / dc_ratio
+    return chaos_value
+
+
+def plan_price_updates(items: List[Dict], snapshot: PriceSnapshot, field: str = DEFAULT_PRICE_FIELD,
+                       dc_ratio: float = 1.0) -> Tuple[List[int], List[float], int]:
+    """找出名稱對得上且價格有變動的物品，回傳 (列號, 新價格, 對得上的物品數)"""
+    if field not in ITEM_INPUTS:
+        raise KeyError(f"只能更新輸入欄位: {field}")
+    rows, values = [], []
+    matched = 0
+    for row, item in enumerate(items):
+        chaos_value = snapshot.lookup(item.get("item_name", ""))
+        if chaos_value is None:
+            continue
+        matched += 1
+        value = field_value(chaos_value, field, dc_ratio)
+        if item.get(field) != value:
+            rows.append(row)
+            values.append(value)
+    return rows, values, matched
+
+
+def apply_snapshot(graph: RecomputeGraph, snapshot: PriceSnapshot, field: str = DEFAULT_PRICE_FIELD) -> Dict[str, int]:
+    """以價格快照批次更新 DC 比率與物品價格，最後只重算一次
+
+    回傳 {"matched": 名稱對得上的物品數, "updated": 價格有變動的物品數, "recomputed": 重算的儲存格數}。
+    """
+    if snapshot.dc_ratio:
+        graph.set_setting("dc_ratio", snapshot.dc_ratio)
+    rows, values, matched = plan_price_updates(graph.items, snapshot, field, graph.settings["dc_ratio"])
+    graph.set_item_values(field, rows, values)
+    return {"matched": matched, "updated": len(rows), "recomputed": graph.recompute()}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # 從 poe.ninja（或快取）抓取價格並保存為快照檔，可在之後離線匯入
+    from .ninja_client import DEFAULT_LEAGUE, NinjaClient
+
+    parser = argparse.ArgumentParser(description="保存 poe.ninja 價格快照")
+    parser.add_argument("output", help="快照檔路徑，例如 prices.json 或 prices.parquet")
+    parser.add_argument("--league", default=DEFAULT_LEAGUE)
+    args = parser.parse_args()
+    with NinjaClient(args.league) as client:
+        snapshot = fetch_snapshot(client)
+    save_snapshot(snapshot, args.output)
+    print(f"DC 比率: {snapshot.dc_ratio}，共 {len(snapshot)} 筆價格")
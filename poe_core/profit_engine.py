@@ -0,0 +1,234 @@
+import numpy as np
+from typing import List, Dict
+
+from .coin_routes import DEFAULT_FEES, ROUTE_INPUTS, CoinFees
+from .item_fields import (  # 欄位名稱與價格解析不依賴 numpy，另放在 item_fields
+    DERIVED_FIELDS,
+    ITEM_INPUTS,
+    LOSS_FIELDS,
+    LOSS_TEXT,
+    SETTING_INPUTS,
+    parse_divine_price,
+)
+
+
+def round2(values: np.ndarray) -> np.ndarray:
+    """向量化的 round(x, 2)，結果與內建 round 完全一致"""
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100.0
+    rounded = np.rint(scaled)
+    result = rounded / 100.0
+
+    # 接近 .5 的邊界或數值過大時，浮點誤差可能讓 rint 與內建 round 不同，改用內建 round
+    with np.errstate(invalid="ignore"):
+        ambiguous = np.abs(np.abs(scaled - rounded) - 0.5) <= 1e-9 * np.maximum(1.0, np.abs(scaled))
+        ambiguous |= np.abs(scaled) >= 2.0 ** 52
+    ambiguous &= np.isfinite(values)
+    if ambiguous.any():
+        # 以攤平的索引寫回，多維陣列（例如情境分析的 情境 x 物品）也適用
+        index = np.flatnonzero(ambiguous)
+        result.flat[index] = [round(v, 2) for v in values.flat[index].tolist()]
+    return result
+
+
+# 以下為各衍生欄位的計算函式，參數依 COLUMN_GRAPH 中宣告的依賴順序傳入
+def _profit_c_to_c(sell_price, receive_price):
+    # C收C賣利潤
+    return round2(sell_price - receive_price)
+
+
+def _sell_div_num_chaos(divine_sell_price, dc_ratio):
+    # 神聖石販賣價格轉混沌石價值
+    return round2(divine_sell_price * dc_ratio)
+
+
+def _profit_c_to_d(sell_div_num_chaos, receive_price):
+    # C買D賣利潤
+    return round2(sell_div_num_chaos - receive_price)
+
+
+def _purchasable(current_chaos, receive_price):
+    # 可購買數量（浮點數，供後續欄位相乘）
+    can_buy = receive_price > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(can_buy, np.floor_divide(current_chaos, np.where(can_buy, receive_price, 1.0)), 0.0)
+
+
+def _purchasable_with_chaos(purchasable):
+    return purchasable.astype(np.int64)
+
+
+def _required_chaos(purchasable, receive_price):
+    # 所需C = 購買數量 * 購買價格（購買價格為整數的列由 to_values 轉回 int）
+    return purchasable * receive_price
+
+
+def _total_profit(profit, purchasable):
+    return round2(profit * purchasable)
+
+
+def _receive_coin(item_coin_value, purchasable):
+    # 購買物品的金幣消耗
+    return round2(item_coin_value * purchasable)
+
+
+def _sell_coin(purchasable, sell_price):
+    # 出售物品的金幣收益
+    return round2(purchasable * sell_price)
+
+
+def _chaos_sale_coin(purchasable, sell_price, chaos_sale_coin_rate):
+    # C收C賣 販賣時的金幣消耗（預設費用表不計）
+    return round2(purchasable * sell_price * chaos_sale_coin_rate)
+
+
+def _all_coin_c(receive_coin, chaos_sale_coin):
+    # C收C賣的總金幣消耗
+    return round2(receive_coin + chaos_sale_coin)
+
+
+def _sell_div_coin(purchasable, sell_div_num_chaos, divine_sale_coin_rate):
+    # C買D賣 販賣時的金幣消耗
+    return round2(purchasable * sell_div_num_chaos * divine_sale_coin_rate)
+
+
+def _all_coin_d(receive_coin, sell_div_coin):
+    # C買D賣的總金幣消耗
+    return round2(receive_coin + sell_div_coin)
+
+
+def _extra_coin(purchasable, d_to_c_coin):
+    # D換C 額外支付的金幣
+    return round2(purchasable * d_to_c_coin)
+
+
+def _is_positive(value):
+    return value > 0
+
+
+def _safe_average(coin, profit):
+    # 平均賺 1C 需要的金幣；利潤 <= 0 的列由對應的 *_valid 遮罩標記
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(profit > 0, round2(coin / profit), 0.0)
+
+
+def _avg_coin_d_extra(all_coin_d, extra_coin, profit_c_to_d):
+    return _safe_average(all_coin_d + extra_coin, profit_c_to_d)
+
+
+def int_mask(values) -> np.ndarray:
+    """標記輸入值為整數的列（ItemCalculator 中整數價格算出的所需C也是整數）"""
+    return np.fromiter((isinstance(value, int) and not isinstance(value, bool) for value in values),
+                       dtype=bool, count=len(values))
+
+
+# 欄位 -> 輸入欄位：輸入值為整數的列，該欄位寫回時轉為 int，與 ItemCalculator 的型別相同
+INT_WHEN_INPUT_INT = {"required_chaos": "receive_price"}
+
+# 所有純量輸入：設定值加上由金幣費用表預先算好的各路線成本
+SCALAR_INPUTS = SETTING_INPUTS + ROUTE_INPUTS
+
+# 欄位依賴圖：(欄位名稱, 依賴欄位, 計算函式)，已依拓撲順序排列
+COLUMN_GRAPH = (
+    ("profit_c_to_c", ("sell_price", "receive_price"), _profit_c_to_c),
+    ("sell_div_num_chaos", ("divine_sell_price", "dc_ratio"), _sell_div_num_chaos),
+    ("profit_c_to_d", ("sell_div_num_chaos", "receive_price"), _profit_c_to_d),
+    ("purchasable", ("current_chaos", "receive_price"), _purchasable),
+    ("purchasable_with_chaos", ("purchasable",), _purchasable_with_chaos),
+    ("required_chaos", ("purchasable", "receive_price"), _required_chaos),
+    ("total_profit_c_to_c", ("profit_c_to_c", "purchasable"), _total_profit),
+    ("total_profit_c_to_d", ("profit_c_to_d", "purchasable"), _total_profit),
+    ("receive_coin", ("item_coin_value", "purchasable"), _receive_coin),
+    ("sell_coin", ("purchasable", "sell_price"), _sell_coin),
+    ("avg_coin_c_valid", ("total_profit_c_to_c",), _is_positive),
+    ("chaos_sale_coin", ("purchasable", "sell_price", "chaos_sale_coin_rate"), _chaos_sale_coin),
+    ("all_coin_c", ("receive_coin", "chaos_sale_coin"), _all_coin_c),
+    ("avg_coin_c", ("all_coin_c", "total_profit_c_to_c"), _safe_average),
+    ("sell_div_coin", ("purchasable", "sell_div_num_chaos", "divine_sale_coin_rate"), _sell_div_coin),
+    ("all_coin_d", ("receive_coin", "sell_div_coin"), _all_coin_d),
+    ("avg_coin_d_valid", ("total_profit_c_to_d",), _is_positive),
+    ("avg_coin_d", ("all_coin_d", "total_profit_c_to_d"), _safe_average),
+    ("extra_coin", ("purchasable", "d_to_c_coin"), _extra_coin),
+    ("avg_coin_d_extra_valid", ("profit_c_to_d",), _is_positive),
+    ("avg_coin_d_extra", ("all_coin_d", "extra_coin", "profit_c_to_d"), _avg_coin_d_extra),
+)
+
+
+class ProfitEngine:
+    """以欄位陣列保存所有物品的價格，一次向量化計算全部衍生欄位"""
+
+    def __init__(self, receive_price, sell_price, divine_sell_price, receive_price_is_int=None):
+        self.receive_price = np.asarray(receive_price, dtype=np.float64)
+        self.sell_price = np.asarray(sell_price, dtype=np.float64)
+        self.divine_sell_price = np.asarray(divine_sell_price, dtype=np.float64)
+        # 購買價格為整數的列（只有從物品字典建立時才需要區分）
+        self.receive_price_is_int = (np.zeros(len(self.receive_price), dtype=bool) if receive_price_is_int is None
+                                     else np.asarray(receive_price_is_int, dtype=bool))
+
+    @classmethod
+    def from_items(cls, items: List[Dict]) -> "ProfitEngine":
+        """從物品字典列表建立欄位陣列"""
+        receive_price = [item['receive_price'] for item in items]
+        return cls(
+            receive_price,
+            [item['sell_price'] for item in items],
+            [parse_divine_price(item['divine_sell_price']) for item in items],
+            int_mask(receive_price),
+        )
+
+    def __len__(self):
+        return len(self.receive_price)
+
+    def compute(self, current_chaos: float, dc_ratio: float, item_coin_value: float,
+                fees: CoinFees = DEFAULT_FEES) -> Dict[str, np.ndarray]:
+        """依欄位依賴圖計算所有衍生欄位，回傳欄位名稱對應的陣列（含 *_valid 虧損遮罩）"""
+        values = {
+            "current_chaos": current_chaos,
+            "dc_ratio": dc_ratio,
+            "item_coin_value": item_coin_value,
+            "receive_price": self.receive_price,
+            "receive_price_is_int": self.receive_price_is_int,
+            "sell_price": self.sell_price,
+            "divine_sell_price": self.divine_sell_price,
+        }
+        # 各路線的金幣成本每組設定值只算一次，所有物品共用
+        values.update(fees.route_inputs(dc_ratio))
+        for name, dependencies, kernel in COLUMN_GRAPH:
+            values[name] = kernel(*(values[dependency] for dependency in dependencies))
+        return values
+
+    @staticmethod
+    def to_values(field: str, result: Dict[str, np.ndarray], rows=None) -> list:
+        """將單一欄位轉為 Python 值列表，虧損欄位換成與 ItemCalculator 相同的值"""
+        column = result[field] if rows is None else result[field][rows]
+        values = column.tolist()
+        int_input = INT_WHEN_INPUT_INT.get(field)
+        if int_input is not None:
+            mask = result[int_input + "_is_int"] if rows is None else result[int_input + "_is_int"][rows]
+            return [int(value) if is_int else value for value, is_int in zip(values, mask.tolist())]
+        loss_value = LOSS_FIELDS.get(field)
+        if loss_value is None:
+            return values
+        mask = result[field + "_valid"] if rows is None else result[field + "_valid"][rows]
+        return [value if valid else loss_value for value, valid in zip(values, mask.tolist())]
+
+    @staticmethod
+    def to_columns(result: Dict[str, np.ndarray]) -> Dict[str, list]:
+        """將計算結果轉為 Python 值的欄位列表"""
+        return {field: ProfitEngine.to_values(field, result) for field in DERIVED_FIELDS}
+
+    @staticmethod
+    def write_back(items: List[Dict], result: Dict[str, np.ndarray]):
+        """將計算結果寫回物品字典"""
+        columns = ProfitEngine.to_columns(result)
+        for item, row in zip(items, zip(*(columns[field] for field in DERIVED_FIELDS))):
+            item.update(zip(DERIVED_FIELDS, row))
+
+
+def calculate_profits(items: List[Dict], current_chaos: float, dc_ratio: float, item_coin_value: float,
+                      fees: CoinFees = DEFAULT_FEES):
+    """批次計算所有物品的利潤，結果與逐一呼叫 ItemCalculator.calculate_profit 相同"""
+    if not items:
+        return
+    engine = ProfitEngine.from_items(items)
+    ProfitEngine.write_back(items, engine.compute(current_chaos, dc_ratio, item_coin_value, fees))
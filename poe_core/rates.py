@@ -0,0 +1,29 @@
+from typing import Dict
+
+# poe.ninja overview 資料的解析與交換比率計算；抓取與快取見 ninja_client
+
+# 可作為「I Have」的通貨
+BASE_CURRENCIES = ("Divine Orb", "Chaos Orb")
+
+
+def extract_currency_items(data: Dict, target_dict: Dict = None) -> Dict[str, float]:
+    """提取通貨類中的 Divine Orb 和 Chaos Orb 的混沌石價值"""
+    target_dict = {} if target_dict is None else target_dict
+    for currency in data["lines"]:
+        if currency["currencyTypeName"] in BASE_CURRENCIES:
+            target_dict[currency["currencyTypeName"]] = currency["chaosEquivalent"]
+    return target_dict
+
+
+def extract_items(data: Dict, target_dict: Dict = None, name_key: str = "name",
+                  value_key: str = "chaosValue") -> Dict[str, float]:
+    """從數據中提取物品名稱和價格，分類到目標字典"""
+    target_dict = {} if target_dict is None else target_dict
+    for item in data["lines"]:
+        target_dict[item[name_key]] = item[value_key]
+    return target_dict
+
+
+def exchange_rate(want_price: float, have_price: float) -> float:
+    """以混沌石價值計算 I Want 與 I Have 的交換比率（1 個 I Want 需要多少 I Have）"""
+    return want_price / have_price
@@ -0,0 +1,184 @@
+import numpy as np
+from typing import List, Dict
+
+from .coin_routes import DEFAULT_FEES, CoinFees
+from .profit_engine import (
+    COLUMN_GRAPH, DERIVED_FIELDS, ITEM_INPUTS, SCALAR_INPUTS, SETTING_INPUTS, ProfitEngine, int_mask,
+    parse_divine_price
+)
+
+
+class RecomputeGraph:
+    """依欄位依賴圖做增量重算：只重算受影響的欄位，且只重算受影響的列"""
+
+    def __init__(self, items: List[Dict], current_chaos: float, dc_ratio: float, item_coin_value: float,
+                 fees: CoinFees = DEFAULT_FEES):
+        self.items = items
+        self.settings = {
+            "current_chaos": current_chaos,
+            "dc_ratio": dc_ratio,
+            "item_coin_value": item_coin_value,
+        }
+        self.fees = fees
+        self.last_stats: Dict[str, int] = {}
+        self.reset(items)
+
+    def reset(self, items: List[Dict]) -> int:
+        """重新建立所有欄位陣列並全部重算（物品列表被整體替換或重新排序時使用）"""
+        self.items = items
+        engine = ProfitEngine.from_items(items)
+        self.values: Dict[str, np.ndarray] = {
+            "receive_price": engine.receive_price,
+            "receive_price_is_int": engine.receive_price_is_int,
+            "sell_price": engine.sell_price,
+            "divine_sell_price": engine.divine_sell_price,
+        }
+        self.values.update(self.settings)
+        self.values.update(self.fees.route_inputs(self.settings["dc_ratio"]))
+        self.dirty: Dict[str, np.ndarray] = {}
+        self.dirty_settings = set()
+        self.invalidate_rows(range(len(items)))
+        return self.recompute()
+
+    def __len__(self):
+        return len(self.items)
+
+    def _mark(self, field: str, rows):
+        """標記單一輸入欄位的髒列"""
+        if field not in self.dirty:
+            self.dirty[field] = np.zeros(len(self.items), dtype=bool)
+        self.dirty[field][rows] = True
+
+    def set_setting(self, name: str, value: float):
+        """更新設定值（current_chaos、dc_ratio、item_coin_value），數值有變動才標記為髒"""
+        if name not in SETTING_INPUTS:
+            raise KeyError(f"未知的設定值: {name}")
+        if self.settings[name] != value:
+            self.settings[name] = value
+            self.values[name] = value
+            self.dirty_settings.add(name)
+            self._refresh_route_inputs()
+
+    def set_fees(self, fees: CoinFees):
+        """更換金幣費用表，只有成本有變動的路線需要重算"""
+        self.fees = fees
+        self._refresh_route_inputs()
+
+    def _refresh_route_inputs(self):
+        """設定值或費用表變動後重新計算各路線的單位金幣成本，數值有變動才標記為髒"""
+        for name, value in self.fees.route_inputs(self.settings["dc_ratio"]).items():
+            if self.values.get(name) != value:
+                self.values[name] = value
+                self.dirty_settings.add(name)
+
+    def update_settings(self, current_chaos: float, dc_ratio: float, item_coin_value: float):
+        """一次更新全部設定值"""
+        self.set_setting("current_chaos", current_chaos)
+        self.set_setting("dc_ratio", dc_ratio)
+        self.set_setting("item_coin_value", item_coin_value)
+
+    def set_item_value(self, row: int, field: str, value):
+        """更新單一物品的欄位；非輸入欄位被修改時，整列重算以覆蓋手動值"""
+        self.items[row][field] = value
+        if field in ITEM_INPUTS:
+            parsed = parse_divine_price(value) if field == "divine_sell_price" else value
+            self.values[field][row] = parsed
+            if field == "receive_price":
+                self.values["receive_price_is_int"][row] = int_mask([value])[0]
+            self._mark(field, row)
+        else:
+            self.invalidate_rows([row])
+
+    def set_item_values(self, field: str, rows, values):
+        """批次更新多個物品的同一輸入欄位，只標記這些列為髒，之後呼叫一次 recompute 即可"""
+        if field not in ITEM_INPUTS:
+            raise KeyError(f"只能批次更新輸入欄位: {field}")
+        rows = list(rows)
+        values = list(values)
+        for row, value in zip(rows, values):
+            self.items[row][field] = value
+        if field == "divine_sell_price":
+            values = [parse_divine_price(value) for value in values]
+        elif field == "receive_price":
+            self.values["receive_price_is_int"][rows] = int_mask(values)
+        self.values[field][rows] = values
+        self._mark(field, rows)
+
+    def invalidate_rows(self, rows):
+        """將指定列的所有輸入欄位標記為髒"""
+        rows = list(rows)
+        for field in ITEM_INPUTS:
+            self._mark(field, rows)
+
+    def append_item(self, item: Dict):
+        """新增物品並標記該列需要計算"""
+        self.items.append(item)
+        self.values["receive_price"] = np.append(self.values["receive_price"], float(item['receive_price']))
+        self.values["receive_price_is_int"] = np.append(self.values["receive_price_is_int"],
+                                                        int_mask([item['receive_price']]))
+        self.values["sell_price"] = np.append(self.values["sell_price"], float(item['sell_price']))
+        self.values["divine_sell_price"] = np.append(
+            self.values["divine_sell_price"], parse_divine_price(item['divine_sell_price'])
+        )
+        for name, _, _ in COLUMN_GRAPH:
+            if name in self.values:
+                self.values[name] = np.append(self.values[name], np.zeros(1, dtype=self.values[name].dtype))
+        for field, mask in self.dirty.items():
+            self.dirty[field] = np.append(mask, False)
+        self.invalidate_rows([len(self.items) - 1])
+
+    def remove_item(self, row: int):
+        """刪除物品，其餘列的計算結果不受影響"""
+        del self.items[row]
+        for name in list(self.values):
+            if isinstance(self.values[name], np.ndarray):
+                self.values[name] = np.delete(self.values[name], row)
+        for field, mask in self.dirty.items():
+            self.dirty[field] = np.delete(mask, row)
+
+    def recompute(self) -> int:
+        """重算所有髒欄位的髒列並寫回物品字典，回傳重算的儲存格數量"""
+        row_count = len(self.items)
+        full = np.ones(row_count, dtype=bool)
+        masks = dict(self.dirty)
+        for name in self.dirty_settings:
+            masks[name] = full
+
+        stats = {}
+        for name, dependencies, kernel in COLUMN_GRAPH:
+            mask = None
+            for dependency in dependencies:
+                dependency_mask = masks.get(dependency)
+                if dependency_mask is not None:
+                    mask = dependency_mask.copy() if mask is None else mask | dependency_mask
+            if mask is None or not mask.any():
+                continue
+            masks[name] = mask
+
+            rows = np.flatnonzero(mask)
+            if rows.size == row_count or name not in self.values:
+                # 全部列都需要重算時直接整欄計算
+                self.values[name] = kernel(*(self.values[dependency] for dependency in dependencies))
+            else:
+                arguments = [
+                    self.values[dependency] if dependency in SCALAR_INPUTS else self.values[dependency][rows]
+                    for dependency in dependencies
+                ]
+                self.values[name][rows] = kernel(*arguments)
+            stats[name] = int(rows.size)
+
+        self._write_back(masks)
+        self.dirty = {}
+        self.dirty_settings = set()
+        self.last_stats = stats
+        return sum(stats.values())
+
+    def _write_back(self, masks: Dict[str, np.ndarray]):
+        """只把重算過的儲存格寫回物品字典"""
+        for field in DERIVED_FIELDS:
+            mask = masks.get(field)
+            if mask is None:
+                continue
+            rows = np.flatnonzero(mask)
+            for row, value in zip(rows.tolist(), ProfitEngine.to_values(field, self.values, rows)):
+                self.items[row][field] = value
@@ -0,0 +1,157 @@
+import math
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .coin_routes import DEFAULT_FEES, CoinFees
+from .profit_engine import SETTING_INPUTS, ProfitEngine
+
+# 預設輸出的欄位：兩種賣法的總利潤
+DEFAULT_SWEEP_FIELDS = ("total_profit_c_to_c", "total_profit_c_to_d")
+
+# 每批計算的 情境數 x 物品數 上限；計算中間約有 20 個同樣大小的欄位陣列，控制尖峰記憶體
+CHUNK_CELLS = 1 << 18
+
+
+def parse_grid(text: str) -> List[float]:
+    """解析情境數值："150"、"140,150,160" 或 "起點:終點:間隔"（含終點，例如 "140:160:5"）"""
+    text = text.strip()
+    try:
+        if ":" in text:
+            start, stop, step = (float(part) for part in text.split(":"))
+            if step <= 0:
+                raise ValueError
+            count = int(math.floor((stop - start) / step + 1e-9)) + 1
+            return [round(start + index * step, 10) for index in range(max(count, 0))]
+        return [float(part) for part in text.split(",") if part.strip()]
+    except ValueError:
+        raise ValueError(f"無效的數值範圍: {text}（例如: 150、140,150,160 或 140:160:5）")
+
+
+def break_even_dc(engine: ProfitEngine) -> np.ndarray:
+    """C買D賣 損益兩平的 DC 比率（神聖石販賣價格換算的混沌石等於購買價格），神聖石價格 <= 0 時為 inf"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(engine.divine_sell_price > 0, engine.receive_price / engine.divine_sell_price, np.inf)
+
+
+def crossover_dc(engine: ProfitEngine) -> np.ndarray:
+    """DC 比率高於此值時 C買D賣 比 C收C賣 更賺（神聖石販賣價格換算的混沌石等於混沌石販賣價格）"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(engine.divine_sell_price > 0, engine.sell_price / engine.divine_sell_price, np.inf)
+
+
+def _sweep_chunk(engine: ProfitEngine, settings: np.ndarray, fields: Sequence[str],
+                 fees: CoinFees = DEFAULT_FEES) -> Dict[str, np.ndarray]:
+    """計算一批情境：settings 每列為 (current_chaos, dc_ratio, item_coin_value)，回傳 {欄位: (情境數, 物品數)}"""
+    # 設定值為 (情境數, 1) 的欄向量，與 (物品數,) 的價格陣列廣播成 情境 x 物品
+    result = engine.compute(*(settings[:, [index]] for index in range(len(SETTING_INPUTS))), fees)
+    shape = (len(settings), len(engine))
+    return {field: np.broadcast_to(result[field], shape).astype(np.float64) for field in fields}
+
+
+def sweep(engine: ProfitEngine, dc_ratios: Iterable[float], current_chaos: Iterable[float],
+          item_coin_values: Iterable[float], fields: Sequence[str] = DEFAULT_SWEEP_FIELDS,
+          max_workers: Optional[int] = None, fees: CoinFees = DEFAULT_FEES) -> Dict[str, np.ndarray]:
+    """在 (dc_ratio, current_chaos, item_coin_value) 網格上計算 ItemCalculator 的利潤模型
+
+    所有情境以同一組向量化公式一次計算（結果與逐一呼叫 ItemCalculator.calculate_profit 相同），
+    情境數多時分批進行以限制記憶體；max_workers > 1 時各批交給多個行程同時計算。
+
+    回傳 {"dc_ratio", "current_chaos", "item_coin_value": 網格各軸的數值,
+          欄位: 形狀為 (DC 比率數, 混沌石數, 金幣價值數, 物品數) 的利潤曲面,
+          "break_even_dc", "crossover_dc": 每個物品的 DC 比率門檻}。
+    """
+    axes = {
+        "dc_ratio": np.asarray(list(dc_ratios), dtype=np.float64),
+        "current_chaos": np.asarray(list(current_chaos), dtype=np.float64),
+        "item_coin_value": np.asarray(list(item_coin_values), dtype=np.float64),
+    }
+    grid_shape = tuple(len(axes[name]) for name in ("dc_ratio", "current_chaos", "item_coin_value"))
+    # 攤平成 (情境數, 3)，欄位順序與 ProfitEngine.compute 的參數相同
+    dc_grid, chaos_grid, coin_grid = np.meshgrid(axes["dc_ratio"], axes["current_chaos"], axes["item_coin_value"],
+                                                 indexing="ij")
+    grid = {"dc_ratio": dc_grid, "current_chaos": chaos_grid, "item_coin_value": coin_grid}
+    settings = np.stack([grid[name].ravel() for name in SETTING_INPUTS], axis=1)
+
+    rows = max(1, CHUNK_CELLS // max(1, len(engine)))
+    chunks = [settings[start:start + rows] for start in range(0, len(settings), rows)]
+    if max_workers is not None and max_workers > 1 and len(chunks) > 1:
+        # 只有多行程計算才載入 multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parts = list(executor.map(_sweep_chunk, [engine] * len(chunks), chunks, [fields] * len(chunks),
+                                      [fees] * len(chunks)))
+    else:
+        parts = [_sweep_chunk(engine, chunk, fields, fees) for chunk in chunks]
+
+    result = dict(axes)
+    for field in fields:
+        column = np.concatenate([part[field] for part in parts]) if parts else np.empty((0, len(engine)))
+        result[field] = column.reshape(grid_shape + (len(engine),))
+    result["break_even_dc"] = break_even_dc(engine)
+    result["crossover_dc"] = crossover_dc(engine)
+    return result
+
+
+def sweep_items(items: List[Dict], dc_ratios: Iterable[float], current_chaos: Iterable[float],
+                item_coin_values: Iterable[float], fields: Sequence[str] = DEFAULT_SWEEP_FIELDS,
+                max_workers: Optional[int] = None, fees: CoinFees = DEFAULT_FEES) -> Dict[str, np.ndarray]:
+    """由物品字典列表進行情境分析，物品順序與結果的最後一軸相同"""
+    return sweep(ProfitEngine.from_items(items), dc_ratios, current_chaos, item_coin_values, fields, max_workers,
+                 fees)
+
+
+def summarize(items: List[Dict], result: Dict[str, np.ndarray], field: str = "total_profit_c_to_d") -> List[Dict]:
+    """每個物品在所有情境中的最低、最高利潤與 DC 比率門檻"""
+    surface = result[field].reshape(-1, len(items))
+    if len(surface) == 0:
+        return []
+    lowest, highest = surface.min(axis=0).tolist(), surface.max(axis=0).tolist()
+    return [
+        {
+            "item_name": item.get("item_name", ""),
+            "min_profit": low,
+            "max_profit": high,
+            "break_even_dc": break_even,
+            "crossover_dc": crossover,
+        }
+        for item, low, high, break_even, crossover in zip(
+            items, lowest, highest, result["break_even_dc"].tolist(), result["crossover_dc"].tolist())
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+    import csv
+
+    from .item_store import open_item_store
+
+    # 讀取已保存的物品，輸出每個物品在網格上的利潤範圍與 DC 比率門檻
+    parser = argparse.ArgumentParser(description="DC 比率、混沌石、金幣價值的情境分析")
+    parser.add_argument("data_file", help="物品資料（.json 或 .db）")
+    parser.add_argument("--dc", required=True, help="DC 比率，例如 140:160:5")
+    parser.add_argument("--chaos", help="混沌石數量，預設為資料中的值")
+    parser.add_argument("--coin", help="物品金幣價值，預設為資料中的值")
+    parser.add_argument("--field", default="total_profit_c_to_d", help="彙總的欄位")
+    parser.add_argument("--workers", type=int, help="同時計算的行程數")
+    parser.add_argument("--output", help="輸出 CSV 路徑，預設印出")
+    args = parser.parse_args()
+
+    data = open_item_store(args.data_file).load() or {"items": []}
+    items = data.get("items", [])
+    chaos = parse_grid(args.chaos) if args.chaos else [data.get("current_chaos", 0.0)]
+    coin = parse_grid(args.coin) if args.coin else [data.get("item_coin_value", 0.0)]
+    fees = CoinFees.from_dict(data.get("coin_fees", {}))
+    result = sweep_items(items, parse_grid(args.dc), chaos, coin, (args.field,), args.workers, fees)
+    rows = summarize(items, result, args.field)
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["item_name", "min_profit", "max_profit", "break_even_dc", "crossover_dc"])
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"已寫入 {len(rows)} 個物品到 {args.output}")
+    else:
+        for row in rows:
+            print(f"{row['item_name']}: 利潤 {row['min_profit']:.2f} ~ {row['max_profit']:.2f}C，"
+                  f"損益兩平 DC {row['break_even_dc']:.2f}，D賣優於C賣 DC {row['crossover_dc']:.2f}")
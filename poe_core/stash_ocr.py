@@ -0,0 +1,269 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 從倉庫截圖辨識混沌石與神聖石數量（window.py 的擷取流程，改為可重複使用、可離線以截圖檔執行）。
+# 影像與辨識套件（Pillow、numpy、cv2、pytesseract）只在實際處理影像時才載入，import 這個模組不需要它們。
+
+# Tesseract 的路徑（Windows 預設安裝位置）；其他系統在 PATH 中找得到 tesseract 時設為 None 即可
+TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+# 螢幕解析度與 Path of Exile 視窗解析度，區域座標依兩者的比例縮放（與原本的 window.py 相同）
+SCREEN_RESOLUTION = (1920, 1080)
+GAME_RESOLUTION = (1600, 900)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+# 快取的區域數上限（預處理後的影像與辨識結果各一份）
+CACHE_SIZE = 256
+
+
+class Region:
+    """倉庫中一個數字的位置：遊戲內座標 (x, y)、擷取大小與 Tesseract 的 psm 模式"""
+
+    def __init__(self, name: str, x: int, y: int, width: int = 60, height: int = 50, psm: str = "7"):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.psm = psm
+
+    def box(self, scale: Tuple[float, float], origin: Tuple[int, int] = (0, 0)) -> Tuple[int, int, int, int]:
+        """依縮放比例換算為影像中的 (left, top, right, bottom)"""
+        left = origin[0] + int(self.x * scale[0])
+        top = origin[1] + int(self.y * scale[1])
+        return left, top, left + int(self.width * scale[0]), top + int(self.height * scale[1])
+
+
+# 混沌石與神聖石數字的位置（經過調整的座標）；混沌石可能是四位數以上，以 psm 6 辨識
+STASH_REGIONS = (
+    Region("chaos", 530, 280, psm="6"),
+    Region("divine", 580, 340, psm="7"),
+)
+
+
+def default_scale() -> Tuple[float, float]:
+    return GAME_RESOLUTION[0] / SCREEN_RESOLUTION[0], GAME_RESOLUTION[1] / SCREEN_RESOLUTION[1]
+
+
+def minimal_preprocess_image(image):
+    """圖片輕度預處理：轉灰階、增強對比度並以高斯模糊去除部分噪聲"""
+    import cv2
+    import numpy as np
+
+    gray_image = cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2GRAY)
+    contrast_image = cv2.convertScaleAbs(gray_image, alpha=1.5, beta=20)
+    return cv2.GaussianBlur(contrast_image, (3, 3), 0)
+
+
+def tesseract_digits(image, psm: str = "7") -> str:
+    """使用 Tesseract 提取數字，只保留數字字元"""
+    import pytesseract
+
+    if TESSERACT_CMD and os.path.exists(TESSERACT_CMD):
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    text = pytesseract.image_to_string(image, config=f"--psm {psm} digits")
+    return ''.join(filter(str.isdigit, text))
+
+
+def load_image(source):
+    """接受檔案路徑或 PIL 影像（例如 pyautogui.screenshot() 的結果），統一轉為 RGB"""
+    if isinstance(source, (str, os.PathLike)):
+        from PIL import Image
+
+        with Image.open(source) as image:
+            return image.convert("RGB")
+    return source if source.mode == "RGB" else source.convert("RGB")
+
+
+def iter_image_paths(directory: str) -> List[str]:
+    """目錄中的截圖檔（依檔名排序）"""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+class StashReading:
+    """一張截圖的辨識結果：各區域的數量（辨識不到時為 None）與各階段耗時（毫秒）"""
+
+    def __init__(self, source: str, quantities: Dict[str, Optional[int]], timings: Dict[str, float]):
+        self.source = source
+        self.quantities = quantities
+        self.timings = timings
+
+    @property
+    def chaos(self) -> Optional[int]:
+        return self.quantities.get("chaos")
+
+    @property
+    def divine(self) -> Optional[int]:
+        return self.quantities.get("divine")
+
+
+class StashReader:
+    """倉庫截圖辨識：擷取區域 -> 預處理 -> 辨識 -> 轉為數量
+
+    預處理後的影像與辨識結果以區域像素的雜湊快取，倉庫數字沒有變動時不必重新辨識；
+    多個區域（以及多張截圖）的辨識交給執行緒池同時進行（Tesseract 在外部行程執行，不受 GIL 限制）。
+    recognize 可換成其他辨識函式 recognize(預處理後的影像, psm) -> 數字字串。
+    """
+
+    def __init__(self, regions: Iterable[Region] = STASH_REGIONS, scale: Optional[Tuple[float, float]] = None,
+                 recognize: Callable = tesseract_digits, preprocess: Callable = minimal_preprocess_image,
+                 max_workers: int = 4, save_crops: Optional[str] = None):
+        self.regions = tuple(regions)
+        self.scale = scale or default_scale()
+        self.recognize = recognize
+        self.preprocess = preprocess
+        self.max_workers = max_workers
+        self.save_crops = save_crops  # 保存預處理後的區域影像以便調整座標（None 時不寫檔）
+        self.lock = threading.Lock()
+        self.preprocessed = OrderedDict()  # 區域雜湊 -> 預處理後的影像
+        self.texts = OrderedDict()  # (區域雜湊, psm) -> 辨識出的數字字串
+        self.stats = {"regions": 0, "preprocess_hits": 0, "recognize_hits": 0}
+
+    # ---- 快取 ----
+
+    @staticmethod
+    def region_hash(crop) -> str:
+        """區域像素的雜湊（含大小與色彩模式），相同畫面得到相同的鍵"""
+        digest = hashlib.blake2b(crop.tobytes(), digest_size=16)
+        digest.update(f"{crop.size}{crop.mode}".encode())
+        return digest.hexdigest()
+
+    def _cached(self, cache: OrderedDict, key, stat: str):
+        with self.lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+                self.stats[stat] += 1
+            return value
+
+    def _store(self, cache: OrderedDict, key, value):
+        with self.lock:
+            cache[key] = value
+            while len(cache) > CACHE_SIZE:
+                cache.popitem(last=False)
+
+    # ---- 各階段 ----
+
+    def crop_regions(self, image, origin: Tuple[int, int] = (0, 0)) -> List[Tuple[Region, object]]:
+        """擷取各區域；區域超出影像範圍時（例如不是倉庫截圖的小圖）拋出 ValueError，而不是以黑色補滿後辨識"""
+        crops = []
+        for region in self.regions:
+            box = region.box(self.scale, origin)
+            if box[0] < 0 or box[1] < 0 or box[2] > image.width or box[3] > image.height:
+                raise ValueError(f"{region.name} 區域 {box} 超出截圖範圍 {image.size}，可能不是倉庫截圖")
+            crops.append((region, image.crop(box)))
+        return crops
+
+    def _prepare(self, region: Region, crop, label: str):
+        """（執行緒池）預處理一個區域，回傳 (快取鍵, 預處理後的影像, 耗時毫秒)"""
+        start = time.perf_counter()
+        key = self.region_hash(crop)
+        processed = self._cached(self.preprocessed, key, "preprocess_hits")
+        if processed is None:
+            processed = self.preprocess(crop)
+            self._store(self.preprocessed, key, processed)
+            if self.save_crops:
+                import cv2
+
+                os.makedirs(self.save_crops, exist_ok=True)
+                cv2.imwrite(os.path.join(self.save_crops, f"{label}_{region.name}.png"), processed)
+        return key, processed, (time.perf_counter() - start) * 1000
+
+    def _recognize(self, region: Region, key: str, processed):
+        """（執行緒池）辨識一個區域，回傳 (數字字串, 耗時毫秒)"""
+        start = time.perf_counter()
+        text = self._cached(self.texts, (key, region.psm), "recognize_hits")
+        if text is None:
+            text = self.recognize(processed, region.psm)
+            self._store(self.texts, (key, region.psm), text)
+        return text, (time.perf_counter() - start) * 1000
+
+    def _read_region(self, region: Region, crop, label: str):
+        key, processed, prepare_ms = self._prepare(region, crop, label)
+        text, recognize_ms = self._recognize(region, key, processed)
+        return text, prepare_ms, recognize_ms
+
+    # ---- 入口 ----
+
+    def read_many(self, sources: Iterable, origin: Tuple[int, int] = (0, 0)) -> List[StashReading]:
+        """辨識多張截圖（檔案路徑或 PIL 影像），所有區域同時辨識，依輸入順序回傳結果"""
+        jobs = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for index, source in enumerate(sources):
+                label = os.path.splitext(os.path.basename(source))[0] if isinstance(source, str) else str(index)
+                start = time.perf_counter()
+                image = load_image(source)
+                load_ms = (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+                try:
+                    crops = self.crop_regions(image, origin)
+                except ValueError as e:
+                    raise ValueError(f"{label}: {e}") from e
+                crop_ms = (time.perf_counter() - start) * 1000
+                futures = [(region, pool.submit(self._read_region, region, crop, label)) for region, crop in crops]
+                jobs.append((source if isinstance(source, str) else label, load_ms, crop_ms, time.perf_counter(),
+                             futures))
+
+            readings = []
+            for source, load_ms, crop_ms, submitted, futures in jobs:
+                quantities = {}
+                timings = {"load": load_ms, "crop": crop_ms, "preprocess": 0.0, "recognize": 0.0}
+                for region, future in futures:
+                    text, prepare_ms, recognize_ms = future.result()
+                    quantities[region.name] = int(text) if text else None
+                    # 各區域的預處理與辨識時間加總（同時執行時大於牆上時間）
+                    timings["preprocess"] += prepare_ms
+                    timings["recognize"] += recognize_ms
+                timings["wall"] = load_ms + crop_ms + (time.perf_counter() - submitted) * 1000
+                with self.lock:
+                    self.stats["regions"] += len(futures)
+                readings.append(StashReading(source, quantities, timings))
+        return readings
+
+    def read(self, source, origin: Tuple[int, int] = (0, 0)) -> StashReading:
+        """辨識一張截圖（檔案路徑或 PIL 影像）"""
+        return self.read_many([source], origin)[0]
+
+    def read_directory(self, directory: str) -> List[StashReading]:
+        """辨識目錄中的所有截圖"""
+        return self.read_many(iter_image_paths(directory))
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    # 離線辨識截圖檔，例如 python -m poe_core.stash_ocr Error/3.png 或整個目錄
+    parser = argparse.ArgumentParser(description="從倉庫截圖辨識混沌石與神聖石數量")
+    parser.add_argument("sources", nargs="+", help="截圖檔或目錄")
+    parser.add_argument("--tesseract-cmd", help=f"tesseract 執行檔路徑（預設 {TESSERACT_CMD} 或 PATH）")
+    parser.add_argument("--save-crops", help="將預處理後的區域影像存到此目錄")
+    parser.add_argument("--workers", type=int, default=4, help="同時辨識的區域數")
+    parser.add_argument("--repeat", type=int, default=1, help="重複辨識次數（第二次起使用快取）")
+    args = parser.parse_args()
+
+    if args.tesseract_cmd:
+        TESSERACT_CMD = args.tesseract_cmd
+    paths = []
+    for source in args.sources:
+        paths.extend(iter_image_paths(source) if os.path.isdir(source) else [source])
+    reader = StashReader(max_workers=args.workers, save_crops=args.save_crops)
+    try:
+        for attempt in range(args.repeat):
+            for reading in reader.read_many(paths):
+                timings = "、".join(f"{stage} {ms:.1f} ms" for stage, ms in reading.timings.items())
+                print(f"{reading.source}: 混沌石 {reading.chaos}，神聖石 {reading.divine}（{timings}）")
+    except (ImportError, OSError, ValueError) as e:
+        print(f"錯誤: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"區域 {reader.stats['regions']} 個，預處理快取命中 {reader.stats['preprocess_hits']}，"
+          f"辨識快取命中 {reader.stats['recognize_hits']}")
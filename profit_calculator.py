@@ -1,28 +1,41 @@
-import json
 import os
+from poe_core import SQLiteItemStore, is_sqlite_path, coin_adjusted_profits, read_json, write_json
+from poe_core import COIN_PER_CHAOS  # 金幣折合混沌石的比值（與其他前端共用的費用表）
 
 # 建立一個列表來存儲所有品項的數據
 items = []
 
-# 文件名常量
+# 文件名常量（改成 .db 檔名即使用 SQLite 儲存：啟動時不載入全部物品，查詢走索引）
 DATA_FILE = "items_data.json"
+store = SQLiteItemStore(DATA_FILE) if is_sqlite_path(DATA_FILE) else None
 
 def load_items_from_file():
     # 從文件中加載已保存的數據
     global items
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            items = json.load(f)
+    if store is not None:
+        # SQLite 模式只記住本次輸入的物品，其餘資料留在資料庫中
+        print(f"已連接資料庫，共 {store.count()} 個已保存的物品數據。")
+    elif os.path.exists(DATA_FILE):
+        items = read_json(DATA_FILE)
         print(f"已加載 {len(items)} 個已保存的物品數據。")
     else:
         print("沒有找到數據文件，將從空數據開始。")
 
 def save_items_to_file():
     # 將數據保存到文件中
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(items, f, ensure_ascii=False, indent=4)
+    # SQLite 模式下每筆變更都已由 save_item 即時寫入
+    if store is None:
+        write_json(DATA_FILE, items)
     print("物品數據已保存到文件。")
 
+def save_item(item):
+    # 保存單一物品（SQLite 模式只寫入這一筆）
+    if store is not None:
+        store.upsert_item(item)
+        print("物品數據已保存到資料庫。")
+    else:
+        save_items_to_file()
+
 def input_item_data():
     # 輸入物品名稱和價格信息
     item_name = input("請輸入物品名稱: ")
@@ -58,28 +71,16 @@ def input_item_data():
     }
 
 def calculate_profit(item, chaos_to_divine_ratio, chaos_to_coin_ratio):
-    # 計算C賣出的利潤
-    chaos_profit = item["chaos_sell"] - item["chaos_buy"]
-    
-    # 將D賣出的價格轉換為C，並計算利潤
-    divine_sell_in_chaos = item["divine_sell"] * chaos_to_divine_ratio
-    divine_profit = divine_sell_in_chaos - item["chaos_buy"]
-    
+    # 計算C賣出、D賣出（折合C）的利潤，以及扣除金幣成本後的最終利潤
+    result = coin_adjusted_profits(item, chaos_to_divine_ratio, chaos_to_coin_ratio)
+
     # 顯示利潤分析
     print(f"\n{item['name']} 的利潤分析:")
-    print(f" - C賣出利潤: {chaos_profit:.2f}C")
-    print(f" - D賣出利潤折合C: {divine_profit:.2f}C")
-    
-    # 計算物品的金幣成本並將其轉換為C成本
-    item_cost_in_chaos = item["coin_value"] / chaos_to_coin_ratio
-    print(f" - {item['name']} 的金幣成本折合C: {item_cost_in_chaos:.2f}C")
-
-    # 計算扣除金幣成本後的最終利潤
-    final_chaos_profit = chaos_profit - item_cost_in_chaos
-    final_divine_profit = divine_profit - item_cost_in_chaos
-
-    print(f" - 扣除金幣成本後的C賣出最終利潤: {final_chaos_profit:.2f}C")
-    print(f" - 扣除金幣成本後的D賣出最終利潤（折合C）: {final_divine_profit:.2f}C")
+    print(f" - C賣出利潤: {result['chaos_profit']:.2f}C")
+    print(f" - D賣出利潤折合C: {result['divine_profit']:.2f}C")
+    print(f" - {item['name']} 的金幣成本折合C: {result['item_cost_in_chaos']:.2f}C")
+    print(f" - 扣除金幣成本後的C賣出最終利潤: {result['final_chaos_profit']:.2f}C")
+    print(f" - 扣除金幣成本後的D賣出最終利潤（折合C）: {result['final_divine_profit']:.2f}C")
 
     # 根據庫存推薦最快賣出的方式
     print(f"\n{item['name']} 的庫存分析:")
@@ -87,7 +88,7 @@ def calculate_profit(item, chaos_to_divine_ratio, chaos_to_coin_ratio):
     print(f" - C販賣庫存量: {item['chaos_sell_stock']}")
     print(f" - D販賣庫存量: {item['divine_sell_stock']}")
 
-    if item["divine_sell_stock"] > item["chaos_sell_stock"]:
+    if result["recommended"] == "D":
         print(f"推薦使用D進行交易，因為庫存量較多，賣出會更快。")
     else:
         print(f"推薦使用C進行交易，因為庫存量較多，賣出會更快。")
@@ -95,7 +96,11 @@ def calculate_profit(item, chaos_to_divine_ratio, chaos_to_coin_ratio):
 def query_items(keyword, chaos_to_divine_ratio, chaos_to_coin_ratio):
     # 根據關鍵字查詢已存儲的品項
     print(f"\n關鍵字 '{keyword}' 的查詢結果:")
-    found_items = [item for item in items if keyword.lower() in item["name"].lower()]
+    if store is not None:
+        # 由資料庫的全文索引或 LIKE 查詢，不需要掃描全部物品
+        found_items = store.search(keyword)
+    else:
+        found_items = [item for item in items if keyword.lower() in item["name"].lower()]
     
     if found_items:
         for item in found_items:
@@ -121,22 +126,45 @@ def query_items(keyword, chaos_to_divine_ratio, chaos_to_coin_ratio):
                     calculate_profit(item, chaos_to_divine_ratio, chaos_to_coin_ratio)
                     
                     # 保存修改後的數據
-                    save_items_to_file()
+                    save_item(item)
                 except ValueError:
                     print("請輸入正確的數字格式。")
     else:
         print("沒有找到匹配的品項。")
 
+def allocate_chaos(chaos_to_divine_ratio, chaos_to_coin_ratio):
+    # 在所有已保存的物品間分配混沌石，不超過各物品的庫存量與金幣預算
+    try:
+        current_chaos = float(input("請輸入可用的混沌石數量: "))
+        coin_budget_str = input("請輸入可用的金幣數量（留空為不限）: ").strip()
+        coin_budget = float(coin_budget_str) if coin_budget_str else None
+    except ValueError:
+        print("請輸入正確的數字格式")
+        return
+
+    from poe_core.portfolio import PortfolioCandidates, bound_text, optimize_portfolio  # 需要 numpy，只在使用時載入
+
+    all_items = list(store.iter_items()) if store is not None else items
+    candidates = PortfolioCandidates.from_stock_items(all_items, chaos_to_divine_ratio, chaos_to_coin_ratio)
+    result = optimize_portfolio(candidates, current_chaos, coin_budget)
+
+    print("\n最佳分配:")
+    for allocation in result["allocations"]:
+        print(f" - {allocation['item_name']}（{allocation['route']}賣出）: {allocation['quantity']} 個，"
+              f"需要 {allocation['chaos']:.2f}C、金幣 {allocation['coin']:.2f}，利潤 {allocation['profit']:.2f}C")
+    print(f"總利潤: {result['total_profit']:.2f}C（{bound_text(result)}）")
+    print(f"使用混沌石: {result['chaos_used']:.2f}C，使用金幣: {result['coin_used']:.2f}")
+
 def main():
     # 每次運行程式時從文件加載數據
     load_items_from_file()
 
     # 固定的C對D比值
     chaos_to_divine_ratio = float(input("請輸入D與C的比值: "))
-    chaos_to_coin_ratio = 25
+    chaos_to_coin_ratio = COIN_PER_CHAOS
 
     while True:
-        action = input("請選擇操作: (1) 輸入新物品 (2) 查詢物品 (3) 結束: ")
+        action = input("請選擇操作: (1) 輸入新物品 (2) 查詢物品 (3) 結束 (4) 分配混沌石: ")
 
         if action == '1':
             # 輸入並計算新的物品
@@ -144,7 +172,7 @@ def main():
             if item_data is not None:
                 items.append(item_data)  # 保存物品數據
                 calculate_profit(item_data, chaos_to_divine_ratio, chaos_to_coin_ratio)
-                save_items_to_file()  # 保存數據到文件
+                save_item(item_data)  # 保存數據到文件
         
         elif action == '2':
             # 查詢物品
@@ -155,6 +183,10 @@ def main():
             save_items_to_file()  # 程式結束前保存數據
             break
 
+        elif action == '4':
+            # 依庫存量與金幣預算分配混沌石
+            allocate_chaos(chaos_to_divine_ratio, chaos_to_coin_ratio)
+
         else:
             print("無效操作，請重新選擇。")
 
@@ -1,7 +1,9 @@
+import startup_profile  # 必須最先載入：--profile-startup 時記錄各模組的載入時間
 import tkinter as tk
 from tkinter import messagebox, ttk, END, simpledialog
 import json
 import os
+from poe_core import bill_trade, parse_fraction as parse_number, read_json, write_json  # 計算與儲存（與其他前端共用）
 
 # 文件名常量
 DATA_FILE = "items_data.json"
@@ -12,8 +14,7 @@ def load_items_from_file():
     global items
     if os.path.exists(DATA_FILE):
         try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                items = json.load(f)
+            items = read_json(DATA_FILE)
         except json.JSONDecodeError:
             items = []
             print("歷史紀錄檔案內容有誤，將重新建立。")
@@ -24,19 +25,14 @@ def load_items_from_file():
 # 保存數據
 def save_items_to_file():
     try:
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(items, f, ensure_ascii=False, indent=4)
+        write_json(DATA_FILE, items)
     except Exception as e:
         messagebox.showerror("錯誤", f"保存數據時發生錯誤: {e}")
 
 # 將輸入中的分數轉換為小數
 def parse_fraction(input_str):
     try:
-        if '/' in input_str:
-            numerator, denominator = input_str.split('/')
-            return float(numerator) / float(denominator)
-        else:
-            return float(input_str)
+        return parse_number(input_str)
     except ValueError:
         raise ValueError("請輸入有效的分數或數字。")
 
@@ -184,42 +180,17 @@ def calculate_profit(tree):
         current_chaos = float(current_chaos_input) if current_chaos_input else 0.0  # 現有混沌石數量
         current_divine = float(current_divine_input) if current_divine_input else 0.0  # 現有神聖石數量
 
-        # 計算換D賣的等價價值
-        sell_div_num_chaos = (1 / bill1) * dc_ratio if bill1 != 0 else 0
-
-        # 計算各項費用和收益
-        receive_chaos = receive_price  # 收裝備用的C (chaos)
-        receive_coin = item_coin_value  # 收東西花費的金幣
-        sell_chaos = sell_price  # 賣東西的C (chaos)
-        sell_coin = sell_price * 25  # 賣東西花費的金幣
-        extra_coin = sell_div_num_chaos * 25  # 換D時額外消耗的金幣
-
-        # 計算D換C的金幣成本
-        d_to_c_coin_cost = dc_ratio * 25  # D換C的金幣成本
-
-        # 計算C收C賣的利潤
-        prof_c_to_c = sell_chaos - receive_chaos
-
-        # 計算C買D賣的利潤
-        prof_c_to_d = sell_div_num_chaos - receive_chaos
-
-        # 計算賺取1C所需的金幣成本（C收C賣）
-        if prof_c_to_c != 0:
-            coin_cost_c_to_c = (receive_coin + sell_coin) / prof_c_to_c
-        else:
-            coin_cost_c_to_c = 0
-
-        # 計算賺取1C所需的金幣成本（C買D賣，含D換C成本）
-        if prof_c_to_d != 0:
-            total_coin_cost_c_to_d = receive_coin + extra_coin + d_to_c_coin_cost  # 包括D換C的成本
-            coin_cost_c_to_d = total_coin_cost_c_to_d / prof_c_to_d
-        else:
-            coin_cost_c_to_d = 0
-
-        # 計算可購買的物品數量
-        purchasable_with_chaos = int(current_chaos // receive_price) if receive_price > 0 else 0
-        purchasable_with_divine = int((current_divine * dc_ratio) // receive_price) if receive_price > 0 else 0
-        total_purchasable = purchasable_with_chaos + purchasable_with_divine
+        # 計算利潤、金幣成本和可購買數量
+        trade = bill_trade(receive_price, sell_price, dc_ratio, item_coin_value, bill1, current_chaos, current_divine)
+        sell_div_num_chaos = trade['sell_div_num_chaos']
+        prof_c_to_c = trade['profit_c_to_c']
+        prof_c_to_d = trade['profit_c_to_d']
+        coin_cost_c_to_c = trade['coin_cost_c_to_c']
+        coin_cost_c_to_d = trade['coin_cost_c_to_d']
+        d_to_c_coin_cost = trade['d_to_c_coin_cost']
+        purchasable_with_chaos = trade['purchasable_with_chaos']
+        purchasable_with_divine = trade['purchasable_with_divine']
+        total_purchasable = trade['total_purchasable']
 
         # 顯示結果
         result = (
@@ -281,6 +252,7 @@ def calculate_profit(tree):
 # 主函數
 def main():
     root = tk.Tk()
+    startup_profile.mark("建立 Tk")
     root.title("交易計算器")
 
     # 設置主框架
@@ -410,8 +382,11 @@ def main():
     load_items_from_file()
     for item in items:
         display_item_in_treeview(tree, item)
+    startup_profile.mark("建立視窗")
+    startup_profile.finish_after_first_paint(root, "profit_calculator_gui")
 
     root.mainloop()
 
 if __name__ == "__main__":
+    startup_profile.mark("載入模組")
     main()
@@ -0,0 +1,150 @@
+import _thread
+import builtins
+import sys
+import time
+
+# 啟動時間分析：以 --profile-startup 啟動前端時，記錄各模組的載入時間與各啟動階段的耗時，
+# 第一個畫面繪製完成後印出報告並關閉視窗。必須是進入點的第一個 import，且本身只載入最基本的標準模組（不含 typing）。
+# 打包後的執行檔同樣適用（不依賴 python -X importtime）；直譯器本身的啟動時間不在報告內。
+
+# 各進入點 import 的時間預算（毫秒，python -X importtime 量測，不含 Tk 視窗）
+IMPORT_BUDGET_MS = {
+    "Profit_v2": 180,
+    "Profit_Final": 80,
+    "Exchange": 80,
+    "item_manager_app": 80,
+    "profit_calculator_gui": 80,
+    "Profit_calculator_gui_plus": 80,
+    "profit_calculator": 60,
+}
+
+ENABLED = "--profile-startup" in sys.argv
+if ENABLED:
+    # 從參數中移除，不影響前端自己的參數解析
+    sys.argv = [arg for arg in sys.argv if arg != "--profile-startup"]
+
+START = time.perf_counter()
+
+
+class ImportTimer:
+    """替換 builtins.__import__，記錄主執行緒第一次載入每個模組的耗時（自身與含子模組）"""
+
+    def __init__(self):
+        self.records = []  # (模組, 自身秒數, 含子模組秒數)
+        self.stack = []  # 每層正在載入的模組已花在子模組上的時間
+        self.thread = _thread.get_ident()
+        self.original = builtins.__import__
+
+    def install(self):
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        builtins.__import__ = self.original
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module = name
+        if level and globals:
+            # 相對 import：依呼叫端的套件換算成完整名稱
+            package = (globals.get("__package__") or "").rsplit(".", level - 1)[0]
+            module = f"{package}.{name}" if name else package
+        if module in sys.modules or _thread.get_ident() != self.thread:
+            return self.original(name, globals, locals, fromlist, level)
+        self.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self.original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += elapsed
+            self.records.append((module, elapsed - children, elapsed))
+
+    def by_package(self) -> list:
+        """依最上層套件加總自身時間，由多到少排序"""
+        totals = {}
+        for module, own, _ in self.records:
+            package = module.split(".")[0]
+            totals[package] = totals.get(package, 0.0) + own
+        return sorted(totals.items(), key=lambda total: total[1], reverse=True)
+
+
+import_timer = ImportTimer()
+if ENABLED:
+    import_timer.install()
+
+phases = []  # (階段, 結束時間)
+
+
+def mark(phase: str):
+    """記錄一個啟動階段在此時結束"""
+    if ENABLED:
+        phases.append((phase, time.perf_counter()))
+
+
+def report(entry: str, top: int = 15, file=None) -> float:
+    """印出各階段與載入最久的套件，回傳總毫秒數"""
+    file = file or sys.stdout
+    import_timer.uninstall()
+    print(f"啟動時間報告: {entry}", file=file)
+    previous = START
+    for phase, end in phases:
+        print(f"  {phase:<12}{(end - previous) * 1000:9.1f} ms", file=file)
+        previous = end
+    total_ms = (previous - START) * 1000
+    print(f"  {'合計':<12}{total_ms:9.1f} ms", file=file)
+    budget = IMPORT_BUDGET_MS.get(entry)
+    if budget is not None and phases:
+        import_ms = (phases[0][1] - START) * 1000
+        status = "超出預算" if import_ms > budget else "在預算內"
+        print(f"  載入模組 {import_ms:.1f} ms / 預算 {budget} ms（{status}）", file=file)
+    print(f"  載入最久的套件（自身時間）:", file=file)
+    for package, seconds in import_timer.by_package()[:top]:
+        print(f"    {package:<32}{seconds * 1000:9.1f} ms", file=file)
+    return total_ms
+
+
+def finish_after_first_paint(root, entry: str, close=None):
+    """--profile-startup 時，在第一個畫面繪製完成後印出報告並關閉視窗（close 預設為 root.destroy）"""
+    if not ENABLED:
+        return
+
+    def finish():
+        root.update_idletasks()
+        mark("第一個畫面")
+        report(entry)
+        (close or root.destroy)()
+
+    root.after_idle(finish)
+
+
+def measure_import(entry: str) -> float:
+    """在新的直譯器以 python -X importtime 量測 import entry 的毫秒數"""
+    import subprocess
+
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {entry}"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else entry)
+    # 最後一行是 entry 本身，第二欄為含子模組的微秒數
+    cumulative = result.stderr.strip().splitlines()[-1].split("|")[1]
+    return int(cumulative) / 1000
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # 檢查各進入點的 import 時間是否在預算內，超出時回傳非 0
+    parser = argparse.ArgumentParser(description="量測各進入點的 import 時間")
+    parser.add_argument("entries", nargs="*", default=list(IMPORT_BUDGET_MS), help="進入點模組名稱")
+    parser.add_argument("--repeat", type=int, default=3, help="量測次數，取最小值")
+    args = parser.parse_args()
+
+    over = 0
+    for entry in args.entries:
+        elapsed = min(measure_import(entry) for _ in range(args.repeat))
+        budget = IMPORT_BUDGET_MS.get(entry)
+        status = "" if budget is None else ("  超出預算" if elapsed > budget else "  OK")
+        over += budget is not None and elapsed > budget
+        print(f"{entry:<28}{elapsed:8.1f} ms{'' if budget is None else f' / {budget} ms'}{status}")
+    sys.exit(1 if over else 0)
@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from poe_core import ITEM_ID_KEY, ItemJournal, OP_ADD, OP_DELETE, OP_EDIT, SQLiteItemStore
+
+
+def make_item(index: int) -> dict:
+    return {ITEM_ID_KEY: f"id-{index}", "item_name": f"item-{index}", "receive_price": float(index), "sell_price": 2.0}
+
+
+class ItemJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="item_journal_")
+        self.path = os.path.join(self.directory, "items_data.json")
+        self.snapshot = {"items": [make_item(0), make_item(1)], "current_chaos": 100.0, "dc_ratio": 150.0}
+        ItemJournal(self.path).compact(self.snapshot)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write_changes(self, journal: ItemJournal):
+        journal.load()
+        journal.append_many([
+            (OP_ADD, {"item": make_item(2)}),
+            (OP_EDIT, {"item_id": "id-0", "fields": {"sell_price": 9.0}}),
+            (OP_DELETE, {"item_id": "id-1"}),
+        ])
+        journal.record_settings(current_chaos=250.0, dc_ratio=150.0)
+
+    def expected(self) -> dict:
+        edited = dict(make_item(0), sell_price=9.0)
+        return {"items": [edited, make_item(2)], "current_chaos": 250.0, "dc_ratio": 150.0}
+
+    def test_torn_trailing_line_is_skipped(self):
+        self.write_changes(ItemJournal(self.path))
+        # 寫到一半當機：最後一行不完整
+        with open(self.path + ".journal", "a", encoding="utf-8") as f:
+            f.write('{"op":"delete","item_id":"id-')
+
+        journal = ItemJournal(self.path)
+        self.assertEqual(journal.load(), self.expected())
+        self.assertEqual(journal.pending, 4)
+        self.assertTrue(journal.settings_replayed)
+
+    def test_replay_is_idempotent(self):
+        journal = ItemJournal(self.path)
+        self.write_changes(journal)
+        data = journal.load()
+        self.assertEqual(data, self.expected())
+
+        # 快照已寫入、日誌尚未清空時當機：日誌會在新的快照上再重播一次
+        with open(self.path + ".journal", "r", encoding="utf-8") as f:
+            journal_lines = f.read()
+        journal.compact(data)
+        with open(self.path + ".journal", "w", encoding="utf-8") as f:
+            f.write(journal_lines)
+        self.assertEqual(ItemJournal(self.path).load(), self.expected())
+        self.assertEqual(ItemJournal(self.path).load(), ItemJournal(self.path).load())
+
+    def test_settings_replayed_only_for_settings_records(self):
+        journal = ItemJournal(self.path)
+        journal.load()
+        journal.record_add(make_item(3))
+        # 與快照相同的設定值不寫入日誌
+        journal.record_settings(current_chaos=100.0, dc_ratio=150.0)
+
+        reloaded = ItemJournal(self.path)
+        reloaded.load()
+        self.assertFalse(reloaded.settings_replayed)
+        self.assertEqual(reloaded.pending, 1)
+
+    def test_compacts_after_500_records(self):
+        journal = ItemJournal(self.path)
+        data = journal.load()
+        for index in range(2, 501):
+            journal.record_add(make_item(index))
+            data["items"].append(make_item(index))
+        self.assertEqual(journal.pending, 499)
+        self.assertFalse(journal.needs_compaction())
+
+        journal.record_edit("id-0", sell_price=3.0)
+        data["items"][0]["sell_price"] = 3.0
+        self.assertTrue(journal.needs_compaction())
+        self.assertEqual(ItemJournal(self.path).load(), data)
+
+        journal.compact(data)
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        self.assertEqual(journal.pending, 0)
+        reloaded = ItemJournal(self.path)
+        self.assertEqual(reloaded.load(), data)
+        self.assertFalse(reloaded.needs_compaction())
+
+
+class SQLiteSettingsReplayedTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="item_store_")
+        self.path = os.path.join(self.directory, "items_data.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def reload(self) -> SQLiteItemStore:
+        store = SQLiteItemStore(self.path)
+        self.addCleanup(store.close)
+        store.load()
+        return store
+
+    def test_flag_follows_settings_changes_until_compaction(self):
+        store = SQLiteItemStore(self.path)
+        store.compact({"items": [make_item(0)], "current_chaos": 100.0})
+        store.close()
+        self.assertFalse(self.reload().settings_replayed)
+
+        store = self.reload()
+        store.record_settings(current_chaos=200.0)
+        store.close()
+        store = self.reload()
+        self.assertTrue(store.settings_replayed)
+
+        data = store.load()
+        store.compact(data)
+        self.assertFalse(self.reload().settings_replayed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,281 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from poe_core.ninja_client import CATEGORIES, NinjaClient, PriceFeedError, RequestBudget
+from poe_core.price_ingest import PriceSnapshot
+
+try:
+    import requests  # noqa: F401  只有本機伺服器的測試需要
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+# 錄下來的 poe.ninja overview 回應（Settlers 聯盟，只保留部分列）
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "ninja")
+
+
+def load_fixture(category: str):
+    with open(os.path.join(FIXTURE_DIR, f"{category}.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def fixture_etag(category: str) -> str:
+    return f'"{category}-v1"'
+
+
+class ReplayResponse:
+    def __init__(self, status_code: int, body: bytes = b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise OSError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class ReplaySession:
+    """離線重播錄製的回應（取代 requests.Session 的 get）：支援 If-None-Match，並記錄每個請求
+
+    barrier 不為 None 時，每個請求都要等到指定數量的請求同時進行才回應，用來確認類別是並行抓取的。
+    """
+
+    def __init__(self, barrier: threading.Barrier = None, fail: bool = False):
+        self.barrier = barrier
+        self.fail = fail
+        self.requests = []  # (類別, If-None-Match)
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        category = parse_qs(urlsplit(url).query)["type"][0]
+        condition = (headers or {}).get("If-None-Match")
+        with self.lock:
+            self.requests.append((category, condition))
+        if self.barrier is not None:
+            self.barrier.wait()
+        if self.fail:
+            raise ConnectionError("連線失敗")
+        if condition == fixture_etag(category):
+            return ReplayResponse(304)
+        body = json.dumps(load_fixture(category)).encode("utf-8")
+        return ReplayResponse(200, body, {"ETag": fixture_etag(category)})
+
+    def close(self):
+        pass
+
+
+class FakeClock:
+    """RequestBudget 用的時鐘：sleep 只推進時間並記錄等待秒數"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class NinjaClientReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix="ninja_cache_")
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def client(self, session, **options):
+        options.setdefault("ttl", 60)
+        return NinjaClient("Settlers", self.cache_dir, session=session, **options)
+
+    def age_cache(self, client, category: str, seconds: float):
+        """將快取的取得時間往前移，模擬經過 seconds 秒"""
+        entry = client.read_cache(category)
+        entry["fetched_at"] -= seconds
+        client.write_cache(category, entry)
+
+    def test_fetch_returns_recorded_overview(self):
+        session = ReplaySession()
+        data = self.client(session).fetch("Currency")
+        self.assertEqual(data, load_fixture("Currency"))
+        snapshot = PriceSnapshot.from_overviews({"Currency": data})
+        self.assertEqual(snapshot.dc_ratio, 152.34)
+
+    def test_cache_is_reused_within_ttl(self):
+        session = ReplaySession()
+        client = self.client(session)
+        client.fetch("Scarab")
+        self.assertEqual(client.fetch("Scarab"), load_fixture("Scarab"))
+        self.assertEqual(session.requests, [("Scarab", None)])
+
+    def test_ttl_expiry_sends_conditional_request(self):
+        session = ReplaySession()
+        client = self.client(session)
+        client.fetch("Fragment")
+        self.age_cache(client, "Fragment", 61)
+        self.assertEqual(client.fetch("Fragment"), load_fixture("Fragment"))
+        self.assertEqual(session.requests, [("Fragment", None), ("Fragment", fixture_etag("Fragment"))])
+
+    def test_etag_304_reuses_cached_data_and_refreshes_timestamp(self):
+        session = ReplaySession()
+        client = self.client(session)
+        client.fetch("Currency")
+        self.age_cache(client, "Currency", 3600)
+        stale = client.read_cache("Currency")["fetched_at"]
+
+        self.assertEqual(client.fetch("Currency"), load_fixture("Currency"))
+        entry = client.read_cache("Currency")
+        self.assertEqual(entry["etag"], fixture_etag("Currency"))
+        self.assertGreater(entry["fetched_at"], stale)
+        # 304 之後快取重新計時，TTL 內不再發出請求
+        client.fetch("Currency")
+        self.assertEqual(len(session.requests), 2)
+
+    def test_fetch_all_requests_categories_concurrently(self):
+        # 三個請求必須同時進行才能通過 barrier；依序抓取時 barrier 逾時，請求失敗
+        session = ReplaySession(barrier=threading.Barrier(len(CATEGORIES), timeout=5))
+        overviews = self.client(session).fetch_all()
+        self.assertEqual(set(overviews), set(CATEGORIES))
+        for category, data in overviews.items():
+            self.assertEqual(data, load_fixture(category))
+        self.assertEqual(sorted(category for category, _ in session.requests), sorted(CATEGORIES))
+
+    def test_fetch_all_raises_without_cache(self):
+        with self.assertRaises(PriceFeedError):
+            self.client(ReplaySession(fail=True)).fetch_all()
+
+    def test_stale_cache_is_used_when_request_fails(self):
+        self.client(ReplaySession()).fetch_all()
+        client = self.client(ReplaySession(fail=True), ttl=0)
+        self.assertEqual(client.fetch("Scarab"), load_fixture("Scarab"))
+
+    def test_offline_replays_cache_only(self):
+        self.client(ReplaySession()).fetch_all()
+        offline = NinjaClient("Settlers", self.cache_dir, offline=True, ttl=0)
+        self.assertEqual(offline.fetch_all(), {category: load_fixture(category) for category in CATEGORIES})
+        with self.assertRaises(PriceFeedError):
+            NinjaClient("Standard", self.cache_dir, offline=True).fetch("Currency")
+
+
+class RequestBudgetTest(unittest.TestCase):
+    def test_waits_when_window_is_full(self):
+        clock = FakeClock()
+        budget = RequestBudget(2, 10.0, clock=clock.clock, sleep=clock.sleep)
+        for _ in range(5):
+            budget.acquire()
+        self.assertEqual(clock.sleeps, [10.0, 10.0])
+        self.assertEqual(clock.now, 20.0)
+
+    def test_window_slides(self):
+        clock = FakeClock()
+        budget = RequestBudget(2, 10.0, clock=clock.clock, sleep=clock.sleep)
+        budget.acquire()
+        clock.now = 6.0
+        budget.acquire()
+        clock.now = 11.0
+        # 第一個請求已離開時間窗，不必等待
+        budget.acquire()
+        self.assertEqual(clock.sleeps, [])
+        budget.acquire()
+        self.assertEqual(clock.sleeps, [5.0])
+
+    def test_client_spends_budget_only_on_network_requests(self):
+        clock = FakeClock()
+        budget = RequestBudget(2, 60.0, clock=clock.clock, sleep=clock.sleep)
+        cache_dir = tempfile.mkdtemp(prefix="ninja_cache_")
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        client = NinjaClient("Settlers", cache_dir, ttl=60, budget=budget, session=ReplaySession())
+        client.fetch_all()
+        # 三個類別、每分鐘兩個請求：第三個請求等待一個時間窗
+        self.assertEqual(clock.sleeps, [60.0])
+        client.fetch_all()
+        self.assertEqual(clock.sleeps, [60.0])
+
+    def test_shared_between_threads(self):
+        budget = RequestBudget(3, 0.3)
+        threads = [threading.Thread(target=budget.acquire) for _ in range(6)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.29)
+        self.assertLessEqual(len(budget.sent), 3)
+
+
+class OverviewHandler(BaseHTTPRequestHandler):
+    """本機的 poe.ninja：回傳錄製的 overview，支援 ETag 條件請求"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        category = parse_qs(urlsplit(self.path).query)["type"][0]
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            server.requests.append((category, self.headers.get("If-None-Match")))
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+        if self.headers.get("If-None-Match") == fixture_etag(category):
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(load_fixture(category)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", fixture_etag(category))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@unittest.skipUnless(HAS_REQUESTS, "需要 requests")
+class NinjaClientServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), OverviewHandler)
+        self.server.lock = threading.Lock()
+        self.server.active = self.server.peak = 0
+        self.server.requests = []
+        self.server.delay = 0.2
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.cache_dir = tempfile.mkdtemp(prefix="ninja_cache_")
+        self.client = NinjaClient("Settlers", self.cache_dir, ttl=60,
+                                  base_url=f"http://127.0.0.1:{self.server.server_port}/api/data")
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_fetch_all_is_concurrent_and_revalidates_with_etag(self):
+        start = time.perf_counter()
+        overviews = self.client.fetch_all()
+        elapsed = time.perf_counter() - start
+        self.assertEqual(overviews["Scarab"], load_fixture("Scarab"))
+        self.assertEqual(self.server.peak, len(CATEGORIES))
+        self.assertLess(elapsed, self.server.delay * len(CATEGORIES))
+
+        self.client.ttl = 0
+        self.assertEqual(self.client.fetch_all(), overviews)
+        conditions = [condition for _, condition in self.server.requests[len(CATEGORIES):]]
+        self.assertEqual(sorted(conditions), sorted(fixture_etag(category) for category in CATEGORIES))
+
+
+if __name__ == "__main__":
+    unittest.main()
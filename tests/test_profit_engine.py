@@ -0,0 +1,102 @@
+import copy
+import random
+import unittest
+
+from poe_core import DERIVED_FIELDS, LOSS_TEXT, ItemCalculator
+
+try:
+    import numpy  # noqa: F401  ProfitEngine 需要
+    from poe_core import ProfitEngine, calculate_profits
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+SETTINGS = [
+    # (current_chaos, dc_ratio, item_coin_value)
+    (5000.0, 152.34, 2.5),
+    (0.0, 150.0, 0.0),
+    (123.45, 1.0, 1.1),
+]
+
+
+def random_items(seed: int, count: int = 300):
+    """隨機物品：價格有整數、浮點數、0、負數，神聖石價格有分數字串，且包含虧損的列"""
+    rng = random.Random(seed)
+    items = []
+    for index in range(count):
+        kind = index % 6
+        if kind == 0:
+            receive_price = rng.randint(1, 200)  # 整數價格
+        elif kind == 1:
+            receive_price = 0.0
+        elif kind == 2:
+            receive_price = -round(rng.uniform(0.1, 50), 2)
+        else:
+            receive_price = round(rng.uniform(0.01, 300), rng.choice((0, 1, 2, 3)))
+        # 約一半的列賣價低於買價（虧損）
+        sell_price = round(abs(receive_price) * rng.uniform(0.5, 1.6), 2)
+        if rng.random() < 0.4:
+            divine_sell_price = f"{rng.randint(0, 3)}/{rng.randint(1, 12)}"
+        elif rng.random() < 0.1:
+            divine_sell_price = 0
+        else:
+            divine_sell_price = round(rng.uniform(0, 2), 4)
+        items.append({
+            "item_name": f"item-{index}",
+            "receive_price": receive_price,
+            "sell_price": sell_price,
+            "divine_sell_price": divine_sell_price,
+        })
+    return items
+
+
+def calculate_one_by_one(items, current_chaos, dc_ratio, item_coin_value):
+    for item in items:
+        ItemCalculator.calculate_profit(item, current_chaos, dc_ratio, item_coin_value)
+
+
+@unittest.skipUnless(HAS_NUMPY, "需要 numpy")
+class ProfitEngineMatchesCalculatorTest(unittest.TestCase):
+    def assert_same_items(self, expected, actual):
+        for row, (want, got) in enumerate(zip(expected, actual)):
+            for field in DERIVED_FIELDS:
+                with self.subTest(row=row, field=field, item=want):
+                    self.assertEqual(got[field], want[field])
+                    self.assertIs(type(got[field]), type(want[field]))
+
+    def test_calculate_profits_matches_item_calculator(self):
+        for seed in range(3):
+            items = random_items(seed)
+            for current_chaos, dc_ratio, item_coin_value in SETTINGS:
+                expected = copy.deepcopy(items)
+                actual = copy.deepcopy(items)
+                calculate_one_by_one(expected, current_chaos, dc_ratio, item_coin_value)
+                calculate_profits(actual, current_chaos, dc_ratio, item_coin_value)
+                self.assert_same_items(expected, actual)
+
+    def test_samples_cover_edge_cases(self):
+        items = random_items(0)
+        calculate_one_by_one(items, *SETTINGS[0])
+        self.assertTrue(any(isinstance(item["divine_sell_price"], str) for item in items))
+        self.assertTrue(any(item["receive_price"] == 0 for item in items))
+        self.assertTrue(any(item["receive_price"] < 0 for item in items))
+        self.assertTrue(any(item["avg_coin_d"] == LOSS_TEXT for item in items))
+        self.assertTrue(any(item["avg_coin_c"] == 0 and item["purchasable_with_chaos"] > 0 for item in items))
+        self.assertTrue(any(isinstance(item["required_chaos"], int) for item in items))
+
+    def test_to_columns_matches_write_back(self):
+        items = random_items(7, count=50)
+        engine = ProfitEngine.from_items(items)
+        result = engine.compute(*SETTINGS[0])
+        columns = ProfitEngine.to_columns(result)
+        calculate_profits(items, *SETTINGS[0])
+        for field in DERIVED_FIELDS:
+            self.assertEqual(columns[field], [item[field] for item in items])
+
+    def test_invalid_divine_price(self):
+        with self.assertRaises(ValueError):
+            calculate_profits([{"receive_price": 1.0, "sell_price": 2.0, "divine_sell_price": "abc"}], *SETTINGS[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import copy
+import unittest
+
+from poe_core import DERIVED_FIELDS
+
+try:
+    import numpy  # noqa: F401  RecomputeGraph 需要
+    from poe_core import RecomputeGraph, calculate_profits
+    from poe_core.coin_routes import DEFAULT_FEES
+    from poe_core.profit_engine import COLUMN_GRAPH
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from tests.test_profit_engine import random_items
+
+
+def affected_columns(inputs):
+    """依欄位依賴圖找出受 inputs 影響的所有欄位"""
+    dirty = set(inputs)
+    for name, dependencies, _ in COLUMN_GRAPH:
+        if dirty.intersection(dependencies):
+            dirty.add(name)
+    return dirty - set(inputs)
+
+
+def changed_route_inputs(old_dc_ratio, new_dc_ratio):
+    old = DEFAULT_FEES.route_inputs(old_dc_ratio)
+    new = DEFAULT_FEES.route_inputs(new_dc_ratio)
+    return [name for name in old if old[name] != new[name]]
+
+
+@unittest.skipUnless(HAS_NUMPY, "需要 numpy")
+class RecomputeGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.settings = {"current_chaos": 5000.0, "dc_ratio": 152.34, "item_coin_value": 2.5}
+        self.items = random_items(11, count=60)
+        self.graph = RecomputeGraph(self.items, **self.settings)
+
+    def assert_matches_full_run(self):
+        expected = copy.deepcopy(self.items)
+        calculate_profits(expected, **self.settings)
+        for row, (want, got) in enumerate(zip(expected, self.items)):
+            for field in DERIVED_FIELDS:
+                with self.subTest(row=row, field=field):
+                    self.assertEqual(got[field], want[field])
+                    self.assertIs(type(got[field]), type(want[field]))
+
+    def assert_recomputed(self, count, inputs, rows):
+        columns = affected_columns(inputs)
+        self.assertEqual(self.graph.last_stats, {name: rows for name in columns})
+        self.assertEqual(count, len(columns) * rows)
+
+    def test_initial_values_match_full_run(self):
+        self.assert_matches_full_run()
+        self.assertEqual(self.graph.recompute(), 0)
+
+    def test_sequence_of_changes(self):
+        rows = len(self.items)
+
+        # 設定值：只重算依賴該設定值的欄位，全部列
+        self.settings["current_chaos"] = 1234.0
+        self.graph.update_settings(**self.settings)
+        self.assert_recomputed(self.graph.recompute(), ["current_chaos"], rows)
+        self.assert_matches_full_run()
+
+        # 相同的設定值不需要重算
+        self.graph.update_settings(**self.settings)
+        self.assertEqual(self.graph.recompute(), 0)
+
+        # dc_ratio 也會改變 D換C 的單位金幣成本
+        old_dc_ratio, self.settings["dc_ratio"] = self.settings["dc_ratio"], 149.5
+        self.graph.update_settings(**self.settings)
+        inputs = ["dc_ratio"] + changed_route_inputs(old_dc_ratio, self.settings["dc_ratio"])
+        self.assert_recomputed(self.graph.recompute(), inputs, rows)
+        self.assert_matches_full_run()
+
+        # 單列修改：只重算該列受影響的欄位
+        for row, field, value in ((3, "sell_price", 999.0), (7, "receive_price", 12),
+                                  (9, "divine_sell_price", "3/4"), (10, "receive_price", 0.0)):
+            self.graph.set_item_value(row, field, value)
+            self.assert_recomputed(self.graph.recompute(), [field], 1)
+            self.assert_matches_full_run()
+
+        # 新增物品：新的一列全部重算
+        for item in random_items(12, count=3):
+            self.graph.append_item(item)
+            self.assertEqual(self.graph.recompute(), len(COLUMN_GRAPH))
+            self.assert_matches_full_run()
+
+        # 刪除物品：其餘列不必重算
+        for row in (0, 20, -1):
+            self.graph.remove_item(row)
+            self.assertEqual(self.graph.recompute(), 0)
+            self.assert_matches_full_run()
+
+        # 刪除後修改與設定值變動仍對應到正確的列
+        self.graph.set_item_value(5, "sell_price", 1.0)
+        self.assert_recomputed(self.graph.recompute(), ["sell_price"], 1)
+        self.settings["item_coin_value"] = 3.0
+        self.graph.update_settings(**self.settings)
+        self.assert_recomputed(self.graph.recompute(), ["item_coin_value"], len(self.items))
+        self.assert_matches_full_run()
+
+    def test_batch_edit_marks_only_given_rows(self):
+        self.graph.set_item_values("receive_price", [1, 2, 3], [10, 20.5, 30])
+        self.assert_recomputed(self.graph.recompute(), ["receive_price"], 3)
+        self.assert_matches_full_run()
+
+
+if __name__ == "__main__":
+    unittest.main()
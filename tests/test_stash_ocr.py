@@ -0,0 +1,118 @@
+import os
+import shutil
+import threading
+import unittest
+
+from poe_core.stash_ocr import STASH_REGIONS, StashReader, default_scale, iter_image_paths
+
+try:
+    from PIL import Image
+    import cv2  # noqa: F401  預設的預處理需要
+    import numpy as np
+    HAS_IMAGING = True
+except ImportError:
+    HAS_IMAGING = False
+
+try:
+    import pytesseract  # noqa: F401  實際辨識需要
+    HAS_TESSERACT = shutil.which("tesseract") is not None
+except ImportError:
+    HAS_TESSERACT = False
+
+ERROR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Error")
+
+# Error/ 中的截圖分類：只有倉庫截圖需要辨識，其餘檔案附上不辨識的原因；新增截圖時需在此登記
+STASH_SCREENSHOTS = ("3.png", "3.jpg")  # 1600x900 遊戲視窗的倉庫畫面（3.jpg 為有損壓縮版本）
+NON_STASH_IMAGES = {
+    "0.png": "交易計算器的畫面，不是倉庫截圖",
+    "1.png": "交易計算器的畫面，不是倉庫截圖",
+    "2.png": "交易計算器的畫面，不是倉庫截圖",
+    "Chaos_Orb_inventory_icon.png": "78x78 的混沌石圖示，比辨識區域小",
+}
+
+
+class DigitStub:
+    """不需要 Tesseract 的辨識函式：由預處理後影像的像素總和產生固定的數字字串，並記錄呼叫次數"""
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, processed, psm: str) -> str:
+        with self.lock:
+            self.calls += 1
+        return str(int(np.asarray(processed, dtype=np.int64).sum()) % 100000)
+
+
+def stash_paths():
+    return [os.path.join(ERROR_DIR, name) for name in STASH_SCREENSHOTS]
+
+
+@unittest.skipUnless(HAS_IMAGING, "需要 Pillow、numpy 與 opencv-python")
+class StashReaderTest(unittest.TestCase):
+    def test_error_images_are_classified(self):
+        names = {os.path.basename(path) for path in iter_image_paths(ERROR_DIR)}
+        self.assertEqual(names, set(STASH_SCREENSHOTS) | set(NON_STASH_IMAGES))
+
+    def test_regions_fall_inside_stash_screenshots(self):
+        scale = default_scale()
+        for path in stash_paths():
+            with Image.open(path) as image:
+                width, height = image.size
+            for region in STASH_REGIONS:
+                left, top, right, bottom = region.box(scale)
+                with self.subTest(image=os.path.basename(path), region=region.name):
+                    self.assertTrue(0 <= left < right <= width and 0 <= top < bottom <= height)
+
+    def test_quantities_are_int_or_none(self):
+        reader = StashReader(recognize=DigitStub())
+        for reading in reader.read_many(stash_paths()):
+            self.assertEqual(set(reading.quantities), {region.name for region in STASH_REGIONS})
+            for quantity in reading.quantities.values():
+                self.assertIsInstance(quantity, int)
+            self.assertGreaterEqual(reading.timings["wall"], 0.0)
+
+        # 辨識不到數字時為 None
+        blank = StashReader(recognize=lambda processed, psm: "").read(stash_paths()[0])
+        self.assertEqual(blank.quantities, {region.name: None for region in STASH_REGIONS})
+
+    def test_second_read_hits_caches(self):
+        recognize = DigitStub()
+        reader = StashReader(recognize=recognize)
+        path = stash_paths()[0]
+        first = reader.read(path)
+        calls = recognize.calls
+        self.assertEqual(calls, len(STASH_REGIONS))
+        self.assertEqual(reader.stats["preprocess_hits"], 0)
+
+        second = reader.read(path)
+        self.assertEqual(second.quantities, first.quantities)
+        self.assertEqual(recognize.calls, calls)
+        self.assertEqual(reader.stats["preprocess_hits"], len(STASH_REGIONS))
+        self.assertEqual(reader.stats["recognize_hits"], len(STASH_REGIONS))
+        self.assertEqual(reader.stats["regions"], 2 * len(STASH_REGIONS))
+
+    def test_pil_image_source(self):
+        reader = StashReader(recognize=DigitStub())
+        with Image.open(stash_paths()[0]) as image:
+            from_image = reader.read(image.copy())
+        self.assertEqual(from_image.quantities, reader.read(stash_paths()[0]).quantities)
+
+    def test_image_smaller_than_regions_is_rejected(self):
+        recognize = DigitStub()
+        reader = StashReader(recognize=recognize)
+        with self.assertRaises(ValueError):
+            reader.read(os.path.join(ERROR_DIR, "Chaos_Orb_inventory_icon.png"))
+        self.assertEqual(recognize.calls, 0)
+
+
+@unittest.skipUnless(HAS_IMAGING and HAS_TESSERACT, "需要 Pillow、numpy、opencv-python、pytesseract 與 tesseract 執行檔")
+class StashReaderTesseractTest(unittest.TestCase):
+    def test_reads_stash_counts(self):
+        # Error/3.png 倉庫中的混沌石與神聖石數量
+        reading = StashReader().read(os.path.join(ERROR_DIR, "3.png"))
+        self.assertEqual(reading.quantities, {"chaos": 5000, "divine": 16})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+from contextlib import nullcontext
+from typing import Callable, Dict, Hashable, List, Sequence
+
+
+class TreeviewReconciler:
+    """以物品 key 對應 Treeview 列，重算後只更新值或高亮標籤有變動的列，而不是清空後全部重新插入"""
+
+    def __init__(self, tree, format_row: Callable[[Dict], Sequence], row_tag: Callable[[Dict], str],
+                 key: Callable[[Dict], Hashable] = id, lock=None):
+        self.tree = tree
+        self.format_row = format_row
+        self.row_tag = row_tag
+        self.key = key
+        self.lock = lock or nullcontext()  # 背景執行緒會寫入物品時，讀取物品期間持有此鎖
+
+        self.row_ids: Dict[Hashable, str] = {}  # 物品 key -> Treeview 列 ID
+        self.keys: Dict[str, Hashable] = {}  # Treeview 列 ID -> 物品 key
+        self.shown: Dict[Hashable, tuple] = {}  # 物品 key -> 目前顯示的 (values, tag)
+        self.order: List[Hashable] = []  # 目前 Treeview 中的列順序
+        self.last_stats: Dict[str, int] = {}
+
+    def row_id_of(self, item: Dict):
+        """取得物品目前對應的列 ID"""
+        return self.row_ids.get(self.key(item))
+
+    def key_of(self, row_id: str) -> Hashable:
+        """由 Treeview 列 ID 取得物品 key（O(1)，不受排序影響）"""
+        return self.keys[row_id]
+
+    def _render(self, item: Dict) -> tuple:
+        return tuple(self.format_row(item)), self.row_tag(item)
+
+    def update_item(self, item: Dict) -> bool:
+        """只更新單一物品的列，值與標籤都沒變時不呼叫 tree.item"""
+        with self.lock:
+            key = self.key(item)
+            row = self._render(item)
+        if self.shown.get(key) == row:
+            return False
+        self.tree.item(self.row_ids[key], values=row[0], tags=(row[1],))
+        self.shown[key] = row
+        return True
+
+    def sync(self, items: List[Dict]) -> Dict[str, int]:
+        """讓 Treeview 與物品列表一致：刪除消失的列、就地插入新列、只修補有變動的列、必要時調整順序"""
+        stats = {"inserted": 0, "updated": 0, "deleted": 0, "moved": 0}
+        with self.lock:
+            keys = [self.key(item) for item in items]
+            rows = [self._render(item) for item in items]
+        wanted = set(keys)
+
+        # 刪除已不存在的物品
+        for key in [key for key in self.order if key not in wanted]:
+            row_id = self.row_ids.pop(key)
+            del self.keys[row_id]
+            self.tree.delete(row_id)
+            del self.shown[key]
+            stats["deleted"] += 1
+        self.order = [key for key in self.order if key in wanted]
+
+        # 依新順序逐列比對。前 index 列已就位，其餘舊列的相對順序不變，
+        # 所以第 index 列目前是舊順序中第一個尚未就位的 key；只移動位置不對的列，整體 O(n)
+        previous = self.order
+        placed = set()
+        cursor = 0
+        for index, (key, row) in enumerate(zip(keys, rows)):
+            row_id = self.row_ids.get(key)
+            if row_id is None:
+                row_id = self.row_ids[key] = self.tree.insert('', index, values=row[0], tags=(row[1],))
+                self.keys[row_id] = key
+                self.shown[key] = row
+                stats["inserted"] += 1
+                continue
+            if self.shown[key] != row:
+                self.tree.item(row_id, values=row[0], tags=(row[1],))
+                self.shown[key] = row
+                stats["updated"] += 1
+            while previous[cursor] in placed:
+                cursor += 1
+            if previous[cursor] == key:
+                cursor += 1
+            else:
+                self.tree.move(row_id, '', index)
+                stats["moved"] += 1
+            placed.add(key)
+
+        self.order = keys
+        self.last_stats = stats
+        return stats
+
+    def clear(self):
+        """清空所有列"""
+        for row_id in self.row_ids.values():
+            self.tree.delete(row_id)
+        self.row_ids.clear()
+        self.keys.clear()
+        self.shown.clear()
+        self.order = []
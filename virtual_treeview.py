@@ -0,0 +1,135 @@
+import tkinter as tk
+from contextlib import nullcontext
+from typing import Callable, List, Dict, Sequence
+
+
+class VirtualTreeview:
+    """虛擬列表：物品保存在模型中，Treeview 只放可見範圍加上少量緩衝的列，捲動時重複使用既有列"""
+
+    def __init__(self, tree, scrollbar, format_row: Callable[[Dict], Sequence], row_tag: Callable[[Dict], str],
+                 buffer_rows: int = 5, lock=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.format_row = format_row
+        self.row_tag = row_tag
+        self.buffer_rows = buffer_rows
+        self.lock = lock or nullcontext()  # 背景執行緒會寫入物品時，繪製期間持有此鎖
+
+        self.items: List[Dict] = []
+        self.offset = 0  # 第一個可見列對應的物品索引
+        self.pool: List[str] = []  # 重複使用的 Treeview 列 ID
+        self.shown: Dict[str, tuple] = {}  # 每個列 ID 目前顯示的 (values, tag)，用來略過未變動的列
+
+        # 捲動改由虛擬列表處理，Treeview 本身不再捲動
+        self.scrollbar.configure(command=self.yview)
+        self.tree.configure(yscrollcommand="")
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+        self.tree.bind("<Up>", lambda event: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self.move_selection(1))
+
+    def visible_rows(self) -> int:
+        """Treeview 可見的列數"""
+        return max(1, int(self.tree.cget("height")))
+
+    def max_offset(self) -> int:
+        return max(0, len(self.items) - self.visible_rows())
+
+    def set_items(self, items: List[Dict]):
+        """更換模型並重繪可見範圍"""
+        self.items = items
+        self.refresh()
+
+    def index_of(self, row_id: str) -> int:
+        """由 Treeview 列 ID 取得物品在模型中的索引"""
+        return self.offset + self.pool.index(row_id)
+
+    def row_id_of(self, index: int):
+        """由物品索引取得目前顯示該物品的列 ID，不在可見範圍內則回傳 None"""
+        position = index - self.offset
+        if 0 <= position < len(self.pool):
+            return self.pool[position]
+        return None
+
+    def selected_indices(self) -> List[int]:
+        """目前選取的物品索引"""
+        return [self.index_of(row_id) for row_id in self.tree.selection() if row_id in self.pool]
+
+    def refresh(self, selected: List[int] = None):
+        """只重繪可見範圍的列：列數不足時補列，多餘時刪除，其餘列重複使用"""
+        if selected is None:
+            selected = self.selected_indices()
+
+        self.offset = min(self.offset, self.max_offset())
+        wanted = min(len(self.items) - self.offset, self.visible_rows() + self.buffer_rows)
+
+        while len(self.pool) > wanted:
+            row_id = self.pool.pop()
+            self.shown.pop(row_id, None)
+            self.tree.delete(row_id)
+        while len(self.pool) < wanted:
+            self.pool.append(self.tree.insert('', 'end', values=()))
+
+        with self.lock:
+            rows = [(tuple(self.format_row(item)), self.row_tag(item))
+                    for item in self.items[self.offset:self.offset + len(self.pool)]]
+        for row_id, row in zip(self.pool, rows):
+            if self.shown.get(row_id) != row:
+                self.tree.item(row_id, values=row[0], tags=(row[1],))
+                self.shown[row_id] = row
+
+        # 捲動後讓選取跟著物品，而不是跟著列
+        visible_selection = [self.row_id_of(index) for index in selected]
+        self.tree.selection_set([row_id for row_id in visible_selection if row_id is not None])
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        total = len(self.items)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        first = self.offset / total
+        last = min(1.0, (self.offset + self.visible_rows()) / total)
+        self.scrollbar.set(first, last)
+
+    def scroll_to(self, offset: int):
+        offset = max(0, min(int(offset), self.max_offset()))
+        if offset != self.offset:
+            selected = self.selected_indices()
+            self.offset = offset
+            self.refresh(selected)
+
+    def scroll(self, rows: int):
+        self.scroll_to(self.offset + rows)
+        return "break"
+
+    def yview(self, *args):
+        """Scrollbar 的 command 回呼，支援 moveto 與 scroll units/pages"""
+        if not args:
+            return
+        if args[0] == tk.MOVETO:
+            self.scroll_to(round(float(args[1]) * len(self.items)))
+        elif args[0] == tk.SCROLL:
+            step = int(args[1])
+            if args[2] == tk.PAGES:
+                step *= self.visible_rows()
+            self.scroll(step)
+
+    def on_mousewheel(self, event):
+        return self.scroll(-1 if event.delta > 0 else 1)
+
+    def move_selection(self, step: int):
+        """鍵盤上下移動選取，超出可見範圍時捲動"""
+        selection = [row_id for row_id in self.tree.selection() if row_id in self.pool]
+        if not selection or not self.items:
+            return None
+        index = max(0, min(self.index_of(selection[0]) + step, len(self.items) - 1))
+        if index < self.offset:
+            self.scroll_to(index)
+        elif index >= self.offset + self.visible_rows():
+            self.scroll_to(index - self.visible_rows() + 1)
+        row_id = self.row_id_of(index)
+        self.tree.selection_set([row_id])
+        self.tree.focus(row_id)
+        return "break"